@@ -2,5 +2,11 @@ if [ -z "$1" ] ; then
     (>&2 echo "Aborting: Need export directory as argument")
     exit 1
 fi
-rsync -av --delete --exclude="test" --exclude="__pycache__" --exclude=".git*" --exclude=".idea" . "$1/Abakus"
+rsync -av --delete --exclude="test" --exclude="__pycache__" --exclude=".git*" --exclude=".idea" --exclude="/resources" . "$1/Abakus"
+# die festen Ressourcen samt fertigem Stylesheet als ein Archiv;
+# die editierbare ötv.csv legt resources.py daneben, damit Änderungen nachgeladen werden
+CSS_DIR=$(mktemp -d)
+python3 src/gui/cssVars.py "$CSS_DIR/stylesheet.css"
+python3 src/abakus/resources.py "$1/Abakus/resources.zip" "$CSS_DIR/stylesheet.css"
+rm -r "$CSS_DIR"
 sync
@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Dict, Set, Tuple
+
+from abakus.laufend import Anstellung
+from abakus.model import Entgeltgruppe
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+Schlüssel = Tuple[int, Entgeltgruppe]
+
+
+class AbhängigkeitsIndex:
+    """
+        Merkt sich, welche Positionen in welchen Monaten Gehaltsdaten zu
+        welchem (Jahr, Gruppe) benötigen. Dazu zählen auch die Basis-Stellen
+        der Jahressonderzahlung.
+
+        Das Jahr ist dabei das angefragte, nicht das tatsächlich verwendete:
+        ob sich für ein Jahr durch einen Rückgriff auf ein früheres Jahr etwas
+        ändert, ergibt sich beim Vergleich der jeweils gefundenen Gehälter.
+    """
+
+    def __init__(self):
+        self._nutzer: Dict[Schlüssel, Dict[str, Set[date]]] = {}
+        self._schlüssel: Dict[str, Set[Schlüssel]] = {}
+
+    def __contains__(self, kennung: str):
+        return kennung in self._schlüssel
+
+    def registriere(self, kennung: str, anstellung: Anstellung):
+        """
+            Nimmt die Abhängigkeiten der Anstellung auf; bisherige zur gleichen Kennung werden ersetzt
+        """
+        if kennung in self._schlüssel:
+            self.entferne(kennung)
+
+        schlüssel = self._schlüssel[kennung] = set()
+
+        def nutze(jahr: int, gruppe: Entgeltgruppe, stichtag: date):
+            key = (jahr, gruppe)
+            schlüssel.add(key)
+            self._nutzer.setdefault(key, {}).setdefault(kennung, set()).add(stichtag)
+
+        for stichtag, stelle in anstellung:
+            nutze(stichtag.year, stelle.gus.gruppe, stichtag)
+            if stichtag.month == 11 and anstellung.bis >= date(stichtag.year, 12, 1):
+                for base in anstellung.findBaseStellen(stichtag.year):
+                    nutze(stichtag.year, base.gus.gruppe, stichtag)
+
+    def entferne(self, kennung: str):
+        for key in self._schlüssel.pop(kennung, ()):
+            nutzer = self._nutzer[key]
+            del nutzer[kennung]
+            if not nutzer:
+                del self._nutzer[key]
+
+    def nutzer(self, jahr: int, gruppe: Entgeltgruppe) -> Dict[str, Set[date]]:
+        """
+            :return: pro Kennung die Stichtage, die Daten zu Jahr und Gruppe benötigen
+        """
+        return self._nutzer.get((jahr, gruppe), {})
+
+    def geänderteSchlüssel(self, alt, neu) -> Set[Schlüssel]:
+        """
+            :return: die benutzten (Jahr, Gruppe), für die die beiden ÖTV-Daten unterschiedliche Gehälter liefern
+        """
+        if alt is None or alt.zuschlag != neu.zuschlag:
+            return set(self._nutzer)
+        return {(j, g) for j, g in self._nutzer
+                if alt.gehälterOderNone(j, g) != neu.gehälterOderNone(j, g)}
+
+    def betroffen(self, alt, neu) -> Dict[str, Set[date]]:
+        """
+            :return: pro Kennung die Stichtage, deren Kosten sich beim Wechsel der ÖTV-Daten ändern können
+        """
+        result = {}
+        for key in self.geänderteSchlüssel(alt, neu):
+            for kennung, stichtage in self._nutzer[key].items():
+                result.setdefault(kennung, set()).update(stichtage)
+        return result
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Gruppierte Summen über Monatskosten.
+
+Eine Zeile ist alles mit stichtag, gus, umfangProzent, kosten und
+sonderzahlung - also MonatsKosten ebenso wie KostenZeilen. Dazu kommen
+optional die Merkmale der Position (etwa Kostenstelle oder Projekt).
+Ein Schlüssel ist eine Funktion (Zeile, Merkmale) -> Wert; die Summen
+werden pro Kombination der Schlüsselwerte in einem Durchlauf gebildet,
+der Speicherbedarf hängt nur von der Zahl der Gruppen ab.
+"""
+
+Schlüssel = Callable[[Any, Mapping[str, str]], Any]
+
+
+def schlüsselKennung(schlüssel: Schlüssel) -> str:
+    """
+        :return: eine über Programmläufe stabile Bezeichnung des Schlüssels samt seiner Parameter,
+                etwa um gespeicherte Summen wiederzuerkennen
+        :raise AssertionError: für Schlüssel ohne stabile Bezeichnung wie Lambdas oder lokale Funktionen
+    """
+    kennung = getattr(schlüssel, "kennung", None)
+    if kennung is not None:
+        return kennung
+    assert "<" not in schlüssel.__qualname__, "Schlüssel {!r} hat keine stabile Kennung".format(schlüssel)
+    return "{}.{}".format(schlüssel.__module__, schlüssel.__qualname__)
+
+
+def nachJahr(zeile, _merkmale):
+    return zeile.stichtag.year
+
+
+def nachQuartal(zeile, _merkmale):
+    return zeile.stichtag.year, (zeile.stichtag.month - 1) // 3 + 1
+
+
+def nachGeschäftsjahr(startMonat: int) -> Schlüssel:
+    """
+        :param startMonat: der erste Monat des Geschäftsjahres; das Geschäftsjahr
+                trägt die Jahreszahl seines Beginns
+    """
+    assert 1 <= startMonat <= 12, "Ungültiger Monat {}".format(startMonat)
+
+    def geschäftsjahr(zeile, _merkmale):
+        return zeile.stichtag.year if zeile.stichtag.month >= startMonat else zeile.stichtag.year - 1
+
+    geschäftsjahr.kennung = "{}.nachGeschäftsjahr({})".format(__name__, startMonat)
+    return geschäftsjahr
+
+
+def nachGruppe(zeile, _merkmale):
+    return zeile.gus.gruppe
+
+
+def nachStufe(zeile, _merkmale):
+    return zeile.gus.stufe
+
+
+def nachMerkmal(name: str) -> Schlüssel:
+    """
+        :return: einen Schlüssel nach dem benannten Merkmal der Position; None, falls es fehlt
+    """
+
+    def merkmal(_zeile, merkmale):
+        return merkmale.get(name)
+
+    merkmal.kennung = "{}.nachMerkmal({!r})".format(__name__, name)
+    return merkmal
+
+
+@dataclass
+class Summen:
+    kosten: Decimal = Decimal(0)
+    sonderzahlungen: Decimal = Decimal(0)
+    monate: int = 0
+
+    @property
+    def gesamt(self) -> Decimal:
+        return self.kosten + self.sonderzahlungen
+
+    def add(self, andere: "Summen"):
+        self.kosten += andere.kosten
+        self.sonderzahlungen += andere.sonderzahlungen
+        self.monate += andere.monate
+
+    def sub(self, andere: "Summen"):
+        self.kosten -= andere.kosten
+        self.sonderzahlungen -= andere.sonderzahlungen
+        self.monate -= andere.monate
+
+
+class Aggregation:
+    """
+        Summiert Zeilen aus beliebig vielen Quellen nach den gegebenen Schlüsseln
+    """
+
+    def __init__(self, *schlüssel: Schlüssel):
+        assert schlüssel, "Mindestens ein Schlüssel wird benötigt"
+        self.schlüssel = schlüssel
+        self.summen: Dict[Tuple, Summen] = {}
+
+    def add(self, zeilen: Iterable, merkmale: Optional[Mapping[str, str]] = None) -> "Aggregation":
+        _summiere(self.summen, self.schlüssel, zeilen, merkmale or {})
+        return self
+
+
+def _summiere(summen: Dict[Tuple, Summen], schlüssel, zeilen: Iterable, merkmale: Mapping[str, str]):
+    for zeile in zeilen:
+        key = tuple(s(zeile, merkmale) for s in schlüssel)
+        summe = summen.get(key)
+        if summe is None:
+            summe = summen[key] = Summen()
+        summe.kosten += zeile.kosten
+        summe.sonderzahlungen += zeile.sonderzahlung
+        summe.monate += 1
+
+
+def aggregiere(zeilen: Iterable, *schlüssel: Schlüssel,
+               merkmale: Optional[Mapping[str, str]] = None) -> Dict[Tuple, Summen]:
+    return Aggregation(*schlüssel).add(zeilen, merkmale).summen
+
+
+class Rollup:
+    """
+        Materialisierte Summen über ein Portfolio, die beim Hinzufügen oder
+        Entfernen einzelner Positionen nachgeführt werden, ohne die übrigen
+        Positionen erneut zu durchlaufen
+    """
+
+    def __init__(self, *schlüssel: Schlüssel):
+        assert schlüssel, "Mindestens ein Schlüssel wird benötigt"
+        self.schlüssel = schlüssel
+        self.summen: Dict[Tuple, Summen] = {}
+        self._beiträge: Dict[str, Dict[Tuple, Summen]] = {}
+
+    def __contains__(self, kennung: str):
+        return kennung in self._beiträge
+
+    def __len__(self):
+        return len(self._beiträge)
+
+    def hinzufügen(self, kennung: str, zeilen: Iterable, merkmale: Optional[Mapping[str, str]] = None):
+        """
+            Fügt die Zeilen einer Position hinzu; eine schon vorhandene Position gleicher Kennung wird ersetzt
+        """
+        if kennung in self._beiträge:
+            self.entfernen(kennung)
+
+        beitrag = {}
+        _summiere(beitrag, self.schlüssel, zeilen, merkmale or {})
+        self._beiträge[kennung] = beitrag
+
+        for key, summe in beitrag.items():
+            self.summen.setdefault(key, Summen()).add(summe)
+
+    def entfernen(self, kennung: str):
+        """
+            :raise KeyError: falls die Position unbekannt ist
+        """
+        for key, summe in self._beiträge.pop(kennung).items():
+            gesamt = self.summen[key]
+            gesamt.sub(summe)
+            if not gesamt.monate:
+                del self.summen[key]
+
+
+if __name__ == '__main__':
+    pass
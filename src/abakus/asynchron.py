@@ -0,0 +1,141 @@
+import asyncio
+import copy
+from concurrent.futures import Executor
+from decimal import Decimal
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from abakus.laufend import Anstellung, Summierer
+from abakus.portfolio import Position, PortfolioSummierer
+from abakus.spalten import KostenSpalten
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Berechnungen für asyncio-Anwendungen, ohne die Ereignisschleife zu blockieren.
+
+Die eigentliche Rechnung läuft blockweise in einem Executor. Es sind nie mehr
+als maxAusstehend Blöcke zugleich unterwegs: ist die Grenze erreicht, liest
+der Erzeuger keine weiteren Positionen, bis der Verbraucher Ergebnisse
+abgeholt hat. Wird der Verbraucher abgebrochen, werden alle noch nicht
+begonnenen Blöcke verworfen.
+
+Für einen ProcessPoolExecutor werden Summierer, Blöcke und Ergebnisse
+gepickelt; die ÖTV-Daten sollten dann ein ÖtvStand sein.
+"""
+
+Ergebnis = Tuple[Decimal, KostenSpalten]
+
+_ENDE = object()
+
+
+async def _blöcke(positionen: Union[Iterable[Position], AsyncIterable[Position]],
+                  größe: int) -> AsyncIterator[List[Position]]:
+    block = []
+    if hasattr(positionen, "__aiter__"):
+        async for position in positionen:
+            block.append(position)
+            if len(block) == größe:
+                yield block
+                block = []
+    else:
+        for position in positionen:
+            block.append(position)
+            if len(block) == größe:
+                yield block
+                block = []
+    if block:
+        yield block
+
+
+class AsyncSummierer:
+
+    def __init__(self, summierer: Summierer, executor: Optional[Executor] = None,
+                 maxAusstehend: int = 8, blockGröße: int = 50):
+        """
+            :param executor: führt die Berechnungen aus; standardmäßig der der Ereignisschleife
+            :param maxAusstehend: die Zahl der Blöcke, die höchstens zugleich berechnet werden oder
+                    auf Abholung warten
+            :param blockGröße: die Zahl der Positionen, die zusammen berechnet werden
+        """
+        assert maxAusstehend > 0, "Ungültige Zahl ausstehender Blöcke {}".format(maxAusstehend)
+        assert blockGröße > 0, "Ungültige Blockgröße {}".format(blockGröße)
+        self.summierer = summierer
+        self.executor = executor
+        self.maxAusstehend = maxAusstehend
+        self.blockGröße = blockGröße
+
+    async def calc(self, anstellung: Anstellung) -> Ergebnis:
+        """
+            :return: das Ergebnis wie von Summierer.calcSpalten
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.summierer.calcSpalten,
+                                                                anstellung)
+
+    async def berechne(self, positionen: Union[Iterable[Position], AsyncIterable[Position]]) -> Dict[str, Ergebnis]:
+        """
+            :return: pro Kennung das Ergebnis wie von PortfolioSummierer.berechne
+            :raise AssertionError: falls Kennungen doppelt vorkommen, auch in verschiedenen Blöcken
+        """
+        ergebnisse = {}
+        ströme = self.ströme(positionen)
+        try:
+            async for kennung, ergebnis in ströme:
+                ergebnisse[kennung] = ergebnis
+        finally:
+            await ströme.aclose()
+        return ergebnisse
+
+    async def ströme(self, positionen: Union[Iterable[Position], AsyncIterable[Position]]) \
+            -> AsyncIterator[Tuple[str, Ergebnis]]:
+        """
+            Liefert die Ergebnisse in der Reihenfolge der Positionen, sobald ihr Block fertig ist.
+            Wer vorzeitig aufhört, sollte den Iterator mit aclose schließen, damit die ausstehenden
+            Blöcke sofort verworfen werden.
+            :raise AssertionError: sobald eine Kennung ein zweites Mal geliefert würde
+        """
+        loop = asyncio.get_running_loop()
+        # die ÖTV-Daten bleiben für den ganzen Durchlauf dieselben, auch wenn sie zwischendurch ausgetauscht werden
+        portfolio = PortfolioSummierer(copy.copy(self.summierer))
+        warteschlange: asyncio.Queue = asyncio.Queue(self.maxAusstehend)
+        plätze = asyncio.Semaphore(self.maxAusstehend)
+        gesehen = set()
+
+        async def erzeuge():
+            try:
+                async for block in _blöcke(positionen, self.blockGröße):
+                    await plätze.acquire()
+                    await warteschlange.put(loop.run_in_executor(self.executor, portfolio.berechne, block))
+            except Exception as fehler:
+                fehlgeschlagen = loop.create_future()
+                fehlgeschlagen.set_exception(fehler)
+                await warteschlange.put(fehlgeschlagen)
+            await warteschlange.put(_ENDE)
+
+        erzeuger = asyncio.ensure_future(erzeuge())
+        try:
+            while True:
+                future = await warteschlange.get()
+                if future is _ENDE:
+                    break
+                try:
+                    ergebnisse = await future
+                finally:
+                    plätze.release()
+                for kennung, ergebnis in ergebnisse.items():
+                    # innerhalb eines Blocks prüft das PortfolioSummierer.berechne, über Blöcke hinweg erst hier
+                    assert kennung not in gesehen, "Kennung {} ist nicht eindeutig".format(kennung)
+                    gesehen.add(kennung)
+                    yield kennung, ergebnis
+        finally:
+            erzeuger.cancel()
+            while not warteschlange.empty():
+                future = warteschlange.get_nowait()
+                if future is not _ENDE:
+                    future.cancel()
+
+
+if __name__ == '__main__':
+    pass
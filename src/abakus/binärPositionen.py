@@ -0,0 +1,192 @@
+import mmap
+import os
+import struct
+from datetime import date
+from decimal import Decimal
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from abakus.laufend import Anstellung
+from abakus.model import Stelle, gusAusCodes
+from abakus.portfolio import Position
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Ein kompaktes Binärformat für sehr große Positionslisten.
+
+Nach einem Kopf folgen Sätze fester Länge mit Gruppe und Stufe als ihre
+Enum-Werte, Seit, Von und Bis als Tagesnummern (date.toordinal), dem Umfang
+in Hundertstel Prozent und der Kennung als UTF-8, mit Nullen aufgefüllt.
+Merkmale werden nicht abgelegt.
+
+Die Datei wird über mmap gelesen: das Öffnen kostet nichts, und Ausschnitte
+für einzelne Worker teilen sich die Seiten, statt sie zu kopieren. Für
+spaltenweise Auswertungen liegen die Sätze als strukturiertes NumPy-Array
+direkt über der Abbildung, ohne jeden Satz einzeln zu lesen.
+"""
+
+MAGIC = b"ABKP"
+VERSION = 1
+KENNUNG_BYTES = 32
+
+KOPF = struct.Struct("<4sHHQ")
+SATZ = struct.Struct("<BBHIII{}s".format(KENNUNG_BYTES))
+# dieselben Sätze als NumPy-Typ, ohne Ausrichtung wie SATZ
+SATZ_TYP = np.dtype([("gruppe", "u1"), ("stufe", "u1"), ("umfang", "<u2"),
+                     ("seit", "<u4"), ("von", "<u4"), ("bis", "<u4"), ("kennung", "S{}".format(KENNUNG_BYTES))])
+assert SATZ_TYP.itemsize == SATZ.size
+
+RohSatz = Tuple[int, int, int, int, int, int, bytes]
+
+
+def _satz(position: Position) -> bytes:
+    anst = position.anstellung
+    assert len(anst.abschnitte) == 1, "Position '{}' hat Änderungen, die das Format nicht abbildet".format(
+        position.kennung)
+    kennung = position.kennung.encode("utf-8")
+    if len(kennung) > KENNUNG_BYTES:
+        raise ValueError("Kennung '{}' ist länger als {} Bytes".format(position.kennung, KENNUNG_BYTES))
+    umfang = anst.stelle.umfangProzent * 100
+    if umfang != umfang.to_integral_value():
+        raise ValueError("Umfang {} von '{}' hat mehr als zwei Nachkommastellen".format(
+            anst.stelle.umfangProzent, position.kennung))
+    gus = anst.stelle.gus
+    return SATZ.pack(gus.gruppenCode, gus.stufenCode, int(umfang),
+                     anst.stelle.beginn.toordinal(), anst.von.toordinal(), anst.bis.toordinal(), kennung)
+
+
+def schreibe(datei: BinaryIO, positionen: Iterable[Position]) -> int:
+    """
+        Schreibt die Positionen im Durchlauf; die Anzahl im Kopf wird am Ende nachgetragen
+        :param datei: eine zum Schreiben geöffnete, positionierbare Binärdatei
+        :return: die Zahl der geschriebenen Positionen
+    """
+    start = datei.tell()
+    datei.write(KOPF.pack(MAGIC, VERSION, SATZ.size, 0))
+    anzahl = 0
+    for position in positionen:
+        datei.write(_satz(position))
+        anzahl += 1
+    ende = datei.tell()
+    datei.seek(start)
+    datei.write(KOPF.pack(MAGIC, VERSION, SATZ.size, anzahl))
+    datei.seek(ende)
+    return anzahl
+
+
+def konvertiere(csvPfad, zielPfad) -> int:
+    """
+        Wandelt eine Positionsliste im CSV-Format von abakus.csvPositionen Zeile für Zeile um;
+        bei Fehlern in der Liste wird die halb geschriebene Zieldatei wieder entfernt
+        :return: die Zahl der Positionen
+        :raise PositionenFormatException: mit allen Fehlern der Liste
+    """
+    from abakus.csvPositionen import PositionenCsvParser
+
+    with open(str(csvPfad), "r", newline="", encoding="utf-8") as csvFile:
+        try:
+            with open(str(zielPfad), "wb") as ziel:
+                return schreibe(ziel, PositionenCsvParser().iterParse(csvFile))
+        except BaseException:
+            os.unlink(str(zielPfad))
+            raise
+
+
+def _position(roh: RohSatz) -> Position:
+    gruppe, stufe, umfang, seit, von, bis, kennung = roh
+    stelle = Stelle(gusAusCodes(gruppe, stufe), date.fromordinal(seit), Decimal(umfang).scaleb(-2))
+    return Position(kennung.rstrip(b"\0").decode("utf-8"),
+                    Anstellung(stelle, date.fromordinal(von), date.fromordinal(bis)))
+
+
+class PositionsDatei:
+    """
+        Die Positionen einer Binärdatei oder eines Ausschnitts daraus; verhält sich
+        wie eine Sequenz von Positionen, die erst beim Zugriff erzeugt werden
+    """
+
+    def __init__(self, pfad, start: int = 0, ende: int = None, _puffer=None):
+        """
+            :param start, ende: der Ausschnitt der Sätze, standardmäßig alle
+            :raise ValueError: falls die Datei nicht im erwarteten Format ist
+        """
+        self.pfad = str(pfad)
+        if _puffer is None:
+            with open(self.pfad, "rb") as datei:
+                _puffer = memoryview(mmap.mmap(datei.fileno(), 0, access=mmap.ACCESS_READ))
+            if len(_puffer) < KOPF.size:
+                raise ValueError("'{}' ist keine Positionsdatei".format(self.pfad))
+            magic, version, satzGröße, anzahl = KOPF.unpack_from(_puffer)
+            if (magic, version, satzGröße) != (MAGIC, VERSION, SATZ.size) \
+                    or len(_puffer) < KOPF.size + anzahl * SATZ.size:
+                raise ValueError("'{}' ist keine Positionsdatei der Version {}".format(self.pfad, VERSION))
+            _puffer = _puffer[KOPF.size:KOPF.size + anzahl * SATZ.size]
+
+        self._alle = _puffer
+        anzahl = len(_puffer) // SATZ.size
+        self.start = start
+        self.ende = anzahl if ende is None else min(ende, anzahl)
+        self._sätze = _puffer[self.start * SATZ.size:self.ende * SATZ.size]
+
+    def __reduce__(self):
+        # für andere Prozesse wird die Datei dort erneut abgebildet, nicht kopiert
+        return PositionsDatei, (self.pfad, self.start, self.ende)
+
+    def __len__(self):
+        return self.ende - self.start
+
+    def __getitem__(self, idx: int) -> Position:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return _position(SATZ.unpack_from(self._sätze, idx * SATZ.size))
+
+    def __iter__(self) -> Iterator[Position]:
+        return map(_position, self.roh())
+
+    def roh(self) -> Iterator[RohSatz]:
+        """
+            :return: die Sätze als Tupel von Codes, Tagesnummern und Bytes, ohne Positionen zu erzeugen
+        """
+        return SATZ.iter_unpack(self._sätze)
+
+    def tabelle(self) -> np.ndarray:
+        """
+            :return: die Sätze als schreibgeschütztes strukturiertes Array vom Typ SATZ_TYP
+                über der Abbildung der Datei, ohne Kopie und ohne die Sätze einzeln zu lesen
+        """
+        return np.frombuffer(self._sätze, dtype=SATZ_TYP)
+
+    def ausschnitt(self, start: int, ende: int) -> "PositionsDatei":
+        """
+            :return: die Sätze von start bis ausschließlich ende dieses Ausschnitts, ohne Kopie
+        """
+        start = self.start + max(0, start)
+        return PositionsDatei(self.pfad, start, min(self.start + ende, self.ende), self._alle)
+
+    def teile(self, anzahl: int) -> List["PositionsDatei"]:
+        """
+            :return: höchstens anzahl möglichst gleich große, zusammenhängende Ausschnitte
+        """
+        assert anzahl > 0, "Ungültige Anzahl {}".format(anzahl)
+        größe, rest = divmod(len(self), anzahl)
+        teile, start = [], 0
+        for i in range(anzahl):
+            ende = start + größe + (1 if i < rest else 0)
+            if ende > start:
+                teile.append(self.ausschnitt(start, ende))
+            start = ende
+        return teile
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Aufruf: binärPositionen.py POSITIONEN.csv ZIEL.abkp
+    print("{} Positionen geschrieben".format(konvertiere(sys.argv[1], sys.argv[2])))
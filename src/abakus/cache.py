@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from abakus.laufend import Anstellung, Summierer
+from abakus.model import ÖtvKosten
+from abakus.spalten import KostenSpalten
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Ein persistenter Cache für Berechnungsergebnisse in einer SQLite-Datei.
+
+Der Schlüssel eines Ergebnisses setzt sich aus der Kennung der Anstellung
+und der Prüfsumme der ÖTV-Daten zusammen. Sobald Ergebnisse für eine neue
+Prüfsumme abgelegt werden (etwa weil sich die ötv.csv geändert hat), werden
+alle Ergebnisse zu anderen Prüfsummen verworfen.
+"""
+
+_SPALTEN = "monate, gruppen, stufen, umfaenge, vollkosten, sonderzahlungen"
+
+
+def standardVerzeichnis() -> pathlib.Path:
+    return pathlib.Path.home() / ".cache" / "abakus"
+
+
+class ErgebnisCache:
+
+    def __init__(self, verzeichnis=None, maxBytes: int = 64 * 1024 * 1024):
+        """
+            :param verzeichnis: das Verzeichnis für die Cache-Datei; wird bei Bedarf angelegt
+            :param maxBytes: die maximale Größe der abgelegten Ergebnisdaten; bei Überschreitung
+                    werden die am längsten nicht benutzten Ergebnisse entfernt
+        """
+        verzeichnis = pathlib.Path(verzeichnis) if verzeichnis else standardVerzeichnis()
+        verzeichnis.mkdir(parents=True, exist_ok=True)
+
+        self.maxBytes = maxBytes
+        # die Verbindung wird von mehreren Threads benutzt, aber immer nur von einem zugleich
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(verzeichnis / "ergebnisse.sqlite"), check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS ergebnisse (
+                                schluessel TEXT PRIMARY KEY,
+                                tarif TEXT NOT NULL,
+                                total TEXT NOT NULL,
+                                groesse INTEGER NOT NULL,
+                                zugriff REAL NOT NULL,
+                                {})""".format(", ".join("{} BLOB NOT NULL".format(s) for s in _SPALTEN.split(", "))))
+        self._db.commit()
+        self._tarif = None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def schlüssel(tarif: str, anstellung: Anstellung) -> str:
+        return hashlib.sha256("{}|{}".format(tarif, anstellung.kennung()).encode()).hexdigest()
+
+    def hole(self, ötv: ÖtvKosten, anstellung: Anstellung) -> Optional[Tuple[Decimal, KostenSpalten]]:
+        """
+            :return: das abgelegte Ergebnis oder None, falls keines vorliegt
+        """
+        with self._lock:
+            tarif = self._prüfeTarif(ötv)
+            schlüssel = ErgebnisCache.schlüssel(tarif, anstellung)
+            zeile = self._db.execute("SELECT total, {} FROM ergebnisse WHERE schluessel = ?".format(_SPALTEN),
+                                     (schlüssel,)).fetchone()
+            if zeile is None:
+                return None
+
+            self._db.execute("UPDATE ergebnisse SET zugriff = ? WHERE schluessel = ?", (time.time(), schlüssel))
+            self._db.commit()
+        return Decimal(zeile[0]), KostenSpalten.ausBytes(*zeile[1:])
+
+    def lege(self, ötv: ÖtvKosten, anstellung: Anstellung, total: Decimal, spalten: KostenSpalten):
+        daten = spalten.alsBytes()
+        with self._lock:
+            tarif = self._prüfeTarif(ötv)
+            self._db.execute("INSERT OR REPLACE INTO ergebnisse (schluessel, tarif, total, groesse, zugriff, {}) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)".format(_SPALTEN),
+                             (ErgebnisCache.schlüssel(tarif, anstellung), tarif, str(total),
+                              sum(len(d) for d in daten), time.time()) + daten)
+            self._räumeAuf()
+            self._db.commit()
+
+    def größe(self) -> int:
+        """
+            :return: die Größe der abgelegten Ergebnisdaten in Bytes
+        """
+        with self._lock:
+            return self._größe()
+
+    def _größe(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(groesse), 0) FROM ergebnisse").fetchone()[0]
+
+    def _prüfeTarif(self, ötv: ÖtvKosten) -> str:
+        """
+            Verwirft alle Ergebnisse, die mit anderen ÖTV-Daten berechnet wurden; nur unter dem Lock
+        """
+        tarif = ötv.prüfsumme()
+        if tarif != self._tarif:
+            anzahl = self._db.execute("DELETE FROM ergebnisse WHERE tarif != ?", (tarif,)).rowcount
+            if anzahl:
+                logging.info("{} Ergebnisse zu veralteten ÖTV-Daten aus dem Cache entfernt".format(anzahl))
+            self._db.commit()
+            self._tarif = tarif
+        return tarif
+
+    def _räumeAuf(self):
+        überschuss = self._größe() - self.maxBytes
+        if überschuss <= 0:
+            return
+        zuLöschen = []
+        for schlüssel, größe in self._db.execute("SELECT schluessel, groesse FROM ergebnisse ORDER BY zugriff"):
+            zuLöschen.append((schlüssel,))
+            überschuss -= größe
+            if überschuss <= 0:
+                break
+        self._db.executemany("DELETE FROM ergebnisse WHERE schluessel = ?", zuLöschen)
+
+
+class GecachterSummierer(Summierer):
+    """
+        Ein Summierer, der die spaltenweisen Ergebnisse in einem ErgebnisCache ablegt
+    """
+
+    def __init__(self, ötv: ÖtvKosten, cache: ErgebnisCache):
+        super().__init__(ötv)
+        self.cache = cache
+
+    def calcSpalten(self, anstellung: Anstellung) -> Tuple[Decimal, KostenSpalten]:
+        ötv = self.ötv
+        ergebnis = self.cache.hole(ötv, anstellung)
+        if ergebnis is None:
+            ergebnis = self._calcSpalten(ötv, anstellung)
+            self.cache.lege(ötv, anstellung, *ergebnis)
+        return ergebnis
+
+
+if __name__ == '__main__':
+    pass
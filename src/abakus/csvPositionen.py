@@ -0,0 +1,142 @@
+import csv
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List
+
+from abakus.csvÖtv import asEntgeltgruppe, asPerc
+from abakus.laufend import Anstellung
+from abakus.model import GuS, Stelle, Stufe, Entgeltgruppe
+from abakus.portfolio import Position
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Positionslisten als CSV mit Semikolon als Trenner und einer Kopfzeile, etwa:
+
+    Position;Gruppe;Stufe;Seit;Umfang;Von;Bis;Projekt
+    P-1;E13;2;01.09.2017;50;01.02.2019;31.12.2020;Abakus
+
+Die ersten sieben Spalten sind fest; ein leeres "Seit" bedeutet eine
+Neueinstellung (die Stufe beginnt mit "Von"). Weitere Spalten werden
+als Merkmale der Positionen unter ihrem Kopf übernommen.
+"""
+
+POSITIONEN_SPALTEN = ("Position", "Gruppe", "Stufe", "Seit", "Umfang", "Von", "Bis")
+
+
+def asDate(vStr) -> date:
+    return datetime.strptime(vStr, "%d.%m.%Y").date()
+
+
+def asStufe(vStr) -> Stufe:
+    return Stufe(int(vStr))
+
+
+def asUmfang(vStr) -> Decimal:
+    """
+        Ein Umfang in Prozent mit höchstens zwei Nachkommastellen, wie ihn KostenSpalten speichern
+    """
+    v = asPerc(vStr)
+    if v != v.quantize(Decimal(".01")): raise ValueError
+    return v
+
+
+class PositionenFormatException(Exception):
+
+    def __init__(self, errors):
+        super().__init__("Fehler im Positionen-Format")
+        self.errors = errors
+
+
+class PositionenCsvParser:
+
+    def __init__(self):
+        self._lNo = None
+        self.errors = []
+
+    def parse(self, csvLines: Iterable[str]) -> List[Position]:
+        """
+            :raise PositionenFormatException: mit allen gefundenen Fehlern, falls es welche gibt
+        """
+        return list(self.iterParse(csvLines))
+
+    def iterParse(self, csvLines: Iterable[str]) -> Iterator[Position]:
+        """
+            Wie parse, aber liefert die fehlerfreien Positionen schon beim Lesen, etwa um
+            sehr große Listen ohne Zwischenliste weiterzuverarbeiten
+            :raise PositionenFormatException: nach der letzten Position mit allen gefundenen Fehlern,
+                    falls es welche gibt
+        """
+        kennungen = set()
+        reader = csv.reader(csvLines, delimiter=";")
+
+        kopf = next(reader, None)
+        if kopf is None or tuple(k.strip() for k in kopf[:len(POSITIONEN_SPALTEN)]) != POSITIONEN_SPALTEN:
+            raise PositionenFormatException(["Zeile 1: Kopf muss mit {} beginnen".format(";".join(POSITIONEN_SPALTEN))])
+        merkmalNamen = [k.strip() for k in kopf[len(POSITIONEN_SPALTEN):]]
+
+        for lNo, parts in enumerate(reader, start=2):
+            self._lNo = lNo
+            parts = [p.strip() for p in parts]
+            if not any(parts) or parts[0].startswith('#'):
+                continue
+
+            if len(parts) != len(kopf):
+                self._newErr(" hat {} Felder ({} erwartet)".format(len(parts), len(kopf)))
+                continue
+
+            try:
+                position = self._parseParts(parts, merkmalNamen)
+            except ValueError:
+                continue
+            except AssertionError as asErr:
+                self._newErr(": {}".format(asErr))
+                continue
+
+            if position.kennung in kennungen:
+                self._newErr(": Position '{}' ist doppelt".format(position.kennung))
+                continue
+            kennungen.add(position.kennung)
+            yield position
+
+        if len(self.errors):
+            raise PositionenFormatException(self.errors)
+
+    def _parseParts(self, parts, merkmalNamen) -> Position:
+
+        def part2Val(idx, valFunc, errMsg):
+            try:
+                return valFunc(parts[idx])
+            except (ValueError, KeyError):
+                self._newErr(", Feld {}: {} '{}'".format(idx + 1, errMsg, parts[idx]))
+                return None
+
+        kennung = parts[0]
+        if not kennung:
+            self._newErr(", Feld 1: Position ohne Kennung")
+        gruppe = part2Val(1, asEntgeltgruppe,
+                          "Unbekannte Gruppe (bekannt sind: {})".format([e.name for e in Entgeltgruppe]))
+        stufe = part2Val(2, asStufe, "Unbekannte Stufe")
+        seit = part2Val(3, asDate, "Ungültiges Datum") if parts[3] else None
+        umfang = part2Val(4, asUmfang, "Ungültige Prozentangabe für den Umfang")
+        von = part2Val(5, asDate, "Ungültiges Datum")
+        bis = part2Val(6, asDate, "Ungültiges Datum")
+
+        # einzeln auf None prüfen: ein Umfang von 0 ist gültig
+        if not kennung or any(v is None for v in (gruppe, stufe, umfang, von, bis)) or (parts[3] and seit is None):
+            raise ValueError
+        if bis < von:
+            raise AssertionError("Ende {:%d.%m.%Y} liegt vor dem Beginn {:%d.%m.%Y}".format(bis, von))
+
+        stelle = Stelle(GuS(gruppe, stufe), seit or von, umfang)
+        return Position(kennung, Anstellung(stelle, von, bis), dict(zip(merkmalNamen, parts[len(POSITIONEN_SPALTEN):])))
+
+    def _newErr(self, msg):
+        self.errors.append("Zeile {}{}".format(self._lNo, msg))
+
+
+if __name__ == '__main__':
+    pass
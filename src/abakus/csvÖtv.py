@@ -1,6 +1,8 @@
-from typing import Sequence
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, MutableMapping, NamedTuple, Optional, Sequence, Set, Tuple
 from babel.numbers import parse_decimal
-from abakus.model import ÖtvKosten, Entgeltgruppe, dec, Stufe, Gehälter
+from abakus.model import ÖtvKosten, ÖtvStand, Entgeltgruppe, dec, Stufe, Gehälter
 
 __author__ = "Hans Bering"
 __copyright__ = "Copyright 2019, Hans Bering"
@@ -49,18 +51,11 @@ class ÖtvCsvParser:
 
         for lNo, rawLine in enumerate(csvLines, start=1):
             self._lNo = lNo
-            
-            parts = rawLine.strip().split()
-            if not len(parts) or parts[0].startswith('#'):
-                continue
-    
-            if len(parts) != ÖtvCsvParser.expectedPartCount:
-                self._newErr(" hat {} Felder ({} erwartet): {}".format(len(parts), ÖtvCsvParser.expectedPartCount, parts))
-                continue
-            
+
             try :
-                year, gruppe, sonderProzent, gehälter = self._parseParts(parts)
-                self.ötv.mitGehalt(year, gruppe, Gehälter(sonderProzent, gehälter))
+                satz = self._parseLine(rawLine)
+                if satz is not None:
+                    self.ötv.mitGehalt(*satz)
             except ValueError:
                 continue
             except AssertionError as asErr:
@@ -71,6 +66,29 @@ class ÖtvCsvParser:
     
         return self.ötv
 
+    def parseStand(self, csvLines : Sequence[str]) -> ÖtvStand:
+        """
+            Wie parse, liefert aber einen unveränderlichen Stand der Daten,
+            der gefahrlos zwischen Threads und Prozessen geteilt werden kann
+        """
+        return self.parse(csvLines).einfrieren()
+
+    def _parseLine(self, rawLine: str) -> Optional[Tuple[int, Entgeltgruppe, Gehälter]]:
+        """
+            :return: Jahr, Gruppe und Gehälter der Zeile oder None für Leer- und Kommentarzeilen
+            :raise ValueError: falls die Zeile fehlerhaft ist; die Fehler sind dann gemeldet
+        """
+        parts = rawLine.strip().split()
+        if not len(parts) or parts[0].startswith('#'):
+            return None
+
+        if len(parts) != ÖtvCsvParser.expectedPartCount:
+            self._newErr(" hat {} Felder ({} erwartet): {}".format(len(parts), ÖtvCsvParser.expectedPartCount, parts))
+            raise ValueError
+
+        year, gruppe, sonderProzent, gehälter = self._parseParts(parts)
+        return year, gruppe, Gehälter(sonderProzent, gehälter)
+
     def _parseParts(self, parts):
         
         def part2Val(idx, valFunc, errMsg):
@@ -97,11 +115,175 @@ class ÖtvCsvParser:
         self.errors.append("Zeile {}{}".format(self._lNo, msg))
 
 
+Schlüssel = Tuple[int, Entgeltgruppe]
+
+
+@dataclass
+class ÖtvÄnderungen:
+    """
+        Die Änderungen der Gehaltsdaten zwischen zwei fehlerfreien Ständen einer Datei
+    """
+    gesetzt: Dict[Schlüssel, Gehälter] = field(default_factory=dict)
+    entfernt: Set[Schlüssel] = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.gesetzt or self.entfernt)
+
+    def schlüssel(self) -> Set[Schlüssel]:
+        """
+            :return: alle hinzugekommenen, geänderten und entfernten (Jahr, Gruppe)
+        """
+        return set(self.gesetzt) | self.entfernt
+
+    def anwenden(self, gehälter: MutableMapping[Schlüssel, Gehälter]):
+        """
+            Überträgt die Änderungen auf eine Tabelle, die dem vorigen Stand entspricht
+        """
+        for key in self.entfernt:
+            del gehälter[key]
+        gehälter.update(self.gesetzt)
+
+
+class _Satz(NamedTuple):
+    schlüssel: Optional[Schlüssel] = None
+    gehälter: Optional[Gehälter] = None
+    # die Fehlermeldungen zur Zeile, ohne Zeilennummer
+    fehler: Tuple[str, ...] = ()
+
+
+_LEER = _Satz()
+
+
+class InkrementellerÖtvParser(ÖtvCsvParser):
+    """
+        Liest dieselbe Datei wiederholt und merkt sich dazu die Zeilen und ihre
+        Sätze aus dem vorigen Lauf. Neu gelesen werden nur geänderte, eingefügte
+        und entfernte Zeilen; die Prüfung auf doppelte (Jahr, Gruppe) wird dabei
+        mitgeführt. Jeder fehlerfreie Lauf liefert die Änderungen gegenüber dem
+        vorigen fehlerfreien Lauf.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._zeilen: List[str] = []
+        self._sätze: List[_Satz] = []
+        # pro (Jahr, Gruppe) die Gehälter aller Zeilen dazu; mehr als eine ist ein Fehler
+        self._vorkommen: Dict[Schlüssel, List[Gehälter]] = {}
+        self._doppelt: Set[Schlüssel] = set()
+        self._fehlerhaft = 0
+        self._berührt: Set[Schlüssel] = set()
+        self._zeilenFehler: List[str] = []
+
+        self.gehälter: Dict[Schlüssel, Gehälter] = {}
+        self.neuGelesen = 0
+
+    def parse(self, csvLines : Sequence[str]) -> ÖtvÄnderungen:
+        """
+            :return: die Änderungen seit dem letzten fehlerfreien Lauf
+            :raise ÖtvFormatException: falls die Datei Fehler enthält; die Zeilen werden trotzdem
+                    übernommen, sodass der nächste Lauf nur noch die Korrekturen liest
+        """
+        alt, neu = self._zeilen, [rawLine.strip() for rawLine in csvLines]
+        anfang, ende = 0, 0
+        kürzer = min(len(alt), len(neu))
+        while anfang < kürzer and alt[anfang] == neu[anfang]:
+            anfang += 1
+        while ende < kürzer - anfang and alt[-1 - ende] == neu[-1 - ende]:
+            ende += 1
+
+        self.neuGelesen = 0
+        sätze = self._sätze[:anfang]
+        altMitte, neuMitte = alt[anfang:len(alt) - ende], neu[anfang:len(neu) - ende]
+        for op, a1, a2, n1, n2 in difflib.SequenceMatcher(None, altMitte, neuMitte).get_opcodes():
+            if op == "equal":
+                sätze.extend(self._sätze[anfang + a1:anfang + a2])
+                continue
+            for satz in self._sätze[anfang + a1:anfang + a2]:
+                self._vergiss(satz)
+            for zeile in neuMitte[n1:n2]:
+                satz = self._satz(zeile)
+                self._merke(satz)
+                sätze.append(satz)
+        sätze.extend(self._sätze[len(alt) - ende:])
+        self._zeilen, self._sätze = neu, sätze
+
+        if self._fehlerhaft or self._doppelt:
+            raise ÖtvFormatException(self._fehlermeldungen())
+        return self._änderungen()
+
+    def stand(self) -> ÖtvStand:
+        """
+            :return: die Gehaltsdaten des letzten fehlerfreien Laufs
+        """
+        return ÖtvStand(self.gehälter, self.ötv.zuschlag)
+
+    def _satz(self, zeile: str) -> _Satz:
+        self.neuGelesen += 1
+        self._zeilenFehler = []
+        try:
+            satz = self._parseLine(zeile)
+        except ValueError:
+            return _Satz(fehler=tuple(self._zeilenFehler))
+        if satz is None:
+            return _LEER
+        year, gruppe, gehälter = satz
+        return _Satz((year, gruppe), gehälter)
+
+    def _newErr(self, msg):
+        self._zeilenFehler.append(msg)
+
+    def _merke(self, satz: _Satz):
+        if satz.fehler:
+            self._fehlerhaft += 1
+        elif satz.schlüssel is not None:
+            vorkommen = self._vorkommen.setdefault(satz.schlüssel, [])
+            vorkommen.append(satz.gehälter)
+            if len(vorkommen) > 1:
+                self._doppelt.add(satz.schlüssel)
+            self._berührt.add(satz.schlüssel)
+
+    def _vergiss(self, satz: _Satz):
+        if satz.fehler:
+            self._fehlerhaft -= 1
+        elif satz.schlüssel is not None:
+            vorkommen = self._vorkommen[satz.schlüssel]
+            vorkommen.remove(satz.gehälter)
+            if len(vorkommen) < 2:
+                self._doppelt.discard(satz.schlüssel)
+            if not vorkommen:
+                del self._vorkommen[satz.schlüssel]
+            self._berührt.add(satz.schlüssel)
+
+    def _änderungen(self) -> ÖtvÄnderungen:
+        änderungen = ÖtvÄnderungen()
+        for key in self._berührt:
+            vorkommen = self._vorkommen.get(key)
+            if vorkommen is None:
+                if self.gehälter.pop(key, None) is not None:
+                    änderungen.entfernt.add(key)
+            elif self.gehälter.get(key) != vorkommen[0]:
+                self.gehälter[key] = änderungen.gesetzt[key] = vorkommen[0]
+        self._berührt = set()
+        return änderungen
+
+    def _fehlermeldungen(self) -> List[str]:
+        # nur im Fehlerfall, daher über alle Zeilen und mit denselben Meldungen wie ÖtvCsvParser
+        fehler, gesehen = [], {}
+        for lNo, satz in enumerate(self._sätze, start=1):
+            fehler.extend("Zeile {}{}".format(lNo, f) for f in satz.fehler)
+            if satz.schlüssel in self._doppelt:
+                if satz.schlüssel in gesehen:
+                    fehler.append("Zeile {}Gehalt für {} in {} schon gesetzt (ist {})".format(
+                        lNo, *satz.schlüssel, gesehen[satz.schlüssel]))
+                else:
+                    gesehen[satz.schlüssel] = satz.gehälter
+        return fehler
+
+
 if __name__ == '__main__':
     from abakus import resources
     try:
-        with open(resources.path("ötv.csv")) as csvFile:
-            ÖtvCsvParser().parse(csvFile)
+        resources.load("ötv.csv", ÖtvCsvParser().parse)
     except ÖtvFormatException as ö:
         for e in ö.errors:
             print(e)
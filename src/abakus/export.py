@@ -0,0 +1,220 @@
+import csv
+import json
+import zipfile
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Export von Ergebnissen als CSV, JSON Lines und Excel-Tabelle.
+
+Die Ergebnisse kommen als Iterable von Paaren (Kennung, Zeilen), wobei die
+Zeilen MonatsKosten oder KostenZeilen sind - etwa aus Summierer.iterCalc.
+Alles wird im Durchlauf geschrieben, gepuffert in Blöcken von Zeilen;
+der Speicherbedarf hängt nicht von der Zahl der Zeilen ab.
+"""
+
+Ergebnisse = Iterable[Tuple[str, Iterable]]
+
+MONATE_KOPF = ("Position", "Monat", "Gruppe", "Stufe", "Umfang", "Kosten", "Sonderzahlung")
+POSITIONEN_KOPF = ("Position", "Von", "Bis", "Monate", "Kosten", "Sonderzahlungen", "Gesamt")
+
+_DEUTSCH = str.maketrans(",.", ".,")
+
+
+def gruppenName(gruppe) -> str:
+    return gruppe.name.replace("_", "")
+
+
+def monatsZeilen(ergebnisse: Ergebnisse) -> Iterator[tuple]:
+    """
+        :return: pro Monat eine Zeile mit den Werten zu MONATE_KOPF
+    """
+    for kennung, zeilen in ergebnisse:
+        for z in zeilen:
+            yield (kennung, z.stichtag, gruppenName(z.gus.gruppe), z.gus.stufe.value,
+                   z.umfangProzent, z.kosten, z.sonderzahlung)
+
+
+def positionsZeilen(ergebnisse: Ergebnisse) -> Iterator[tuple]:
+    """
+        :return: pro Position eine Zeile mit den Summen zu POSITIONEN_KOPF
+    """
+    for kennung, zeilen in ergebnisse:
+        von = bis = None
+        monate, kosten, sonderzahlungen = 0, Decimal(0), Decimal(0)
+        for z in zeilen:
+            von = von or z.stichtag
+            bis = z.stichtag
+            monate += 1
+            kosten += z.kosten
+            sonderzahlungen += z.sonderzahlung
+        yield kennung, von, bis, monate, kosten, sonderzahlungen, kosten + sonderzahlungen
+
+
+def deutscheZahl(d: Decimal) -> str:
+    """
+        :return: die Zahl mit Tausenderpunkten und Dezimalkomma, mindestens zwei Nachkommastellen
+    """
+    if d.as_tuple().exponent > -2:
+        d = d.quantize(Decimal(".01"))
+    return "{:,f}".format(d).translate(_DEUTSCH)
+
+
+def _blöcke(zeilen: Iterable, puffer: int) -> Iterator[list]:
+    block = []
+    for z in zeilen:
+        block.append(z)
+        if len(block) >= puffer:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _csvWert(wert) -> str:
+    if isinstance(wert, Decimal):
+        return deutscheZahl(wert)
+    if isinstance(wert, date):
+        return wert.strftime("%m.%Y")
+    return "" if wert is None else str(wert)
+
+
+def schreibeCsv(datei, kopf: Sequence[str], zeilen: Iterable[tuple], puffer: int = 1000) -> int:
+    """
+        Schreibt die Zeilen als CSV mit Semikolon als Trenner und deutschen Zahlen.
+        :param datei: eine zum Schreiben geöffnete Textdatei (mit newline="")
+        :return: die Zahl der geschriebenen Zeilen ohne Kopf
+    """
+    writer = csv.writer(datei, delimiter=";")
+    writer.writerow(kopf)
+    anzahl = 0
+    for block in _blöcke(zeilen, puffer):
+        writer.writerows([[_csvWert(w) for w in z] for z in block])
+        anzahl += len(block)
+    return anzahl
+
+
+def _jsonWert(wert):
+    if isinstance(wert, Decimal):
+        return str(wert)
+    if isinstance(wert, date):
+        return wert.strftime("%Y-%m")
+    return wert
+
+
+def schreibeJsonLines(datei, kopf: Sequence[str], zeilen: Iterable[tuple], puffer: int = 1000) -> int:
+    """
+        Schreibt pro Zeile ein JSON-Objekt mit den Kopf-Einträgen als Namen;
+        Beträge werden als Zeichenketten geschrieben, um keine Genauigkeit zu verlieren.
+        :return: die Zahl der geschriebenen Zeilen
+    """
+    anzahl = 0
+    for block in _blöcke(zeilen, puffer):
+        datei.write("".join(json.dumps(dict(zip(kopf, map(_jsonWert, z))), ensure_ascii=False) + "\n"
+                            for z in block))
+        anzahl += len(block)
+    return anzahl
+
+
+def _spaltenName(idx: int) -> str:
+    name = ""
+    idx += 1
+    while idx:
+        idx, rest = divmod(idx - 1, 26)
+        name = chr(ord("A") + rest) + name
+    return name
+
+
+def _xlsxZelle(zeile: int, spalte: int, wert) -> str:
+    ref = "{}{}".format(_spaltenName(spalte), zeile)
+    if isinstance(wert, (int, Decimal)) and not isinstance(wert, bool):
+        return '<c r="{}"><v>{}</v></c>'.format(ref, wert)
+    if isinstance(wert, date):
+        wert = wert.strftime("%m.%Y")
+    return '<c r="{}" t="inlineStr"><is><t>{}</t></is></c>'.format(ref, escape("" if wert is None else str(wert)))
+
+
+def _xlsxZeile(nr: int, werte) -> str:
+    return '<row r="{}">{}</row>'.format(nr, "".join(_xlsxZelle(nr, s, w) for s, w in enumerate(werte)))
+
+
+_XLSX_RAHMEN = {
+    "[Content_Types].xml":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>',
+    "_rels/.rels":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>',
+    "xl/_rels/workbook.xml.rels":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>',
+}
+
+
+def schreibeXlsx(pfad, kopf: Sequence[str], zeilen: Iterable[tuple], blatt: str = "Abakus", puffer: int = 1000) -> int:
+    """
+        Schreibt die Zeilen als Excel-Tabelle mit einem Blatt; Beträge als Zahlen.
+        :return: die Zahl der geschriebenen Zeilen ohne Kopf
+    """
+    with zipfile.ZipFile(pfad, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, inhalt in _XLSX_RAHMEN.items():
+            zf.writestr(name, inhalt)
+        zf.writestr("xl/workbook.xml",
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                    '<sheets><sheet name="{}" sheetId="1" r:id="rId1"/></sheets></workbook>'.format(escape(blatt)))
+
+        anzahl = 0
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                         '<sheetData>' + _xlsxZeile(1, kopf)).encode())
+            for block in _blöcke(zeilen, puffer):
+                sheet.write("".join(_xlsxZeile(anzahl + i + 2, z) for i, z in enumerate(block)).encode())
+                anzahl += len(block)
+            sheet.write(b"</sheetData></worksheet>")
+        return anzahl
+
+
+def exportiere(pfad, kopf: Sequence[str], zeilen: Iterable[tuple]) -> int:
+    """
+        Wählt das Format nach der Dateiendung: .csv, .jsonl oder .xlsx
+    """
+    pfad = str(pfad)
+    endung = pfad.rsplit(".", 1)[-1].lower()
+    if endung == "xlsx":
+        return schreibeXlsx(pfad, kopf, zeilen)
+    if endung == "csv":
+        with open(pfad, "w", newline="", encoding="utf-8") as datei:
+            return schreibeCsv(datei, kopf, zeilen)
+    if endung == "jsonl":
+        with open(pfad, "w", encoding="utf-8") as datei:
+            return schreibeJsonLines(datei, kopf, zeilen)
+    raise ValueError("Unbekanntes Exportformat '{}'".format(endung))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,146 @@
+from bisect import bisect_left, insort
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from abakus.aggregation import aggregiere, nachJahr, nachGruppe
+from abakus.model import Entgeltgruppe
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Ranglisten der Jahreskosten von Positionen.
+
+Pro Jahr und Gruppe liegen die Jahreskosten (mit Sonderzahlung) aller
+Positionen als sortierte Liste von (Kosten, Kennung) vor, dazu pro Jahr
+die Kosten über alle Gruppen. Die größten Kosten, Schwellen und Bereiche
+sind damit per Bisektion zu finden, ohne Monatsdaten erneut zu lesen.
+Eine geänderte Position wird entfernt und neu eingefügt.
+
+Einzelne Positionen werden per insort eingefügt, das kostet pro Position
+linear in der Größe der Liste. Viele Positionen auf einmal nimmt daher
+hinzufügenAlle auf, das jede Liste nur einmal sortiert.
+"""
+
+# Gruppe None steht für die Kosten über alle Gruppen
+IndexSchlüssel = Tuple[int, Optional[Entgeltgruppe]]
+
+
+class Treffer(NamedTuple):
+    kennung: str
+    jahr: int
+    kosten: Decimal
+
+
+def _jahresKosten(zeilen: Iterable) -> Dict[IndexSchlüssel, Decimal]:
+    einträge = {}
+    for (jahr, gruppe), summen in aggregiere(zeilen, nachJahr, nachGruppe).items():
+        einträge[(jahr, gruppe)] = summen.gesamt
+        einträge[(jahr, None)] = einträge.get((jahr, None), Decimal(0)) + summen.gesamt
+    return einträge
+
+
+class KostenIndex:
+
+    def __init__(self):
+        self._sortiert: Dict[IndexSchlüssel, List[Tuple[Decimal, str]]] = {}
+        self._einträge: Dict[str, Dict[IndexSchlüssel, Decimal]] = {}
+
+    def __contains__(self, kennung: str):
+        return kennung in self._einträge
+
+    def __len__(self):
+        return len(self._einträge)
+
+    def hinzufügen(self, kennung: str, zeilen: Iterable):
+        """
+            Nimmt die Jahreskosten aus den Zeilen einer Position auf; eine schon vorhandene
+            Position gleicher Kennung wird ersetzt
+        """
+        if kennung in self._einträge:
+            self.entfernen(kennung)
+
+        einträge = self._einträge[kennung] = _jahresKosten(zeilen)
+        for key, kosten in einträge.items():
+            insort(self._sortiert.setdefault(key, []), (kosten, kennung))
+
+    def hinzufügenAlle(self, positionen: Iterable[Tuple[str, Iterable]]):
+        """
+            Wie hinzufügen für viele Positionen, aber ohne insort: die neuen Einträge werden
+            angehängt und jede betroffene Liste einmal sortiert
+            :param positionen: Paare aus Kennung und Zeilen der Position
+        """
+        neu = {kennung: _jahresKosten(zeilen) for kennung, zeilen in positionen}
+
+        betroffen = set()
+        ersetzt = {kennung for kennung in neu if kennung in self._einträge}
+        for kennung in ersetzt:
+            betroffen.update(self._einträge.pop(kennung))
+        for key in betroffen:
+            self._sortiert[key] = [e for e in self._sortiert[key] if e[1] not in ersetzt]
+
+        for kennung, einträge in neu.items():
+            self._einträge[kennung] = einträge
+            for key, kosten in einträge.items():
+                self._sortiert.setdefault(key, []).append((kosten, kennung))
+            betroffen.update(einträge)
+
+        for key in betroffen:
+            if self._sortiert[key]:
+                self._sortiert[key].sort()
+            else:
+                del self._sortiert[key]
+
+    def entfernen(self, kennung: str):
+        """
+            :raise KeyError: falls die Position unbekannt ist
+        """
+        for key, kosten in self._einträge.pop(kennung).items():
+            sortiert = self._sortiert[key]
+            del sortiert[bisect_left(sortiert, (kosten, kennung))]
+            if not sortiert:
+                del self._sortiert[key]
+
+    def kosten(self, kennung: str, jahr: int, gruppe: Optional[Entgeltgruppe] = None) -> Optional[Decimal]:
+        return self._einträge[kennung].get((jahr, gruppe))
+
+    def jahre(self, gruppe: Optional[Entgeltgruppe] = None) -> List[int]:
+        return sorted(j for j, g in self._sortiert if g == gruppe)
+
+    def größte(self, jahr: int, anzahl: int, gruppe: Optional[Entgeltgruppe] = None) -> List[Treffer]:
+        """
+            :return: die anzahl Positionen mit den höchsten Kosten im Jahr, absteigend
+        """
+        sortiert = self._sortiert.get((jahr, gruppe), [])
+        return [Treffer(kennung, jahr, kosten)
+                for kosten, kennung in reversed(sortiert[max(0, len(sortiert) - anzahl):])]
+
+    def über(self, schwelle: Decimal, jahr: Optional[int] = None,
+             gruppe: Optional[Entgeltgruppe] = None) -> List[Treffer]:
+        """
+            :param jahr: None für alle Jahre
+            :return: die Positionen mit Kosten über der Schwelle, pro Jahr absteigend
+        """
+        return [t for t in self.bereich(schwelle, None, jahr, gruppe) if t.kosten > schwelle]
+
+    def bereich(self, von: Decimal, bis: Optional[Decimal], jahr: Optional[int] = None,
+                gruppe: Optional[Entgeltgruppe] = None) -> List[Treffer]:
+        """
+            :param bis: None für keine obere Grenze
+            :param jahr: None für alle Jahre
+            :return: die Positionen mit Kosten von einschließlich bis ausschließlich, pro Jahr absteigend
+        """
+        treffer = []
+        for j in ([jahr] if jahr is not None else self.jahre(gruppe)):
+            sortiert = self._sortiert.get((j, gruppe), [])
+            # (kosten,) liegt vor allen (kosten, kennung)
+            start = bisect_left(sortiert, (von,))
+            ende = len(sortiert) if bis is None else bisect_left(sortiert, (bis,))
+            treffer.extend(Treffer(kennung, j, kosten) for kosten, kennung in reversed(sortiert[start:ende]))
+        return treffer
+
+
+if __name__ == '__main__':
+    pass
@@ -1,10 +1,15 @@
+from __future__ import annotations
+
+import copy
+from bisect import bisect_right
 from calendar import monthrange
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional, Sequence
 
-from abakus.model import Stelle, ÖtvKosten, dec
+from abakus.model import Stelle, ÖtvKosten, GuS, Entgeltgruppe, dec, DEC_100
+from abakus.spalten import KostenSpalten, KostenSpaltenBauer
 
 __author__ = "Hans Bering"
 __copyright__ = "Copyright 2019, Hans Bering"
@@ -38,27 +43,72 @@ class MonatsKosten:
     kosten: Decimal
     sonderzahlung: Decimal
 
+    @property
+    def gus(self) -> GuS:
+        return self.stelle.gus
+
+    @property
+    def umfangProzent(self) -> Decimal:
+        return self.stelle.umfangProzent
+
+
+@dataclass(eq=True, frozen=True)
+class SonderzahlungsBasis:
+    """
+        Die ungerundeten Bestandteile einer Jahressonderzahlung
+    """
+    anteil: Decimal
+    summe: Decimal
+    anzahl: int
+
+    def betrag(self, umfangProzent: Optional[Decimal] = None) -> Decimal:
+        """
+            :param umfangProzent: falls gesetzt, wird eine für 100% Umfang berechnete Summe
+                    auf diesen Umfang skaliert; das Ergebnis ist identisch mit der direkten Berechnung
+        """
+        if not self.anzahl:
+            return Decimal(0.)
+        summe = self.summe if umfangProzent is None else self.summe * umfangProzent / DEC_100
+        return dec(self.anteil * summe / self.anzahl)
+
+
+KEINE_SONDERZAHLUNG = SonderzahlungsBasis(Decimal(0.), Decimal(0.), 0)
+
 
 class Anstellung:
     """
         Eine Geschichte von Stellen
     """
     
-    def __init__(self, stelle: Stelle, von: date, bis: date):
+    def __init__(self, stelle: Stelle, von: date, bis: date, änderungen: Sequence[Tuple[date, Stelle]] = ()):
         """
             :param stelle: die Stelle, auf deren Grundlage gerechnet werden soll.
                             Der Beginn der Stelle darf nicht nach dem "von" liegen.
             :param von: das Datum, ab dem iteriert werden soll. Darf nicht vor dem Beginn der Stelle liegen.
             :param bis: das Datum, bis zu dem iteriert werden soll. Im Moment wird nur der volle Monat berücksichtigt.
+            :param änderungen: weitere Abschnitte als Paare (ab, Stelle), aufsteigend nach "ab" sortiert.
+                            Ab dem Monat von "ab" gilt die jeweilige Stelle mit ihren eigenen Stufenaufstiegen;
+                            "ab" muss zwischen "von" und "bis" liegen und darf nicht vor dem Beginn der Stelle liegen.
         """
         assert stelle.beginn <= von, "Der Beginn der Stelle {} liegt nach dem Anfangsdatum {}".format(stelle, von);
         assert von <= bis, "Das Anfangsdatum {} liegt nach dem Enddatum {}".format(von, bis)
 
+        vorher = von
+        for ab, folgeStelle in änderungen:
+            assert vorher <= ab <= bis, "Die Änderung ab {} liegt nicht zwischen {} und {}".format(ab, vorher, bis)
+            assert folgeStelle.beginn <= ab, "Der Beginn der Stelle {} liegt nach der Änderung ab {}".format(folgeStelle, ab)
+            vorher = ab
+
         self.stelle = stelle
         self.von = von
         self.bis = bis
-        
+
+        self.abschnitte = [(von, stelle)] + list(änderungen)
+        # der erste Stichtag je Abschnitt, für die Suche nach dem gültigen Abschnitt
+        self._abschnittStichtage = [lastDateInMonth(ab) for ab, _s in self.abschnitte]
+
         self.monatsListe = self._initMonatsListe()
+        self._stichtage = [t for t, _s in self.monatsListe]
 
     def _initMonatsListe(self) -> List[Tuple[date, Stelle]]:
         """
@@ -68,26 +118,71 @@ class Anstellung:
             :return: eine Liste von Paaren (Stichtag, Stelle) mit den monatsletzten Tagen und der dann gültigen Stelle
         """
         currDate = lastDateInMonth(self.von)
-        currStelle = self.stelle
-    
+        currAbschnitt, currStelle = 0, self.stelle
+
         result = []
         while currDate <= self.bis:
+            while currAbschnitt + 1 < len(self.abschnitte) and self._abschnittStichtage[currAbschnitt + 1] <= currDate:
+                currAbschnitt += 1
+                currStelle = self.abschnitte[currAbschnitt][1]
             currStelle = currStelle.am(currDate)
             result.append((currDate, currStelle))
             currDate = lastDateInNextMonth(currDate)
         return result
 
+    def stelleAm(self, stichtag: date) -> Stelle:
+        """
+            :return: die am Argument-Stichtag gültige Stelle; der Abschnitt wird per Binärsuche gefunden
+        """
+        assert self.von <= stichtag, "Der Stichtag {} liegt vor dem Anfangsdatum {}".format(stichtag, self.von)
+        idx = bisect_right(self._abschnittStichtage, lastDateInMonth(stichtag)) - 1
+        return self.abschnitte[idx][1].am(stichtag)
+
+    def inGruppe(self, gruppe: Entgeltgruppe) -> Anstellung:
+        """
+            :return: eine Anstellung mit dem gleichen Stufenverlauf in der Argument-Gruppe;
+                    die Stufenaufstiege werden dafür nicht neu berechnet
+        """
+        umgruppiert = {}
+
+        def inGruppe(s: Stelle) -> Stelle:
+            if s not in umgruppiert:
+                umgruppiert[s] = s if s.gus.gruppe == gruppe else Stelle(GuS(gruppe, s.gus.stufe),
+                                                                         s.beginn, s.umfangProzent)
+            return umgruppiert[s]
+
+        kopie = copy.copy(self)
+        kopie.stelle = inGruppe(self.stelle)
+        kopie.abschnitte = [(ab, inGruppe(s)) for ab, s in self.abschnitte]
+        kopie.monatsListe = [(t, inGruppe(s)) for t, s in self.monatsListe]
+        return kopie
+
+    def kennung(self) -> str:
+        """
+            :return: eine Zeichenkette, die alle Parameter dieser Anstellung eindeutig beschreibt
+        """
+        def stelleKennung(stelle):
+            return "{} {} {} {:f}".format(stelle.gus.gruppe.name, stelle.gus.stufe.value,
+                                          stelle.beginn, stelle.umfangProzent.normalize())
+
+        return " ".join(["{} {}".format(self.von, self.bis)] +
+                        ["{} {}".format(ab, stelleKennung(s)) for ab, s in self.abschnitte])
+
     def monateAngestellt(self, year: int) -> int:
         """
         :return: the number of months [0-12] for which this Anstellung applied in the argument year
         """
-        return sum(1 for t, _s in self.monatsListe if t.year == year)
+        return len(self._monateIm(year))
+
+    def _monateIm(self, year: int) -> List[Tuple[date, Stelle]]:
+        return self.monatsListe[bisect_right(self._stichtage, date(year, 1, 1)):
+                                bisect_right(self._stichtage, date(year, 12, 31))]
 
     def findBaseStellen(self, year: int) -> List[Stelle]:
         """
         :return: the Stellen which make up the Basis for the Sonderzahlung in the argument year
         """
-        stellenImJahr = list(reversed([(t, s) for t, s in self.monatsListe if t.year == year and t.month < 12]))
+        stellenImJahr = list(reversed([(t, s) for t, s in self._monateIm(year) if t.month < 12]))
 
         # default case: average over past
         if not stellenImJahr:
@@ -115,20 +210,55 @@ class Anstellung:
 class Summierer:
 
     def __init__(self, ötv: ÖtvKosten):
+        """
+            :param ötv: die Gehaltsdaten; dürfen jederzeit durch neue ersetzt werden,
+                    laufende Berechnungen arbeiten dann mit den alten Daten zu Ende
+        """
         self.ötv = ötv
 
     def calc(self, anstellung : Anstellung) -> Tuple[Decimal, List[MonatsKosten]]:
 
         total, details = Decimal(0), []
         
+        for monatsKosten in self.iterCalc(anstellung):
+            details.append(monatsKosten)
+            total += monatsKosten.kosten
+
+        return total, details
+
+    def iterCalc(self, anstellung : Anstellung) -> Iterator[MonatsKosten]:
+        """
+        Liefert die Monatskosten einzeln, ohne sie zu sammeln, z.B. für einen Export
+        """
+        ötv = self.ötv
         for stichtag, stelle in anstellung:
-            kosten = self.ötv.monatsGesamt(stichtag.year, stelle)
-            sonderzahlung = self.calcSonderzahlung(stichtag, anstellung)
+            kosten = ötv.monatsGesamt(stichtag.year, stelle)
+            sonderzahlung = self._sonderzahlung(ötv, stichtag, anstellung)
 
-            details.append(MonatsKosten(stichtag, stelle, kosten, sonderzahlung or Decimal(0.)))
-            total += kosten
+            yield MonatsKosten(stichtag, stelle, kosten, sonderzahlung or Decimal(0.))
 
-        return total, details
+    def calcSpalten(self, anstellung : Anstellung) -> Tuple[Decimal, KostenSpalten]:
+        """
+        Wie calc, aber die Monatskosten werden spaltenweise abgelegt statt als MonatsKosten-Objekte
+        """
+        return self._calcSpalten(self.ötv, anstellung)
+
+    def _calcSpalten(self, ötv: ÖtvKosten, anstellung : Anstellung) -> Tuple[Decimal, KostenSpalten]:
+        total, bauer = Decimal(0), KostenSpaltenBauer()
+        # die Vollkosten ändern sich nur mit Jahr und GuS
+        vollkostenJe = {}
+
+        for stichtag, stelle in anstellung:
+            key = (stichtag.year, stelle.gus.code)
+            vollkosten = vollkostenJe.get(key)
+            if vollkosten is None:
+                vollkosten = vollkostenJe[key] = ötv._monatsGesamt(stichtag.year, stelle.gus)
+            sonderzahlung = self._sonderzahlung(ötv, stichtag, anstellung)
+
+            bauer.anhängen(stichtag, stelle, vollkosten, sonderzahlung or Decimal(0.))
+            total += stelle.anteilig(vollkosten)
+
+        return total, bauer.fertig()
 
     def calcSonderzahlung(self, stichtag: date, anstellung : Anstellung) -> Optional[Decimal]:
         """
@@ -138,6 +268,15 @@ class Summierer:
         :return: None if Sonderzahlung does not apply (i.e., Stichtag is not November),
                     or a Decimal denoting the Sonderzahlung
         """
+        return self._sonderzahlung(self.ötv, stichtag, anstellung)
+
+    @staticmethod
+    def _sonderzahlung(ötv: ÖtvKosten, stichtag: date, anstellung : Anstellung) -> Optional[Decimal]:
+        basis = Summierer._sonderzahlungsBasis(ötv, stichtag, anstellung)
+        return None if basis is None else basis.betrag()
+
+    @staticmethod
+    def _sonderzahlungsBasis(ötv: ÖtvKosten, stichtag: date, anstellung : Anstellung) -> Optional[SonderzahlungsBasis]:
         # if not Nov, nothing to do here
         if stichtag.month != 11:
             return None
@@ -145,16 +284,16 @@ class Summierer:
         # if end date is before Dez, it's zero
         referenzJahr = stichtag.year
         if anstellung.bis < date(referenzJahr, 12, 1):
-            return Decimal(0.)
+            return KEINE_SONDERZAHLUNG
 
         baseStellen = anstellung.findBaseStellen(referenzJahr)
 
-        sonderzahlBases = [self.ötv.sonderzahlung(referenzJahr, stelle) for stelle in baseStellen]
+        sonderzahlBases = [ötv.sonderzahlung(referenzJahr, stelle) for stelle in baseStellen]
 
         # be careful not to round the Anteil - this amplifies to many Euros
         anteil = Decimal(anstellung.monateAngestellt(referenzJahr) / 12.)
 
-        return dec(anteil * sum(sonderzahlBases) / len(sonderzahlBases))
+        return SonderzahlungsBasis(anteil, sum(sonderzahlBases), len(sonderzahlBases))
 
 
 if __name__ == '__main__':
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, FrozenInstanceError
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
 from enum import Enum
-from typing import Mapping
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Tuple
 
 __author__ = "Hans Bering"
 __copyright__ = "Copyright 2019, Hans Bering"
@@ -36,6 +39,9 @@ class Stufe(Enum):
                     letzterAufstieg.day)
 
 
+_LETZTE_STUFE = Stufe.sechs.value
+
+
 class Entgeltgruppe(Enum):
     """
         Definition der Entgeltgruppen, für die Gehaltsdaten vorliegen
@@ -45,13 +51,70 @@ class Entgeltgruppe(Enum):
     E_13 = 13
     
 
-@dataclass(eq=True, frozen=True)
 class GuS:
     """
         Entgeltgruppe und Stufe
+
+        Es gibt zu jeder Kombination nur ein Objekt; GuS(gruppe, stufe) liefert
+        immer dasselbe. Für schnelle Vergleiche und Tabellen tragen die Objekte
+        kleine ganzzahlige Codes: die Werte von Gruppe und Stufe und einen
+        gemeinsamen Code.
+    """
+    __slots__ = ("gruppe", "stufe", "gruppenCode", "stufenCode", "code", "_hash")
+
+    __alle = {}
+
+    def __new__(cls, gruppe: Entgeltgruppe, stufe: Stufe):
+        gus = GuS.__alle.get((gruppe, stufe))
+        if gus is None:
+            assert isinstance(gruppe, Entgeltgruppe) and isinstance(stufe, Stufe), \
+                "Ungültige Gruppe oder Stufe: {!r}, {!r}".format(gruppe, stufe)
+            gus = object.__new__(cls)
+            for name, wert in (("gruppe", gruppe), ("stufe", stufe),
+                               ("gruppenCode", gruppe.value), ("stufenCode", stufe.value),
+                               ("code", gusCode(gruppe.value, stufe.value)), ("_hash", hash((gruppe, stufe)))):
+                object.__setattr__(gus, name, wert)
+            GuS.__alle[(gruppe, stufe)] = gus
+            _GUS_NACH_CODE[gus.code] = gus
+        return gus
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError("cannot assign to field '{}'".format(name))
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError("cannot delete field '{}'".format(name))
+
+    def __reduce__(self):
+        return GuS, (self.gruppe, self.stufe)
+
+    def __eq__(self, other):
+        if other.__class__ is not GuS:
+            return NotImplemented
+        return self.code == other.code
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return "GuS(gruppe={!r}, stufe={!r})".format(self.gruppe, self.stufe)
+
+
+_GUS_NACH_CODE = {}
+
+
+def gusCode(gruppenCode: int, stufenCode: int) -> int:
+    """
+        :return: der gemeinsame Code zu den Werten von Entgeltgruppe und Stufe
+    """
+    return gruppenCode << 3 | stufenCode
+
+
+def gusAusCodes(gruppenCode: int, stufenCode: int) -> GuS:
     """
-    gruppe: Entgeltgruppe
-    stufe: Stufe
+        :return: die GuS zu den Werten von Entgeltgruppe und Stufe, ohne Umweg über die Enums
+    """
+    gus = _GUS_NACH_CODE.get(gusCode(gruppenCode, stufenCode))
+    return gus if gus is not None else GuS(Entgeltgruppe(gruppenCode), Stufe(stufenCode))
 
 
 class AllGuS:
@@ -87,11 +150,38 @@ def dec(euros:float):
 DEC_100 = dec(100)
 
 
-@dataclass(eq=True, frozen=True)
 class Stelle:
-    gus: GuS
-    beginn: date
-    umfangProzent: Decimal = DEC_100
+    """
+        Eine Stelle in einer GuS seit einem Beginn mit einem Umfang; unveränderlich
+        und mit Gleichheit über diese drei Werte wie eine frozen dataclass, aber
+        ohne __dict__ pro Objekt
+    """
+    __slots__ = ("gus", "beginn", "umfangProzent")
+
+    def __init__(self, gus: GuS, beginn: date, umfangProzent: Decimal = DEC_100):
+        object.__setattr__(self, "gus", gus)
+        object.__setattr__(self, "beginn", beginn)
+        object.__setattr__(self, "umfangProzent", umfangProzent)
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError("cannot assign to field '{}'".format(name))
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError("cannot delete field '{}'".format(name))
+
+    def __reduce__(self):
+        return Stelle, (self.gus, self.beginn, self.umfangProzent)
+
+    def __eq__(self, other):
+        if other.__class__ is not Stelle:
+            return NotImplemented
+        return self.gus is other.gus and self.beginn == other.beginn and self.umfangProzent == other.umfangProzent
+
+    def __hash__(self):
+        return hash((self.gus, self.beginn, self.umfangProzent))
+
+    def __repr__(self):
+        return "Stelle(gus={!r}, beginn={!r}, umfangProzent={!r})".format(self.gus, self.beginn, self.umfangProzent)
 
     def anteilig(self, zahl: Decimal):
         return zahl * self.umfangProzent / DEC_100
@@ -103,44 +193,75 @@ class Stelle:
                 gibt; oder eine neue mit mindestens einem Stufenaufstieg und aktualisiertem
                 "beginn" (zwischen dem jetzigen "beginn" und dem Argumentdatum)
         """
-        neueStufe, neuesSeit = self.gus.stufe, self.beginn
+        # mit den Codes statt der Enums: die Jahre bis zum nächsten Aufstieg sind die Stufe selbst
+        stufe = self.gus.stufenCode
+        neuesSeit = self.beginn
 
-        nächstesSeit = self.gus.stufe.nächsterAufstieg(self.beginn)
+        nächstesSeit = date(neuesSeit.year + stufe, neuesSeit.month, neuesSeit.day)
+        if nächstesSeit > datum:
+            return self
         while nächstesSeit <= datum:
             neuesSeit = nächstesSeit
-            neueStufe = neueStufe.nächste()
-            nächstesSeit = neueStufe.nächsterAufstieg(nächstesSeit)
+            if stufe < _LETZTE_STUFE:
+                stufe += 1
+            nächstesSeit = date(nächstesSeit.year + stufe, nächstesSeit.month, nächstesSeit.day)
 
-        return self if neueStufe == self.gus.stufe else Stelle(GuS(self.gus.gruppe, neueStufe),
-                                                               neuesSeit, self.umfangProzent)
+        return self if stufe == self.gus.stufenCode else Stelle(gusAusCodes(self.gus.gruppenCode, stufe),
+                                                                neuesSeit, self.umfangProzent)
 
 
 @dataclass(eq=True, frozen=True)
 class Gehälter:
+    __slots__ = ("sonderZahlProzent", "bruttoByStufe")
+
     sonderZahlProzent: Decimal
     bruttoByStufe: Mapping[Stufe, Decimal]
 
+    def __reduce__(self):
+        # eingefrorene Gehälter halten einen MappingProxyType, der sich nicht picklen lässt
+        return Gehälter, (self.sonderZahlProzent, dict(self.bruttoByStufe))
 
-class ÖtvKosten:
-    
+
+class _ÖtvDaten(ABC):
     """
-    ein fixer Prozentsatz, der als Kostenzuschlag genommen wird
+        Die lesenden Zugriffe auf ÖTV-Gehaltsdaten; Unterklassen liefern
+        die Gehälter für Jahr und Gruppe
     """
+    __slots__ = ()
+
+    # ein fixer Prozentsatz, der als Kostenzuschlag genommen wird
     arbeitgeberKostenZuschlag = 0.3
 
-    def __init__(self):
-        # Mapping[Tuple[int, Entgeltgruppe], Gehälter]
-        self.__gehälter = {}
-        self.zuschlag = Decimal(1. + ÖtvKosten.arbeitgeberKostenZuschlag)
+    @abstractmethod
+    def gehälterFür(self, jahr: int, gruppe: Entgeltgruppe) -> Gehälter:
+        """
+            Look up the wanted Gehälter, with a fallback for the last year in which we have data.
+        """
 
-    def mitGehalt(self, jahr: int, gruppe : Entgeltgruppe, gehälter : Gehälter):
+    @abstractmethod
+    def einträge(self) -> Iterable[Tuple[Tuple[int, Entgeltgruppe], Gehälter]]:
         """
-            Setzt für das gegebene Jahr und die gegebene Gruppe und Stufe das gegebene Gehalt fest.
-            :raise AssertionError: falls für Jahr, Gruppe und Stufe schon ein Gehalt gesetzt ist
+            :return: alle gesetzten Paare ((Jahr, Gruppe), Gehälter)
         """
-        key = (jahr, gruppe)
-        assert key not in self.__gehälter, "Gehalt für {} in {} schon gesetzt (ist {})".format(jahr, gruppe, self.__gehälter[key])
-        self.__gehälter[key] = gehälter
+
+    def letztesJahr(self, gruppe: Entgeltgruppe) -> int:
+        """
+            :return: das letzte Jahr, für das Daten zur Gruppe vorliegen; für spätere Jahre
+                    gelten die Daten dieses Jahres
+        """
+        jahre = [j for j, g in (key for key, _g in self.einträge()) if g == gruppe]
+        if not jahre:
+            raise AssertionError("Keine Gehaltsdaten für {} verfügbar".format(gruppe))
+        return max(jahre)
+
+    def gehälterOderNone(self, jahr: int, gruppe: Entgeltgruppe) -> Optional[Gehälter]:
+        """
+            :return: die Gehälter wie von gehälterFür; None, falls zur Gruppe gar keine Daten vorliegen
+        """
+        try:
+            return self.gehälterFür(jahr, gruppe)
+        except AssertionError:
+            return None
 
     def monatsGesamt(self, jahr: int, stelle: Stelle):
         return stelle.anteilig(self._monatsGesamt(jahr, stelle.gus))
@@ -150,7 +271,7 @@ class ÖtvKosten:
             :return: die monatlichen Gesamtkosten mit Arbeitgeberzuschlag,
                     aber ohne Jahressonderzahlung
         """
-        return dec(self.__getGehälter(jahr, gus.gruppe).bruttoByStufe[gus.stufe] * self.zuschlag)
+        return dec(self.gehälterFür(jahr, gus.gruppe).bruttoByStufe[gus.stufe] * self.zuschlag)
 
     def sonderzahlung(self, jahr: int, stelle: Stelle):
         
@@ -160,12 +281,56 @@ class ÖtvKosten:
         """
             :return: die Jahressonderzahlung in Prozent
         """
-        return self.__getGehälter(jahr, gus.gruppe).sonderZahlProzent
+        return self.gehälterFür(jahr, gus.gruppe).sonderZahlProzent
 
-    def __getGehälter(self, jahr: int, gruppe : Entgeltgruppe) -> Gehälter:
+    def prüfsumme(self) -> str:
         """
-            Look up the wanted Gehälter, with a fallback for the last year in which we have data.
+            :return: eine Prüfsumme über alle Gehaltsdaten; gleiche Daten ergeben
+                    unabhängig von der Reihenfolge des Setzens die gleiche Summe
         """
+        sha = hashlib.sha256()
+        for (jahr, gruppe), gehälter in sorted(self.einträge(), key=lambda i: (i[0][0], i[0][1].value)):
+            sha.update("{} {} {}".format(jahr, gruppe.name, gehälter.sonderZahlProzent).encode())
+            for stufe, brutto in sorted(gehälter.bruttoByStufe.items(), key=lambda i: i[0].value):
+                sha.update(" {}:{}".format(stufe.value, brutto).encode())
+            sha.update(b"\n")
+        return sha.hexdigest()
+
+
+class ÖtvKosten(_ÖtvDaten):
+
+    def __init__(self):
+        # Mapping[Tuple[int, Entgeltgruppe], Gehälter]
+        self.__gehälter = {}
+        self.zuschlag = Decimal(1. + ÖtvKosten.arbeitgeberKostenZuschlag)
+        # wird bei jedem mitGehalt verworfen
+        self.__prüfsumme = None
+
+    def mitGehalt(self, jahr: int, gruppe : Entgeltgruppe, gehälter : Gehälter):
+        """
+            Setzt für das gegebene Jahr und die gegebene Gruppe und Stufe das gegebene Gehalt fest.
+            :raise AssertionError: falls für Jahr, Gruppe und Stufe schon ein Gehalt gesetzt ist
+        """
+        key = (jahr, gruppe)
+        assert key not in self.__gehälter, "Gehalt für {} in {} schon gesetzt (ist {})".format(jahr, gruppe, self.__gehälter[key])
+        self.__gehälter[key] = gehälter
+        self.__prüfsumme = None
+
+    def prüfsumme(self) -> str:
+        if self.__prüfsumme is None:
+            self.__prüfsumme = super().prüfsumme()
+        return self.__prüfsumme
+
+    def einträge(self):
+        return self.__gehälter.items()
+
+    def einfrieren(self) -> ÖtvStand:
+        """
+            :return: einen unveränderlichen Stand der aktuellen Gehaltsdaten
+        """
+        return ÖtvStand(self.__gehälter, self.zuschlag)
+
+    def gehälterFür(self, jahr: int, gruppe : Entgeltgruppe) -> Gehälter:
         key = (jahr, gruppe)
         if not key in self.__gehälter:
             mögliche = [(j, g) for j, g in self.__gehälter.keys() if g == gruppe]
@@ -175,5 +340,59 @@ class ÖtvKosten:
         return self.__gehälter[key]
 
 
+class ÖtvStand(_ÖtvDaten):
+    """
+        Ein unveränderlicher Stand von ÖTV-Gehaltsdaten. Da nach dem Anlegen
+        nichts mehr geschrieben wird, kann ein Stand ohne Sperren von beliebig
+        vielen Threads gelesen und nach einem fork ohne Kopie geteilt werden;
+        für andere Prozesse (etwa mit spawn) wird er gepickelt und dort neu eingefroren.
+    """
+    __slots__ = ("_gehälter", "_letzteJahre", "zuschlag", "_prüfsumme")
+
+    def __init__(self, gehälter: Mapping[Tuple[int, Entgeltgruppe], Gehälter], zuschlag: Decimal):
+        # schon eingefrorene Gehälter, etwa aus einem anderen Stand, werden geteilt statt kopiert
+        eingefroren = {key: g if isinstance(g.bruttoByStufe, MappingProxyType)
+                       else Gehälter(g.sonderZahlProzent, MappingProxyType(dict(g.bruttoByStufe)))
+                       for key, g in gehälter.items()}
+        letzteJahre = {}
+        for jahr, gruppe in eingefroren:
+            letzteJahre[gruppe] = max(jahr, letzteJahre.get(gruppe, jahr))
+
+        object.__setattr__(self, "_gehälter", MappingProxyType(eingefroren))
+        object.__setattr__(self, "_letzteJahre", MappingProxyType(letzteJahre))
+        object.__setattr__(self, "zuschlag", zuschlag)
+        object.__setattr__(self, "_prüfsumme", super().prüfsumme())
+
+    def __reduce__(self):
+        return ÖtvStand, (dict(self._gehälter), self.zuschlag)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Ein ÖtvStand ist unveränderlich")
+
+    def __delattr__(self, name):
+        raise AttributeError("Ein ÖtvStand ist unveränderlich")
+
+    def einträge(self):
+        return self._gehälter.items()
+
+    def prüfsumme(self) -> str:
+        return self._prüfsumme
+
+    def letztesJahr(self, gruppe: Entgeltgruppe) -> int:
+        letztesJahr = self._letzteJahre.get(gruppe)
+        if letztesJahr is None:
+            raise AssertionError("Keine Gehaltsdaten für {} verfügbar".format(gruppe))
+        return letztesJahr
+
+    def gehälterFür(self, jahr: int, gruppe : Entgeltgruppe) -> Gehälter:
+        gehälter = self._gehälter.get((jahr, gruppe))
+        if gehälter is None:
+            letztesJahr = self._letzteJahre.get(gruppe)
+            if letztesJahr is None:
+                raise AssertionError("Keine Gehaltsdaten für {} verfügbar".format(gruppe))
+            gehälter = self._gehälter[(letztesJahr, gruppe)]
+        return gehälter
+
+
 if __name__ == "__main__":
     printAllGuS()
@@ -0,0 +1,144 @@
+import logging
+import pathlib
+import threading
+from typing import Callable, List, Optional
+
+from abakus import resources
+from abakus.csvÖtv import InkrementellerÖtvParser, ÖtvFormatException
+from abakus.laufend import Summierer
+from abakus.model import ÖtvStand
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+
+class ÖtvNachlader:
+    """
+        Überwacht die ÖTV-Datei und tauscht bei Änderungen die Gehaltsdaten
+        der angemeldeten Summierer aus.
+
+        Die neuen Daten werden vollständig gelesen und geprüft, bevor sie
+        mit einer einzigen Zuweisung ausgetauscht werden; laufende Berechnungen
+        arbeiten mit dem alten Stand zu Ende. Fehlerhafte Dateien werden
+        protokolliert, an beiFehler gemeldet und ansonsten ignoriert.
+    """
+
+    def __init__(self, summierer: Summierer, pfad=None, intervall: float = 2.):
+        """
+            :param summierer: der Summierer, dessen Gehaltsdaten ausgetauscht werden
+            :param pfad: die zu überwachende ÖTV-Datei; standardmäßig die "ötv.csv" aus den Ressourcen
+            :param intervall: die Sekunden zwischen zwei Prüfungen im Hintergrund
+        """
+        self.summierer = summierer
+        self.pfad = pathlib.Path(pfad if pfad else resources.path("ötv.csv"))
+        self.intervall = intervall
+
+        self.beiWechsel: List[Callable[[ÖtvStand], None]] = []
+        # erhalten die Fehlermeldungen einer nicht übernommenen Datei
+        self.beiFehler: List[Callable[[List[str]], None]] = []
+        self.letzteFehler: List[str] = []
+
+        self._zuletzt = self._dateiStand()
+        # liest bei Änderungen nur die geänderten Zeilen neu
+        self._parser = InkrementellerÖtvParser()
+        self._stand: Optional[ÖtvStand] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _dateiStand(self):
+        try:
+            st = self.pfad.stat()
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def prüfe(self) -> bool:
+        """
+            Prüft einmal, ob sich die Datei geändert hat, und lädt sie gegebenenfalls neu.
+
+            :return: True, falls neue Gehaltsdaten eingesetzt wurden
+        """
+        dateiStand = self._dateiStand()
+        if dateiStand is None or dateiStand == self._zuletzt:
+            return False
+        self._zuletzt = dateiStand
+        return self.lade()
+
+    def lade(self) -> bool:
+        """
+            Liest die Datei und setzt die Daten ein, falls sie fehlerfrei sind und
+            sich von den bisherigen unterscheiden.
+
+            :return: True, falls neue Gehaltsdaten eingesetzt wurden
+        """
+        try:
+            with self.pfad.open("r") as csvFile:
+                änderungen = self._parser.parse(csvFile)
+        except ÖtvFormatException as ö:
+            self.letzteFehler = ö.errors
+            for e in ö.errors:
+                logging.error("Neue ÖTV-Daten aus '{}' nicht übernommen: {}".format(self.pfad, e))
+            self._meldeFehler()
+            return False
+        except OSError as e:
+            self.letzteFehler = [str(e)]
+            logging.error("ÖTV-Daten aus '{}' konnten nicht gelesen werden: {}".format(self.pfad, e))
+            self._meldeFehler()
+            return False
+
+        self.letzteFehler = []
+        alt = self.summierer.ötv
+        if not änderungen and alt is not None and alt is self._stand:
+            return False
+
+        neu = self._stand = self._parser.stand()
+        if alt is not None and alt.prüfsumme() == neu.prüfsumme():
+            self._stand = alt
+            return False
+
+        self.summierer.ötv = neu
+        logging.info("Neue ÖTV-Daten aus '{}' übernommen".format(self.pfad))
+        for callback in self.beiWechsel:
+            callback(neu)
+        return True
+
+    def _meldeFehler(self):
+        for callback in self.beiFehler:
+            callback(list(self.letzteFehler))
+
+    def start(self, sofortLaden: bool = False):
+        """
+            Startet die regelmäßige Prüfung in einem Hintergrund-Thread
+            :param sofortLaden: falls True, werden die Daten zuerst im Hintergrund gelesen,
+                    etwa um den Programmstart nicht damit aufzuhalten
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._lauf, args=(sofortLaden,), name="ÖtvNachlader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _lauf(self, sofortLaden: bool):
+        if sofortLaden:
+            try:
+                self.lade()
+            except Exception:
+                logging.exception("Fehler beim Lesen der ÖTV-Daten aus '{}'".format(self.pfad))
+        while not self._stop.wait(self.intervall):
+            try:
+                self.prüfe()
+            except Exception:
+                logging.exception("Fehler beim Prüfen der ÖTV-Daten in '{}'".format(self.pfad))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,177 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from abakus.abhängigkeiten import AbhängigkeitsIndex
+from abakus.aggregation import Rollup, Schlüssel, nachJahr
+from abakus.kostenIndex import KostenIndex
+from abakus.laufend import Anstellung, Summierer, KEINE_SONDERZAHLUNG
+from abakus.model import Stelle, DEC_100
+from abakus.spalten import KostenSpalten, KostenSpaltenBauer
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Berechnung vieler Anstellungen auf einmal.
+
+Viele Positionen eines Portfolios unterscheiden sich nur im Umfang. Solche
+Positionen fassen wir zu Klassen zusammen, berechnen jede Klasse einmal bei
+100% und skalieren dann auf den Umfang der einzelnen Positionen; die Rundung
+bleibt dabei identisch mit der Einzelberechnung.
+"""
+
+
+@dataclass(frozen=True)
+class Position:
+    """
+        Eine Anstellung in einem Portfolio mit einer eindeutigen Kennung und
+        beliebigen Merkmalen wie Kostenstelle oder Projekt
+    """
+    kennung: str
+    anstellung: Anstellung
+    merkmale: Mapping[str, str] = field(default_factory=dict, compare=False)
+
+
+def _mitUmfang(stelle: Stelle, umfangProzent: Decimal) -> Stelle:
+    return stelle if stelle.umfangProzent == umfangProzent else Stelle(stelle.gus, stelle.beginn, umfangProzent)
+
+
+def einheitlicherUmfang(anstellung: Anstellung) -> Optional[Decimal]:
+    """
+        :return: der Umfang, falls er in allen Abschnitten gleich ist, sonst None
+    """
+    umfänge = {s.umfangProzent for _ab, s in anstellung.abschnitte}
+    return umfänge.pop() if len(umfänge) == 1 else None
+
+
+def klassenSchlüssel(anstellung: Anstellung) -> Hashable:
+    """
+        :return: ein Schlüssel, der für alle Anstellungen gleich ist, die sich nur im Umfang unterscheiden;
+                Anstellungen mit wechselndem Umfang bilden jeweils eine eigene Klasse
+    """
+    if einheitlicherUmfang(anstellung) is None:
+        return anstellung.kennung()
+    return (anstellung.von, anstellung.bis) + tuple((ab, s.gus, s.beginn) for ab, s in anstellung.abschnitte)
+
+
+class PortfolioSummierer:
+
+    def __init__(self, summierer: Summierer):
+        self.summierer = summierer
+        self.klassenAnzahl = 0
+
+    def berechne(self, positionen: Iterable[Position]) -> Dict[str, Tuple[Decimal, KostenSpalten]]:
+        """
+            :return: pro Kennung das Ergebnis wie von Summierer.calcSpalten, in der Reihenfolge der Positionen
+            :raise AssertionError: falls Kennungen doppelt vorkommen; ihre Ergebnisse würden sonst verschluckt
+        """
+        ötv = self.summierer.ötv
+        positionen = list(positionen)
+        _prüfeEindeutig(positionen)
+
+        klassen: Dict[Hashable, List[Position]] = {}
+        for position in positionen:
+            klassen.setdefault(klassenSchlüssel(position.anstellung), []).append(position)
+        self.klassenAnzahl = len(klassen)
+
+        ergebnisse = {}
+        for mitglieder in klassen.values():
+            if einheitlicherUmfang(mitglieder[0].anstellung) is None:
+                for position in mitglieder:
+                    ergebnisse[position.kennung] = self.summierer._calcSpalten(ötv, position.anstellung)
+                continue
+
+            voll, basen = self._berechneVoll(ötv, mitglieder[0].anstellung)
+            for position in mitglieder:
+                umfang = einheitlicherUmfang(position.anstellung)
+                spalten = voll.skaliert(umfang, [b.betrag(umfang) for b in basen])
+                ergebnisse[position.kennung] = spalten.summe(), spalten
+        return {p.kennung: ergebnisse[p.kennung] for p in positionen}
+
+    def _berechneVoll(self, ötv, anstellung: Anstellung):
+        """
+            :return: die Spalten der Anstellung bei 100% Umfang und die Sonderzahlungsbasen aller Monate
+        """
+        voll = Anstellung(_mitUmfang(anstellung.stelle, DEC_100), anstellung.von, anstellung.bis,
+                          [(ab, _mitUmfang(s, DEC_100)) for ab, s in anstellung.abschnitte[1:]])
+
+        bauer, basen = KostenSpaltenBauer(), []
+        for stichtag, stelle in voll:
+            basis = Summierer._sonderzahlungsBasis(ötv, stichtag, voll) or KEINE_SONDERZAHLUNG
+            bauer.anhängen(stichtag, stelle, ötv._monatsGesamt(stichtag.year, stelle.gus), basis.betrag())
+            basen.append(basis)
+        return bauer.fertig(), basen
+
+
+def _prüfeEindeutig(positionen: Sequence[Position]):
+    kennungen = Counter(p.kennung for p in positionen)
+    doppelt = sorted(k for k, n in kennungen.items() if n > 1)
+    assert not doppelt, "Kennungen sind nicht eindeutig: {}".format(", ".join(doppelt))
+
+
+class InkrementellesPortfolio:
+    """
+        Ein Portfolio mit Ergebnissen pro Position und materialisierten Summen,
+        die bei Änderungen an Positionen oder ÖTV-Daten gezielt nachgeführt werden
+    """
+
+    def __init__(self, summierer: Summierer, *schlüssel: Schlüssel):
+        """
+            :param schlüssel: die Schlüssel für die Summen; standardmäßig nach Jahr
+        """
+        self.summierer = summierer
+        self.positionen: Dict[str, Position] = {}
+        self.ergebnisse: Dict[str, Tuple[Decimal, KostenSpalten]] = {}
+        self.summen = Rollup(*(schlüssel or (nachJahr,)))
+        self.index = AbhängigkeitsIndex()
+        # Jahreskosten pro Position für Ranglisten und Schwellen
+        self.kosten = KostenIndex()
+
+    def hinzufügen(self, *positionen: Position):
+        """
+            Berechnet die Positionen und nimmt sie auf; vorhandene Positionen gleicher Kennung werden ersetzt.
+            Schlägt die Berechnung fehl, bleibt das Portfolio unverändert.
+        """
+        _prüfeEindeutig(positionen)
+        ergebnisse = PortfolioSummierer(self.summierer).berechne(positionen)
+        for position in positionen:
+            self.positionen[position.kennung] = position
+            self.index.registriere(position.kennung, position.anstellung)
+        self._übernehme(ergebnisse)
+
+    def entfernen(self, kennung: str):
+        del self.positionen[kennung]
+        del self.ergebnisse[kennung]
+        self.summen.entfernen(kennung)
+        self.kosten.entfernen(kennung)
+        self.index.entferne(kennung)
+
+    def setzeÖtv(self, ötv) -> List[str]:
+        """
+            Setzt neue ÖTV-Daten und berechnet nur die davon betroffenen Positionen neu
+            :return: die Kennungen der neu berechneten Positionen
+        """
+        betroffen = self.index.betroffen(self.summierer.ötv, ötv)
+        self.summierer.ötv = ötv
+        self._übernehme(PortfolioSummierer(self.summierer).berechne(self.positionen[k] for k in betroffen))
+        return sorted(betroffen)
+
+    def _übernehme(self, ergebnisse: Dict[str, Tuple[Decimal, KostenSpalten]]):
+        for kennung, ergebnis in ergebnisse.items():
+            self.ergebnisse[kennung] = ergebnis
+            self.summen.hinzufügen(kennung, ergebnis[1], self.positionen[kennung].merkmale)
+        self.kosten.hinzufügenAlle((kennung, spalten) for kennung, (_total, spalten) in ergebnisse.items())
+
+    def total(self) -> Decimal:
+        """
+            :return: die Summe der Kosten und Sonderzahlungen aller Positionen
+        """
+        return sum((s.gesamt for s in self.summen.summen.values()), Decimal(0))
+
+
+if __name__ == '__main__':
+    pass
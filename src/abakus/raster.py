@@ -0,0 +1,140 @@
+import itertools
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from abakus.laufend import Anstellung, Summierer, lastDateInMonth
+from abakus.model import Entgeltgruppe, GuS, Stelle, Stufe, DEC_100
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Berechnung eines ganzen Rasters von Varianten für eine Einstellung:
+Gruppen x Vorgeschichten x Anfangsdaten x Umfänge.
+
+* Der Stufenverlauf hängt nur von Vorgeschichte und Zeitraum ab; er wird
+  einmal berechnet und für alle Gruppen übernommen.
+* Der Umfang ist ein reiner Faktor (siehe Stelle.anteilig); pro Gruppe wird
+  daher nur bei 100% nachgeschlagen und dann für jeden Umfang skaliert.
+  Die Rundung ist dabei identisch mit der Einzelberechnung.
+"""
+
+ACHSEN = ("gruppe", "vorgeschichte", "von", "umfang")
+
+
+@dataclass(eq=True, frozen=True)
+class Vorgeschichte:
+    """
+        Die Stufe zu Beginn und - bei einer Weiterbeschäftigung - seit wann sie gilt;
+        ohne "seit" handelt es sich um eine Neueinstellung mit Stufenbeginn am Anfangsdatum
+    """
+    stufe: Stufe
+    seit: Optional[date] = None
+
+    def stufenBeginn(self, von: date) -> date:
+        return self.seit if self.seit else von
+
+
+@dataclass(eq=True, frozen=True)
+class Zelle:
+    gruppe: Entgeltgruppe
+    vorgeschichte: Vorgeschichte
+    von: date
+    umfang: Decimal
+
+
+@dataclass(eq=True, frozen=True)
+class ZellErgebnis:
+    """
+        :param kosten: die Summe der Monatskosten wie im Ergebnis von Summierer.calc
+        :param sonderzahlungen: die Summe der Jahressonderzahlungen
+    """
+    kosten: Decimal
+    sonderzahlungen: Decimal
+
+    @property
+    def gesamt(self) -> Decimal:
+        return self.kosten + self.sonderzahlungen
+
+
+def bisNachMonaten(von: date, monate: int) -> date:
+    """
+        :return: der letzte Tag des Monats, der "monate" Monate nach "von" (einschließlich) endet
+    """
+    assert monate > 0, "Ungültige Dauer von {} Monaten".format(monate)
+    m = von.month - 1 + monate - 1
+    return lastDateInMonth(date(von.year + m // 12, m % 12 + 1, 1))
+
+
+class ErgebnisWürfel:
+    """
+        Die Ergebnisse aller Zellen eines Rasters mit den Achsen aus ACHSEN
+    """
+
+    def __init__(self, gruppen: Sequence[Entgeltgruppe], vorgeschichten: Sequence[Vorgeschichte],
+                 vonDaten: Sequence[date], umfänge: Sequence[Decimal], werte: Dict[Zelle, ZellErgebnis]):
+        self.achsen = dict(zip(ACHSEN, (list(gruppen), list(vorgeschichten), list(vonDaten), list(umfänge))))
+        self.werte = werte
+
+    def __getitem__(self, zelle: Zelle) -> ZellErgebnis:
+        return self.werte[zelle]
+
+    def __len__(self):
+        return len(self.werte)
+
+    def tabelle(self, zeilenAchse: str, spaltenAchse: str, **fest) -> Tuple[list, list, List[List[Decimal]]]:
+        """
+            Ein zweidimensionaler Schnitt durch den Würfel, etwa für eine Vergleichstabelle.
+
+            :param zeilenAchse: der Name der Achse für die Zeilen
+            :param spaltenAchse: der Name der Achse für die Spalten
+            :param fest: die Werte für die beiden übrigen Achsen
+            :return: Zeilenbeschriftungen, Spaltenbeschriftungen und die Gesamtkosten pro Zelle
+        """
+        übrige = set(ACHSEN) - {zeilenAchse, spaltenAchse}
+        assert übrige == set(fest), "Für die Achsen {} werden feste Werte benötigt, nicht {}".format(
+            sorted(übrige), sorted(fest))
+
+        zeilen, spalten = self.achsen[zeilenAchse], self.achsen[spaltenAchse]
+        werte = [[self.werte[Zelle(**dict(fest, **{zeilenAchse: z, spaltenAchse: s}))].gesamt
+                  for s in spalten] for z in zeilen]
+        return zeilen, spalten, werte
+
+
+class Raster:
+
+    def __init__(self, summierer: Summierer):
+        self.summierer = summierer
+
+    def berechne(self, gruppen: Sequence[Entgeltgruppe], vorgeschichten: Sequence[Vorgeschichte],
+                 vonDaten: Sequence[date], umfänge: Sequence[Decimal], monate: int) -> ErgebnisWürfel:
+        """
+            :param monate: die Dauer jeder Variante in Monaten ab dem jeweiligen Anfangsdatum
+        """
+        ötv = self.summierer.ötv
+        werte = {}
+
+        for vorgeschichte, von in itertools.product(vorgeschichten, vonDaten):
+            verlauf = Anstellung(Stelle(GuS(gruppen[0], vorgeschichte.stufe), vorgeschichte.stufenBeginn(von), DEC_100),
+                                 von, bisNachMonaten(von, monate))
+
+            for gruppe in gruppen:
+                anstellung = verlauf.inGruppe(gruppe)
+                vollkosten = [ötv._monatsGesamt(stichtag.year, stelle.gus) for stichtag, stelle in anstellung]
+                basen = [b for b in (Summierer._sonderzahlungsBasis(ötv, stichtag, anstellung)
+                                     for stichtag, _s in anstellung) if b is not None]
+
+                for umfang in umfänge:
+                    kosten = sum((v * umfang / DEC_100 for v in vollkosten), Decimal(0))
+                    sonderzahlungen = sum((b.betrag(umfang) for b in basen), Decimal(0))
+                    werte[Zelle(gruppe, vorgeschichte, von, umfang)] = ZellErgebnis(kosten, sonderzahlungen)
+
+        return ErgebnisWürfel(gruppen, vorgeschichten, vonDaten, umfänge, werte)
+
+
+if __name__ == '__main__':
+    pass
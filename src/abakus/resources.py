@@ -1,35 +1,190 @@
-import pathlib
+import io
 import logging
+import pathlib
+import shutil
+import tempfile
+import threading
+import zipfile
 
 __author__ = "Hans Bering"
 __copyright__ = "Copyright 2019, Hans Bering"
 __license__ = "GPL3"
 __status__ = "Development"
 
+"""
+Zugriff auf die Ressourcen: entweder das Verzeichnis "resources" oder,
+in exportierten Fassungen, das Archiv "resources.zip".
+
+Der Ort wird nur einmal gesucht; gelesene Inhalte werden im Speicher gehalten,
+sodass weitere Zugriffe keine Dateisystem-Abfragen mehr brauchen. Ausgenommen
+sind die editierbaren Ressourcen, die bei jedem Zugriff neu gelesen werden.
+
+Ins Archiv kommen nur feste Inhalte wie Stylesheets, Bilder und Schriften.
+Die editierbaren Ressourcen liegen auch in exportierten Fassungen als
+Dateien neben dem Archiv, damit man sie bearbeiten kann und der
+ÖtvNachlader die Änderungen sieht.
+"""
+
+ARCHIV_NAME = "resources.zip"
+EDITIERBAR = ("ötv.csv",)
+
 __RESOURCES_ROOT = None
+__ARCHIV = None
+__inhalte = {}
+__pfade = {}
+__auszugVerzeichnis = None
+__lock = threading.Lock()
+
+
+def _sucheWurzel():
+    global __RESOURCES_ROOT, __ARCHIV
+    if __RESOURCES_ROOT is not None or __ARCHIV is not None:
+        return
+
+    curr = pathlib.Path(__file__).parent
+    for depth in range(3):
+        basis = curr / (depth * "../")
+        if (basis / "resources").is_dir():
+            __RESOURCES_ROOT = basis / "resources"
+            return
+        if (basis / ARCHIV_NAME).is_file():
+            __ARCHIV = zipfile.ZipFile(str((basis / ARCHIV_NAME).resolve()))
+            return
+    raise AssertionError("Ressourcen konnten von '{}' aus nicht gefunden werden".format(curr))
+
+
+def _loseDatei(resPath):
+    """
+        :return: der Pfad einer editierbaren Ressource neben dem Archiv; None ohne Archiv
+                oder für Ressourcen aus dem Archiv
+    """
+    if __ARCHIV is None or resPath not in EDITIERBAR:
+        return None
+    return pathlib.Path(__ARCHIV.filename).parent / resPath
+
+
+def _nichtGefunden(resPath, ort):
+    logging.error("Ressource '{}' wurde nicht gefunden (gesucht in '{}')".format(resPath, ort))
+    return FileNotFoundError("Ressource '{}' wurde nicht gefunden".format(resPath))
+
+
+def read(resPath) -> bytes:
+    """
+        :return: der Inhalt der Ressource; editierbare Ressourcen jeweils frisch gelesen
+        :raise FileNotFoundError: falls es die Ressource nicht gibt
+    """
+    inhalt = __inhalte.get(resPath)
+    if inhalt is not None:
+        return inhalt
+
+    with __lock:
+        _sucheWurzel()
+        lose = _loseDatei(resPath)
+        if __ARCHIV is not None and lose is None:
+            try:
+                inhalt = __ARCHIV.read(resPath)
+            except KeyError:
+                raise _nichtGefunden(resPath, __ARCHIV.filename) from None
+        else:
+            fullPath = lose or __RESOURCES_ROOT / resPath
+            try:
+                inhalt = fullPath.read_bytes()
+            except FileNotFoundError:
+                raise _nichtGefunden(resPath, fullPath.resolve()) from None
+        if resPath not in EDITIERBAR:
+            __inhalte[resPath] = inhalt
+    return inhalt
+
+
+def exists(resPath) -> bool:
+    with __lock:
+        _sucheWurzel()
+        lose = _loseDatei(resPath)
+        if __ARCHIV is not None and lose is None:
+            return resPath in __ARCHIV.NameToInfo
+        return (lose or __RESOURCES_ROOT / resPath).is_file()
 
 
 def path(resPath):
-    global __RESOURCES_ROOT
-    if __RESOURCES_ROOT is None:
-        curr = pathlib.Path(__file__).parent
-        for depth in range(3):
-            __RESOURCES_ROOT = curr / "{}resources".format(depth * "../")
-            if __RESOURCES_ROOT.is_dir():
-                break
+    """
+        :return: ein Dateipfad zur Ressource; aus dem Archiv wird sie dazu einmalig
+                in ein temporäres Verzeichnis ausgepackt, editierbare Ressourcen liegen daneben
+    """
+    global __auszugVerzeichnis
+    fullPath = __pfade.get(resPath)
+    if fullPath is not None:
+        return fullPath
+
+    with __lock:
+        _sucheWurzel()
+        lose = _loseDatei(resPath)
+        if __ARCHIV is None or lose is not None:
+            fullPath = (lose or __RESOURCES_ROOT / resPath).resolve()
+            if not fullPath.exists():
+                _nichtGefunden(resPath, fullPath)
+                # nicht merken, die Datei kann noch angelegt werden
+                return str(fullPath)
         else:
-            raise AssertionError("Ressourcen konnten von '{}' aus nicht gefunden werden".format(curr))
-        
-    fullPath = (__RESOURCES_ROOT / resPath).resolve()
-    if not fullPath.exists():
-        logging.error("Ressource '{}' wurde nicht gefunden (gesucht in '{}')".format(resPath, fullPath))
+            if __auszugVerzeichnis is None:
+                __auszugVerzeichnis = tempfile.TemporaryDirectory(prefix="abakus-")
+            if resPath not in __ARCHIV.NameToInfo:
+                _nichtGefunden(resPath, __ARCHIV.filename)
+                return str(pathlib.Path(__auszugVerzeichnis.name) / resPath)
+            fullPath = pathlib.Path(__ARCHIV.extract(resPath, __auszugVerzeichnis.name))
+        __pfade[resPath] = str(fullPath)
     return str(fullPath)
 
 
-def load(resPath, loaderFunc):
-    with open(path(resPath), "r") as resF:
+def load(resPath, loaderFunc, encoding="utf-8"):
+    with io.TextIOWrapper(io.BytesIO(read(resPath)), encoding=encoding) as resF:
         return loaderFunc(resF)
 
 
+def packe(zielPfad, verzeichnis, *zusätze):
+    """
+        Packt alle Dateien des Verzeichnisses und die zusätzlichen Dateien in ein Archiv;
+        die editierbaren Ressourcen werden stattdessen neben das Archiv kopiert
+        :param zusätze: einzelne Dateien, die unter ihrem Dateinamen abgelegt werden
+    """
+    verzeichnis, zielPfad = pathlib.Path(verzeichnis), pathlib.Path(zielPfad)
+    with zipfile.ZipFile(str(zielPfad), "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for datei in sorted(verzeichnis.rglob("*")):
+            name = datei.relative_to(verzeichnis).as_posix()
+            if not datei.is_file():
+                continue
+            if name in EDITIERBAR:
+                shutil.copy2(str(datei), str(zielPfad.parent / name))
+            else:
+                zf.write(str(datei), name)
+        for datei in map(pathlib.Path, zusätze):
+            zf.write(str(datei), datei.name)
+
+
+def _verwende(ort=None):
+    """
+        Vergisst Ort und Inhalte und verwendet das gegebene Verzeichnis oder Archiv,
+        ohne Angabe wird neu gesucht; etwa für Tests
+    """
+    global __RESOURCES_ROOT, __ARCHIV, __auszugVerzeichnis
+    with __lock:
+        if __ARCHIV is not None:
+            __ARCHIV.close()
+        if __auszugVerzeichnis is not None:
+            __auszugVerzeichnis.cleanup()
+        __RESOURCES_ROOT = __ARCHIV = __auszugVerzeichnis = None
+        __inhalte.clear()
+        __pfade.clear()
+
+        if ort is not None:
+            ort = pathlib.Path(ort)
+            if ort.is_dir():
+                __RESOURCES_ROOT = ort
+            else:
+                __ARCHIV = zipfile.ZipFile(str(ort))
+
+
 if __name__ == '__main__':
-    pass
+    import sys
+
+    # Aufruf durch export.sh: resources.py ZIEL.zip [ZUSATZDATEI...]
+    packe(sys.argv[1], pathlib.Path(__file__).parent / "../../resources", *sys.argv[2:])
@@ -0,0 +1,225 @@
+from array import array
+from calendar import monthrange
+from datetime import date
+from decimal import Decimal
+from operator import mul
+from typing import Dict, Iterator, Sequence, Tuple, Union
+
+from abakus.model import GuS, Stelle, gusAusCodes
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Spaltenweise Ablage von Monatskosten: statt pro Monat ein MonatsKosten-Objekt
+halten wir je Merkmal ein kompaktes Array mit ganzen Zahlen.
+
+* Monate als Index Jahr * 12 + (Monat - 1)
+* Gruppe und Stufe als ihre Enum-Werte
+* Umfang in Hundertstel Prozent; ein genauerer Umfang wird abgelehnt
+* Kosten bei vollem Umfang und Sonderzahlung in Cent
+
+Die tatsächlichen Kosten ergeben sich exakt aus Vollkosten und Umfang,
+so wie in Stelle.anteilig.
+"""
+
+# die Array-Typen der Spalten in der Reihenfolge von KostenSpalten
+TYPCODES = ("l", "b", "b", "l", "q", "q")
+
+
+def monatsIndex(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def stichtagAusIndex(idx: int) -> date:
+    year, month0 = divmod(idx, 12)
+    return date(year, month0 + 1, monthrange(year, month0 + 1)[1])
+
+
+def _cent(betrag: Decimal) -> int:
+    """
+        :raise ValueError: falls der Betrag nicht in ganzen Cent (bzw. Hundertstel Prozent) aufgeht;
+                gerundet wird nicht, sonst wichen die Ergebnisse von Summierer.calc ab
+    """
+    cent = betrag.scaleb(2)
+    if cent != cent.to_integral_value():
+        raise ValueError("{} hat mehr als zwei Nachkommastellen".format(betrag))
+    return int(cent)
+
+
+def _dezimal(wert: int, stellen: int) -> Decimal:
+    """
+        Erzeugt wert * 10^-stellen, wobei überflüssige Nullen bis auf
+        Cent-Genauigkeit gekürzt werden - wie bei der Decimal-Division
+    """
+    while stellen > 2 and wert % 10 == 0:
+        wert //= 10
+        stellen -= 1
+    return Decimal(wert).scaleb(-stellen)
+
+
+class KostenZeile:
+    """
+        Eine Sicht auf eine Zeile in den KostenSpalten; die Werte
+        werden erst beim Zugriff erzeugt
+    """
+    __slots__ = ("_spalten", "_idx")
+
+    def __init__(self, spalten: "KostenSpalten", idx: int):
+        self._spalten = spalten
+        self._idx = idx
+
+    @property
+    def stichtag(self) -> date:
+        return stichtagAusIndex(self._spalten.monate[self._idx])
+
+    @property
+    def gus(self) -> GuS:
+        return gusAusCodes(self._spalten.gruppen[self._idx], self._spalten.stufen[self._idx])
+
+    @property
+    def umfangProzent(self) -> Decimal:
+        return _dezimal(self._spalten.umfänge[self._idx], 2)
+
+    @property
+    def kosten(self) -> Decimal:
+        return _dezimal(self._spalten.vollkosten[self._idx] * self._spalten.umfänge[self._idx], 6)
+
+    @property
+    def sonderzahlung(self) -> Decimal:
+        return _dezimal(self._spalten.sonderzahlungen[self._idx], 2)
+
+    def __repr__(self):
+        return "KostenZeile({}, {}, {}, {}, {})".format(self.stichtag, self.gus, self.umfangProzent,
+                                                        self.kosten, self.sonderzahlung)
+
+
+class KostenSpalten:
+    """
+        Unveränderliche, spaltenweise Sicht auf Monatskosten.
+        Slicing teilt sich die zugrundeliegenden Puffer (keine Kopie).
+    """
+
+    def __init__(self, monate, gruppen, stufen, umfänge, vollkosten, sonderzahlungen):
+        self.monate = memoryview(monate)
+        self.gruppen = memoryview(gruppen)
+        self.stufen = memoryview(stufen)
+        self.umfänge = memoryview(umfänge)
+        self.vollkosten = memoryview(vollkosten)
+        self.sonderzahlungen = memoryview(sonderzahlungen)
+
+        assert len({len(c) for c in self._spalten()}) == 1, "Die Spalten haben unterschiedliche Längen"
+
+    @staticmethod
+    def aus(monatsKosten) -> "KostenSpalten":
+        """
+            :param monatsKosten: ein Iterable über MonatsKosten
+        """
+        bauer = KostenSpaltenBauer()
+        for mk in monatsKosten:
+            vollkosten = mk.kosten * 100 / mk.umfangProzent if mk.umfangProzent else Decimal(0)
+            bauer.anhängen(mk.stichtag, mk.stelle, vollkosten, mk.sonderzahlung)
+        return bauer.fertig()
+
+    @staticmethod
+    def ausBytes(*puffer: bytes) -> "KostenSpalten":
+        """
+            Das Gegenstück zu alsBytes
+        """
+        assert len(puffer) == len(TYPCODES), "Erwarte {} Spalten, nicht {}".format(len(TYPCODES), len(puffer))
+        spalten = []
+        for typcode, p in zip(TYPCODES, puffer):
+            a = array(typcode)
+            a.frombytes(p)
+            spalten.append(a)
+        return KostenSpalten(*spalten)
+
+    def alsBytes(self) -> Tuple[bytes, ...]:
+        """
+            :return: die Rohdaten der Spalten, z.B. zum Speichern
+        """
+        return tuple(c.tobytes() for c in self._spalten())
+
+    def __reduce__(self):
+        # memoryviews lassen sich nicht picklen, etwa für Ergebnisse aus einem ProcessPoolExecutor
+        return KostenSpalten.ausBytes, self.alsBytes()
+
+    def skaliert(self, umfangProzent: Decimal, sonderzahlungen: Sequence[Decimal]) -> "KostenSpalten":
+        """
+            :return: Spalten mit den gleichen Monaten, Stufen und Vollkosten wie diese (ohne Kopie),
+                    aber mit dem Argument-Umfang in jedem Monat und den Argument-Sonderzahlungen
+        """
+        assert len(sonderzahlungen) == len(self), "Erwarte {} Sonderzahlungen, nicht {}".format(
+            len(self), len(sonderzahlungen))
+        return KostenSpalten(self.monate, self.gruppen, self.stufen,
+                             array(TYPCODES[3], [_cent(umfangProzent)]) * len(self), self.vollkosten,
+                             array(TYPCODES[5], (_cent(s) for s in sonderzahlungen)))
+
+    def _spalten(self):
+        return (self.monate, self.gruppen, self.stufen, self.umfänge, self.vollkosten, self.sonderzahlungen)
+
+    def __len__(self):
+        return len(self.monate)
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            return KostenSpalten(*(c[idx] for c in self._spalten()))
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("Zeile {} außerhalb von 0..{}".format(idx, len(self) - 1))
+        return KostenZeile(self, idx)
+
+    def __iter__(self) -> Iterator[KostenZeile]:
+        return (KostenZeile(self, i) for i in range(len(self)))
+
+    def summe(self) -> Decimal:
+        """
+            :return: die Summe der Kosten ohne Sonderzahlungen
+        """
+        return _dezimal(sum(map(mul, self.vollkosten, self.umfänge)), 6)
+
+    def summeSonderzahlungen(self) -> Decimal:
+        return _dezimal(sum(self.sonderzahlungen), 2)
+
+    def nachJahr(self) -> Dict[int, Decimal]:
+        """
+            :return: pro Jahr die Summe aus Kosten und Sonderzahlungen
+        """
+        summen = {}
+        for m, v, u, s in zip(self.monate, self.vollkosten, self.umfänge, self.sonderzahlungen):
+            jahr = m // 12
+            summen[jahr] = summen.get(jahr, 0) + v * u + s * 10000
+        return {j: _dezimal(s, 6) for j, s in summen.items()}
+
+
+class KostenSpaltenBauer:
+    """
+        Sammelt Monatskosten zeilenweise in Arrays, bis sie mit "fertig"
+        zu KostenSpalten werden
+    """
+
+    def __init__(self):
+        self._monate, self._gruppen, self._stufen, \
+            self._umfänge, self._vollkosten, self._sonderzahlungen = (array(t) for t in TYPCODES)
+
+    def anhängen(self, stichtag: date, stelle: Stelle, vollkosten: Decimal, sonderzahlung: Decimal):
+        """
+            :param vollkosten: die Monatskosten bei 100% Umfang
+        """
+        self._monate.append(monatsIndex(stichtag))
+        self._gruppen.append(stelle.gus.gruppenCode)
+        self._stufen.append(stelle.gus.stufenCode)
+        self._umfänge.append(_cent(stelle.umfangProzent))
+        self._vollkosten.append(_cent(vollkosten))
+        self._sonderzahlungen.append(_cent(sonderzahlung))
+
+    def fertig(self) -> KostenSpalten:
+        return KostenSpalten(self._monate, self._gruppen, self._stufen,
+                             self._umfänge, self._vollkosten, self._sonderzahlungen)
+
+
+if __name__ == '__main__':
+    pass
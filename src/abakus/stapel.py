@@ -0,0 +1,261 @@
+import copy
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+
+from abakus.aggregation import Aggregation, Schlüssel, Summen, nachJahr, schlüsselKennung
+from abakus.laufend import Summierer
+from abakus.model import Entgeltgruppe, Stufe
+from abakus.portfolio import PortfolioSummierer, Position
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Lange Berechnungen ganzer Portfolios mit Wiederaufnahme.
+
+Die Positionen werden der Reihe nach in Blöcken berechnet, ohne sie alle
+auf einmal im Speicher zu halten; nach jedem Block wird ein Checkpoint mit
+der Zahl der fertigen Positionen, einer Prüfsumme über diese und den
+bisherigen Summen geschrieben. Ein erneuter Lauf mit denselben ÖTV-Daten
+und Schlüsseln, dessen erste Positionen zur Prüfsumme passen, setzt beim
+letzten Checkpoint fort.
+"""
+
+CHECKPOINT_VERSION = 2
+
+_ENUMS = {e.__name__: e for e in (Entgeltgruppe, Stufe)}
+
+
+def eingabePrüfsumme(positionen: Iterable[Position]) -> str:
+    """
+        :return: eine Prüfsumme über Kennungen, Anstellungen und Merkmale der Positionen in ihrer Reihenfolge
+    """
+    h = hashlib.sha256()
+    for p in positionen:
+        _prüfe(h, p)
+    return h.hexdigest()
+
+
+def _prüfe(h, p: Position):
+    h.update(json.dumps([p.kennung, p.anstellung.kennung(), sorted(p.merkmale.items())],
+                        ensure_ascii=False).encode("utf-8"))
+    h.update(b"\n")
+
+
+def _kodiere(wert):
+    if isinstance(wert, Enum):
+        return {"enum": type(wert).__name__, "name": wert.name}
+    if isinstance(wert, tuple):
+        return {"tupel": [_kodiere(w) for w in wert]}
+    assert wert is None or isinstance(wert, (int, str)), "Nicht speicherbarer Schlüsselwert {!r}".format(wert)
+    return wert
+
+
+def _dekodiere(wert):
+    if isinstance(wert, dict):
+        if "enum" in wert:
+            return _ENUMS[wert["enum"]][wert["name"]]
+        return tuple(_dekodiere(w) for w in wert["tupel"])
+    return wert
+
+
+@dataclass
+class Checkpoint:
+    # die eingabePrüfsumme der ersten fertig Positionen
+    eingabe: str
+    tarif: str
+    schlüssel: List[str]
+    fertig: int = 0
+    summen: Dict[Tuple, Summen] = field(default_factory=dict)
+    abgeschlossen: bool = False
+
+    def alsJson(self) -> dict:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "eingabe": self.eingabe,
+            "tarif": self.tarif,
+            "schlüssel": self.schlüssel,
+            "abgeschlossen": self.abgeschlossen,
+            "fertig": self.fertig,
+            "summen": [[_kodiere(key), str(s.kosten), str(s.sonderzahlungen), s.monate]
+                       for key, s in self.summen.items()],
+        }
+
+    @staticmethod
+    def ausJson(daten: dict) -> "Checkpoint":
+        if daten.get("version") != CHECKPOINT_VERSION:
+            raise ValueError("Unbekannte Checkpoint-Version {}".format(daten.get("version")))
+        return Checkpoint(daten["eingabe"], daten["tarif"], daten["schlüssel"], int(daten["fertig"]),
+                          {_dekodiere(key): Summen(Decimal(kosten), Decimal(sonder), monate)
+                           for key, kosten, sonder, monate in daten["summen"]},
+                          daten["abgeschlossen"])
+
+
+def leseCheckpoint(pfad) -> Optional[Checkpoint]:
+    """
+        Liest einen Checkpoint, etwa um die Zwischenergebnisse eines laufenden Stapels abzufragen
+        :return: None, falls es keinen lesbaren Checkpoint gibt
+    """
+    try:
+        with open(str(pfad), "r", encoding="utf-8") as datei:
+            return Checkpoint.ausJson(json.load(datei))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning("Checkpoint '{}' nicht lesbar: {}".format(pfad, e))
+        return None
+
+
+def schreibeCheckpoint(pfad, checkpoint: Checkpoint):
+    """
+        Schreibt den Checkpoint atomar: Leser sehen immer den alten oder den neuen Stand
+    """
+    pfad = pathlib.Path(pfad)
+    fd, tmpName = tempfile.mkstemp(dir=str(pfad.parent), prefix=pfad.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            json.dump(checkpoint.alsJson(), tmp, ensure_ascii=False)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmpName, str(pfad))
+    except BaseException:
+        os.unlink(tmpName)
+        raise
+
+
+def _eindeutig(positionen: Iterable[Position]) -> Iterator[Position]:
+    kennungen = set()
+    for p in positionen:
+        assert p.kennung not in kennungen, "Kennung {} ist nicht eindeutig".format(p.kennung)
+        kennungen.add(p.kennung)
+        yield p
+
+
+class StapelLauf:
+    """
+        Berechnet die Summen eines Portfolios blockweise mit Checkpoints.
+        Die Zwischenstände sind während des Laufs über zwischenstand() abfragbar,
+        auch aus anderen Threads.
+    """
+
+    def __init__(self, summierer: Summierer, checkpointPfad, *schlüssel: Schlüssel, blockGröße: int = 100):
+        """
+            :param schlüssel: die Schlüssel der Summen, standardmäßig nach Jahr; sie werden
+                    samt ihrer Parameter über schlüsselKennung im Checkpoint vermerkt
+        """
+        assert blockGröße > 0, "Ungültige Blockgröße {}".format(blockGröße)
+        self.summierer = summierer
+        self.checkpointPfad = pathlib.Path(checkpointPfad)
+        self.schlüssel = schlüssel or (nachJahr,)
+        self.schlüsselKennungen = [schlüsselKennung(s) for s in self.schlüssel]
+        self.blockGröße = blockGröße
+
+        self._lock = threading.Lock()
+        self._stand: Tuple[int, Optional[int], Dict[Tuple, Summen]] = (0, None, {})
+
+    def _start(self, positionen: Iterable[Position], tarif: str) -> Tuple[Checkpoint, Iterator[Position], Any]:
+        """
+            Überspringt die im letzten passenden Checkpoint fertigen Positionen
+            :return: den Checkpoint, die restlichen Positionen und die Prüfsumme über die übersprungenen
+            :raise ValueError: falls der Checkpoint nicht zu den ersten Positionen passt und
+                    diese nicht erneut gelesen werden können
+        """
+        neu = Checkpoint(eingabePrüfsumme(()), tarif, self.schlüsselKennungen)
+        vorher = leseCheckpoint(self.checkpointPfad)
+        if vorher is None:
+            return neu, _eindeutig(positionen), hashlib.sha256()
+        if (vorher.tarif, vorher.schlüssel) != (tarif, self.schlüsselKennungen):
+            logging.warning("Checkpoint '{}' passt nicht zu ÖTV-Daten oder Schlüsseln, beginne neu"
+                            .format(self.checkpointPfad))
+            return neu, _eindeutig(positionen), hashlib.sha256()
+
+        rest, h, gelesen = _eindeutig(positionen), hashlib.sha256(), 0
+        for position in itertools.islice(rest, vorher.fertig):
+            _prüfe(h, position)
+            gelesen += 1
+        if gelesen == vorher.fertig and h.hexdigest() == vorher.eingabe:
+            logging.info("Setze Lauf nach {} Positionen aus '{}' fort".format(vorher.fertig, self.checkpointPfad))
+            return vorher, rest, h
+
+        logging.warning("Checkpoint '{}' passt nicht zur Eingabe, beginne neu".format(self.checkpointPfad))
+        if iter(positionen) is positionen:
+            raise ValueError("Die Positionen lassen sich für einen neuen Lauf nicht erneut lesen")
+        return neu, _eindeutig(positionen), hashlib.sha256()
+
+    def lauf(self, positionen: Iterable[Position]) -> Dict[Tuple, Summen]:
+        """
+            Berechnet alle noch nicht fertigen Positionen; die Positionen werden nur einmal
+            durchlaufen, außer der Checkpoint passt nicht zu ihrem Anfang
+            :return: die Summen über alle Positionen
+            :raise AssertionError: falls Kennungen doppelt vorkommen
+        """
+        anzahl = len(positionen) if isinstance(positionen, Sized) else None
+
+        # die ÖTV-Daten bleiben für den ganzen Lauf dieselben, auch wenn sie zwischendurch ausgetauscht werden
+        summierer = copy.copy(self.summierer)
+        checkpoint, offen, h = self._start(positionen, summierer.ötv.prüfsumme())
+        self._merke(checkpoint, anzahl)
+
+        aggregation = Aggregation(*self.schlüssel)
+        aggregation.summen = checkpoint.summen
+        portfolio = PortfolioSummierer(summierer)
+
+        while True:
+            block = list(itertools.islice(offen, self.blockGröße))
+            if not block:
+                break
+            for position, (_total, spalten) in zip(block, portfolio.berechne(block).values()):
+                aggregation.add(spalten, position.merkmale)
+                _prüfe(h, position)
+            checkpoint.fertig += len(block)
+            checkpoint.eingabe = h.hexdigest()
+            checkpoint.abgeschlossen = checkpoint.fertig == anzahl
+            schreibeCheckpoint(self.checkpointPfad, checkpoint)
+            self._merke(checkpoint, anzahl)
+
+        if not checkpoint.abgeschlossen:
+            checkpoint.abgeschlossen = True
+            schreibeCheckpoint(self.checkpointPfad, checkpoint)
+            self._merke(checkpoint, checkpoint.fertig)
+        return checkpoint.summen
+
+    def _merke(self, checkpoint: Checkpoint, anzahl: Optional[int]):
+        summen = {key: Summen(s.kosten, s.sonderzahlungen, s.monate) for key, s in checkpoint.summen.items()}
+        with self._lock:
+            self._stand = checkpoint.fertig, anzahl, summen
+
+    def zwischenstand(self) -> Tuple[int, Optional[int], Dict[Tuple, Summen]]:
+        """
+            :return: die Zahl der fertigen und aller Positionen sowie die Summen der fertigen
+                    zum letzten Checkpoint; die Zahl aller ist None, solange sie nicht bekannt ist
+        """
+        with self._lock:
+            fertig, anzahl, summen = self._stand
+        return fertig, anzahl, {key: Summen(s.kosten, s.sonderzahlungen, s.monate) for key, s in summen.items()}
+
+
+if __name__ == '__main__':
+    import sys
+
+    from abakus import resources
+    from abakus.binärPositionen import PositionsDatei
+    from abakus.csvÖtv import ÖtvCsvParser
+
+    # Aufruf: stapel.py POSITIONEN.abkp CHECKPOINT.json, mit einer Positionsdatei aus binärPositionen.py;
+    # sie wird über mmap gelesen und nur blockweise in Positionen umgewandelt
+    logging.basicConfig(level=logging.INFO)
+    summierer = Summierer(resources.load("ötv.csv", ÖtvCsvParser().parseStand))
+    for (jahr,), summen in sorted(StapelLauf(summierer, sys.argv[2]).lauf(PositionsDatei(sys.argv[1])).items()):
+        print("{}: {}".format(jahr, summen.gesamt))
@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from abakus.laufend import Anstellung, Summierer
+from abakus.model import Entgeltgruppe, gusAusCodes
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Monte-Carlo-Szenarien für Tarifsteigerungen.
+
+Für Jahre nach dem letzten Jahr mit Gehaltsdaten rechnet der Summierer
+mit den Daten dieses letzten Jahres weiter. Die Kosten solcher Jahre
+skalieren wir hier je Szenario mit den kumulierten, zufällig gezogenen
+jährlichen Steigerungen der jeweiligen Gruppe.
+
+Jede Anstellung wird dafür nur einmal berechnet; übrig bleiben pro
+(Gruppe, Jahre nach dem letzten Datenjahr) die Kosten als Gewicht. Alle
+Szenarien werden dann mit NumPy auf einmal gezogen und gewichtet: die
+Steigerungen als Matrix (Szenarien x Gruppen x Jahre), die Faktoren als
+kumuliertes Produkt über die Jahre.
+"""
+
+
+@dataclass(frozen=True)
+class Steigerung:
+    """
+        Eine normalverteilte jährliche Tarifsteigerung in Prozent
+    """
+    mittel: float
+    streuung: float = 0.
+
+    def ziehe(self, rng: np.random.Generator, form: Tuple[int, ...]) -> np.ndarray:
+        if not self.streuung:
+            return np.full(form, self.mittel)
+        return rng.normal(self.mittel, self.streuung, form)
+
+
+class SzenarioErgebnis:
+
+    def __init__(self, summen: Iterable[float]):
+        self.summen = sorted(summen)
+        assert self.summen, "Keine Szenarien berechnet"
+
+    def perzentil(self, p: float) -> float:
+        """
+            :param p: das Perzentil zwischen 0 und 100; zwischen den Szenarien wird linear interpoliert
+        """
+        assert 0 <= p <= 100, "Ungültiges Perzentil {}".format(p)
+        pos = (len(self.summen) - 1) * p / 100.
+        unten = int(pos)
+        oben = min(unten + 1, len(self.summen) - 1)
+        return self.summen[unten] + (self.summen[oben] - self.summen[unten]) * (pos - unten)
+
+    def perzentile(self, *ps: float) -> Dict[float, float]:
+        return {p: self.perzentil(p) for p in ps}
+
+    def mittel(self) -> float:
+        return sum(self.summen) / len(self.summen)
+
+
+class SzenarioRechner:
+
+    def __init__(self, summierer: Summierer, steigerungen: Mapping[Entgeltgruppe, Steigerung],
+                 anzahl: int = 1000, seed: Optional[int] = None):
+        """
+            :param steigerungen: die Verteilung der jährlichen Steigerung je Gruppe;
+                    für fehlende Gruppen wird keine Steigerung angenommen
+            :param anzahl: die Zahl der gezogenen Szenarien
+            :param seed: für reproduzierbare Ergebnisse
+        """
+        self.summierer = summierer
+        self.steigerungen = steigerungen
+        self.anzahl = anzahl
+        self.seed = seed
+
+    def gewichte(self, anstellungen: Iterable[Anstellung]) -> Tuple[float, Dict[Tuple[Entgeltgruppe, int], float]]:
+        """
+            :return: ein Paar aus den festen Kosten (Jahre mit Gehaltsdaten) und den Kosten
+                    je (Gruppe, Jahre nach dem letzten Datenjahr)
+        """
+        fix, gruppenCodes, matrix = self._gewichtsMatrix(anstellungen)
+        return fix, {(gusAusCodes(g, 1).gruppe, a + 1): float(matrix[i, a])
+                     for i, g in enumerate(gruppenCodes) for a in np.flatnonzero(matrix[i])}
+
+    def _gewichtsMatrix(self, anstellungen: Iterable[Anstellung]) -> Tuple[float, list, np.ndarray]:
+        """
+            :return: die festen Kosten, die Codes der Gruppen mit späteren Jahren und die Kosten
+                    als Matrix (Gruppen x Jahre nach dem letzten Datenjahr, ab 1)
+        """
+        ötv = self.summierer.ötv
+        # das letzte Datenjahr je Gruppencode; auf ÖtvKosten ist jede Abfrage ein Durchlauf der Tabelle
+        letzteJahre = np.zeros(256, dtype=np.int64)
+        bekannt = set()
+
+        fix, codes, abstände, kosten = 0., [], [], []
+        for anstellung in anstellungen:
+            _total, spalten = self.summierer._calcSpalten(ötv, anstellung)
+            gruppen = np.asarray(spalten.gruppen, dtype=np.int64)
+            for g in set(spalten.gruppen) - bekannt:
+                letzteJahre[g] = ötv.letztesJahr(gusAusCodes(g, 1).gruppe)
+                bekannt.add(g)
+
+            abstand = np.asarray(spalten.monate, dtype=np.int64) // 12 - letzteJahre[gruppen]
+            monatsKosten = np.asarray(spalten.vollkosten, dtype=np.float64) * np.asarray(spalten.umfänge) / 1e6 \
+                + np.asarray(spalten.sonderzahlungen, dtype=np.float64) / 100.
+            später = abstand > 0
+            fix += float(monatsKosten[~später].sum())
+            codes.append(gruppen[später])
+            abstände.append(abstand[später])
+            kosten.append(monatsKosten[später])
+
+        if not codes or not sum(len(c) for c in codes):
+            return fix, [], np.zeros((0, 0))
+        codes, abstände, kosten = np.concatenate(codes), np.concatenate(abstände), np.concatenate(kosten)
+        gruppenCodes, zeilen = np.unique(codes, return_inverse=True)
+        matrix = np.zeros((len(gruppenCodes), int(abstände.max())))
+        np.add.at(matrix, (zeilen, abstände - 1), kosten)
+        return fix, [int(g) for g in gruppenCodes], matrix
+
+    def simuliere(self, anstellungen: Iterable[Anstellung]) -> SzenarioErgebnis:
+        """
+            Berechnet die Gesamtkosten der Anstellungen für alle Szenarien
+        """
+        fix, gruppenCodes, matrix = self._gewichtsMatrix(anstellungen)
+        if not gruppenCodes:
+            return SzenarioErgebnis([fix] * self.anzahl)
+
+        rng = np.random.default_rng(self.seed)
+        jahre = matrix.shape[1]
+        steigerungen = np.zeros((self.anzahl, len(gruppenCodes), jahre))
+        for i, g in enumerate(gruppenCodes):
+            steigerung = self.steigerungen.get(gusAusCodes(g, 1).gruppe)
+            if steigerung:
+                steigerungen[:, i, :] = steigerung.ziehe(rng, (self.anzahl, jahre))
+
+        faktoren = np.cumprod(1. + steigerungen / 100., axis=2)
+        return SzenarioErgebnis((fix + np.einsum("sgj,gj->s", faktoren, matrix)).tolist())
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,131 @@
+import itertools
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from abakus.laufend import Anstellung, Summierer
+from abakus.model import Entgeltgruppe
+from abakus.portfolio import Position
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Vergleich der Kosten von Positionen unter zwei Ständen der ÖTV-Daten.
+
+Jede Anstellung wird einmal durchlaufen und jeder Monat unter beiden Ständen
+zugleich bewertet; Jahre, deren benötigte Gehaltsdaten in beiden Ständen
+gleich sind, werden übersprungen, ohne Kosten zu berechnen. Fehlt einem
+Stand eine im Jahr benötigte Gruppe ganz, gilt die Position in diesem Jahr
+als hinzugefügt oder entfernt.
+"""
+
+VERGLEICH_KOPF = ("Position", "Jahr", "Alt", "Neu", "Differenz", "Änderung")
+
+HINZUGEFÜGT, ENTFERNT, GEÄNDERT = "hinzugefügt", "entfernt", "geändert"
+
+
+@dataclass(frozen=True)
+class JahresVergleich:
+    jahr: int
+    # None, falls dem Stand Daten zu einer im Jahr benötigten Gruppe fehlen
+    alt: Optional[Decimal]
+    neu: Optional[Decimal]
+
+    @property
+    def differenz(self) -> Optional[Decimal]:
+        return None if self.alt is None or self.neu is None else self.neu - self.alt
+
+    @property
+    def änderung(self) -> str:
+        if self.alt is None:
+            return HINZUGEFÜGT
+        return ENTFERNT if self.neu is None else GEÄNDERT
+
+
+class TarifVergleich:
+
+    def __init__(self, alt, neu):
+        """
+            :param alt, neu: die beiden Stände der ÖTV-Daten
+        """
+        self.alt = alt
+        self.neu = neu
+        self._gleich: Dict[Tuple[int, Entgeltgruppe], bool] = {}
+
+    def gleich(self, jahr: int, gruppe: Entgeltgruppe) -> bool:
+        """
+            :return: ob beide Stände für Jahr und Gruppe dieselben Kosten ergeben
+        """
+        key = (jahr, gruppe)
+        gleich = self._gleich.get(key)
+        if gleich is None:
+            gleich = self._gleich[key] = self.alt.zuschlag == self.neu.zuschlag and \
+                self.alt.gehälterOderNone(jahr, gruppe) == self.neu.gehälterOderNone(jahr, gruppe)
+        return gleich
+
+    @staticmethod
+    def _gruppen(jahr: int, monate, anstellung: Anstellung) -> Set[Entgeltgruppe]:
+        """
+            :return: die Gruppen, deren Daten die Monate des Jahres samt Sonderzahlung benötigen
+        """
+        gruppen = {stelle.gus.gruppe for _stichtag, stelle in monate}
+        if any(stichtag.month == 11 for stichtag, _stelle in monate) and anstellung.bis >= date(jahr, 12, 1):
+            gruppen.update(base.gus.gruppe for base in anstellung.findBaseStellen(jahr))
+        return gruppen
+
+    @staticmethod
+    def _jahresKosten(ötv, jahr: int, monate, anstellung: Anstellung, gruppen) -> Optional[Decimal]:
+        """
+            :return: die Kosten der Monate mit Sonderzahlung; None, falls Daten zu einer der Gruppen fehlen
+        """
+        if any(ötv.gehälterOderNone(jahr, gruppe) is None for gruppe in gruppen):
+            return None
+        summe = Decimal(0)
+        for stichtag, stelle in monate:
+            summe += ötv.monatsGesamt(jahr, stelle)
+            if stichtag.month == 11:
+                summe += Summierer._sonderzahlung(ötv, stichtag, anstellung) or Decimal(0)
+        return summe
+
+    def vergleiche(self, anstellung: Anstellung) -> List[JahresVergleich]:
+        """
+            Durchläuft die Anstellung einmal, jahresweise; ein Jahr wird nur bewertet,
+            wenn sich die Daten zu mindestens einer darin benötigten Gruppe unterscheiden
+
+            :return: die Jahreskosten (mit Sonderzahlung) unter beiden Ständen für diese Jahre;
+                    None auf der Seite, deren Stand eine benötigte Gruppe nicht kennt
+        """
+        ergebnis = []
+        for jahr, monate in itertools.groupby(anstellung, key=lambda m: m[0].year):
+            monate = list(monate)
+            gruppen = self._gruppen(jahr, monate, anstellung)
+            if all(self.gleich(jahr, gruppe) for gruppe in gruppen):
+                continue
+            ergebnis.append(JahresVergleich(jahr, self._jahresKosten(self.alt, jahr, monate, anstellung, gruppen),
+                                            self._jahresKosten(self.neu, jahr, monate, anstellung, gruppen)))
+        return ergebnis
+
+    def vergleichePositionen(self, positionen: Iterable[Position]) -> Iterator[Tuple[str, JahresVergleich]]:
+        for position in positionen:
+            for jahresVergleich in self.vergleiche(position.anstellung):
+                yield position.kennung, jahresVergleich
+
+
+def vergleichsZeilen(vergleiche: Iterable[Tuple[str, JahresVergleich]], auchGleiche: bool = False) -> Iterator[tuple]:
+    """
+        :param auchGleiche: ob auch Jahre ohne Differenz ausgegeben werden, deren Daten sich
+                zwar unterscheiden, die Kosten der Position aber nicht
+        :return: Zeilen zu VERGLEICH_KOPF, etwa für abakus.export; hinzugefügte und entfernte
+                Jahre immer, mit leerer Seite und Differenz
+    """
+    for kennung, v in vergleiche:
+        if auchGleiche or v.differenz != 0:
+            yield kennung, v.jahr, v.alt, v.neu, v.differenz, v.änderung
+
+
+if __name__ == '__main__':
+    pass
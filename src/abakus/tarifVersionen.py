@@ -0,0 +1,109 @@
+from bisect import bisect_right
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from abakus.csvÖtv import ÖtvÄnderungen
+from abakus.laufend import Summierer
+from abakus.model import Entgeltgruppe, Gehälter, ÖtvKosten, ÖtvStand
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Versionierte ÖTV-Daten.
+
+Jede Version ist ein ÖtvStand und wird nur angehängt, nie geändert. Eine
+neue Version entsteht aus ihrer Vorgängerin und den geänderten oder
+entfernten (Jahr, Gruppe); alle übrigen Gehälter sind dieselben Objekte
+wie in der Vorgängerin. So lassen sich Korrekturen eintragen, ohne ein
+ganzes ÖtvKosten neu aufzubauen, und ältere Schätzungen mit dem damaligen
+Stand nachrechnen, ohne alte Dateien erneut zu lesen.
+"""
+
+Schlüssel = Tuple[int, Entgeltgruppe]
+
+
+class ÖtvVersionen:
+
+    def __init__(self, zuschlag: Optional[Decimal] = None):
+        """
+            :param zuschlag: der Arbeitgeberzuschlag aller Versionen; standardmäßig der von ÖtvKosten
+        """
+        self.zuschlag = ÖtvKosten().zuschlag if zuschlag is None else zuschlag
+        self._stände: List[ÖtvStand] = []
+        self._zeitpunkte: List[datetime] = []
+        self.bezeichnungen: List[str] = []
+
+    @staticmethod
+    def aus(ötv, bezeichnung: str = "", zeitpunkt: Optional[datetime] = None) -> "ÖtvVersionen":
+        """
+            :return: eine Versionierung mit den gegebenen ÖTV-Daten als erster Version
+        """
+        versionen = ÖtvVersionen(ötv.zuschlag)
+        versionen.neueVersion(dict(ötv.einträge()), bezeichnung=bezeichnung, zeitpunkt=zeitpunkt)
+        return versionen
+
+    def __len__(self):
+        return len(self._stände)
+
+    def neueVersion(self, gesetzt: Optional[Mapping[Schlüssel, Gehälter]] = None, entfernt: Iterable[Schlüssel] = (),
+                    bezeichnung: str = "", zeitpunkt: Optional[datetime] = None) -> int:
+        """
+            Hängt eine Version an, die aus der letzten durch Setzen und Entfernen entsteht;
+            gesetzte Gehälter dürfen vorhandene überschreiben
+
+            :param zeitpunkt: ab wann die Version gilt; standardmäßig jetzt, nicht vor der letzten
+            :return: die Nummer der neuen Version
+            :raise KeyError: falls ein zu entfernender Schlüssel fehlt
+        """
+        zeitpunkt = zeitpunkt or datetime.now()
+        assert not self._zeitpunkte or zeitpunkt >= self._zeitpunkte[-1], \
+            "Version von {} liegt vor der letzten von {}".format(zeitpunkt, self._zeitpunkte[-1])
+
+        gehälter = dict(self._stände[-1].einträge()) if self._stände else {}
+        for key in entfernt:
+            del gehälter[key]
+        gehälter.update(gesetzt or {})
+
+        self._stände.append(ÖtvStand(gehälter, self.zuschlag))
+        self._zeitpunkte.append(zeitpunkt)
+        self.bezeichnungen.append(bezeichnung)
+        return len(self._stände) - 1
+
+    def übernehme(self, änderungen: ÖtvÄnderungen, bezeichnung: str = "",
+                  zeitpunkt: Optional[datetime] = None) -> int:
+        """
+            Hängt eine Version mit den Änderungen eines InkrementellerÖtvParser an
+            :return: die Nummer der neuen Version
+        """
+        return self.neueVersion(änderungen.gesetzt, änderungen.entfernt, bezeichnung, zeitpunkt)
+
+    def stand(self, version: int = -1) -> ÖtvStand:
+        """
+            :return: die ÖTV-Daten der Version; standardmäßig die neueste
+            :raise IndexError: falls es die Version nicht gibt
+        """
+        return self._stände[version]
+
+    def versionAm(self, zeitpunkt: datetime) -> int:
+        """
+            :return: die Nummer der Version, die zum Zeitpunkt galt
+            :raise IndexError: falls zum Zeitpunkt noch keine Version galt
+        """
+        version = bisect_right(self._zeitpunkte, zeitpunkt) - 1
+        if version < 0:
+            raise IndexError("Keine Version vor {}".format(zeitpunkt))
+        return version
+
+    def summierer(self, version: int = -1) -> Summierer:
+        """
+            :return: einen Summierer, der mit den Daten der Version rechnet
+        """
+        return Summierer(self.stand(version))
+
+
+if __name__ == '__main__':
+    pass
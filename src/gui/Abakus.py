@@ -1,21 +1,32 @@
+# vor allen anderen Importen, damit auch deren Dauer in den Startzeiten steht
+import time
+_START = time.perf_counter()
+
 import csv
 import datetime
 import io
+import logging
 import sys
 import itertools
 
 from PySide2 import QtWidgets as qw
-from PySide2.QtCore import QDate, QLocale, Qt, QSettings
-from PySide2.QtGui import QFontDatabase, QIcon, QKeySequence, QGuiApplication
+from PySide2.QtCore import QByteArray, QDate, QLocale, Qt, QSettings, QObject, Signal, Slot
+from PySide2.QtGui import QFontDatabase, QIcon, QKeySequence, QGuiApplication, QPixmap
 
-from gui.cssVars import varredCss2Css
+from gui.cssVars import cachedCss
 from gui.widgets import EnumCombo, percentSpinner, ensureBeforeAfter
+from gui.startzeit import Startzeiten
+from gui.kostenDiagramm import KostenDiagramm
 
-from abakus.laufend import Summierer, MonatsKosten, Anstellung
+from abakus.laufend import Anstellung
+from abakus.cache import ErgebnisCache, GecachterSummierer, standardVerzeichnis
 from abakus.model import Entgeltgruppe, Stufe, Stelle, GuS, dec
-from abakus.csvÖtv import ÖtvCsvParser, ÖtvFormatException
 from abakus import resources
 
+# erst nach der ersten Anzeige benötigt und daher verzögert importiert:
+# abakus.export (in Abakus.exportiere), gui.portfolioAnsicht (in Abakus.zeigePortfolio)
+# und abakus.nachladen samt abakus.csvÖtv (in ladeImHintergrund)
+
 __author__ = "Hans Bering"
 __copyright__ = "Copyright 2019, Hans Bering"
 __license__ = "GPL3"
@@ -235,15 +246,18 @@ class Details(qw.QWidget):
         while self.table.rowCount() > 0:
             self.table.removeRow(self.table.rowCount() - 1)
 
-    def addDetail(self, mk: MonatsKosten):
+    def addDetail(self, mk):
+        """
+            :param mk: MonatsKosten oder eine KostenZeile
+        """
         self.table.insertRow(self.table.rowCount())
         row = self.table.rowCount() - 1
         self.__setItem(row, 0, "{} {}".format(monthNames[mk.stichtag.month - 1], mk.stichtag.year),
                        align=Qt.AlignRight)
-        gus = mk.stelle.gus
+        gus = mk.gus
         self.__setItem(row, 1, "{}".format(gus.gruppe.name.replace("_", " ")))
         self.__setItem(row, 2, "{}".format(gus.stufe.value))
-        self.__setItem(row, 3, "{}".format(mk.stelle.umfangProzent))
+        self.__setItem(row, 3, "{}".format(mk.umfangProzent))
         self.__setItem(row, 4, "{0:n}".format(mk.kosten + mk.sonderzahlung),
                        align=Qt.AlignRight)
 
@@ -262,6 +276,13 @@ class Summe(qw.QWidget):
         self.berechnung = qw.QPushButton("Berechnung")
         zeile.addWidget(self.berechnung)
 
+        self.export = qw.QPushButton("Export…")
+        self.export.setEnabled(False)
+        zeile.addWidget(self.export)
+
+        self.portfolio = qw.QPushButton("Portfolio…")
+        zeile.addWidget(self.portfolio)
+
         zeile.addStretch(1)
         label = qw.QLabel("Summe:")
         label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
@@ -278,9 +299,13 @@ class Summe(qw.QWidget):
 
 class Abakus(qw.QWidget):
 
+    # nach dem ersten Zeichnen des Fensters, also wenn es tatsächlich zu sehen ist
+    angezeigt = Signal()
+
     def __init__(self, settings, summierer):
         super().__init__()
         self.setWindowTitle(ABAKUS)
+        self._angezeigt = False
 
         self._settings = settings
         self.summierer = summierer
@@ -296,9 +321,17 @@ class Abakus(qw.QWidget):
         layout.addWidget(self.summe)
 
         self.summe.berechnung.clicked.connect(self.berechne)
+        self.summe.berechnung.setEnabled(summierer.ötv is not None)
+        self.summe.export.clicked.connect(self.exportiere)
+        self.summe.portfolio.clicked.connect(self.zeigePortfolio)
+        self.summe.portfolio.setEnabled(summierer.ötv is not None)
+        self._anstellung = None
+        self._portfolio = None
 
         self.details = Details()
         layout.addWidget(self.details)
+        self.diagramm = KostenDiagramm()
+        layout.addWidget(self.diagramm)
         layout.addStretch(1)
         self.setLayout(layout)
 
@@ -311,7 +344,9 @@ class Abakus(qw.QWidget):
         inEvents = self.weiterOderNeu.inChangeEvents() + self.beschäftigung.inChangeEvents()
         outClears = [
             self.details.clear,
-            self.summe.total.clear
+            lambda: self.diagramm.neu(),
+            self.summe.total.clear,
+            lambda: self.summe.export.setEnabled(False)
             ]
 
         for i, o in itertools.product(inEvents, outClears):
@@ -328,11 +363,56 @@ class Abakus(qw.QWidget):
         stufenStart = qDate2date(self.weiterOderNeu.seit()) if self.weiterOderNeu.istWeiter() else vonDate
 
         anst = Anstellung(Stelle(GuS(gruppe, stufe), stufenStart, umfang), vonDate, bisDate)
-        summe, details = self.summierer.calc(anst)
+        summe, details = self.summierer.calcSpalten(anst)
         self.details.clear()
-        for monatsKosten in details:
-            self.details.addDetail(monatsKosten)
+        self.diagramm.neu()
+        for zeile in details:
+            self.details.addDetail(zeile)
+        self.diagramm.anhängen(details)
         self.summe.total.setText("{0:n} €".format(summe))
+        self._anstellung = anst
+        self.summe.export.setEnabled(True)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._angezeigt:
+            self._angezeigt = True
+            self.angezeigt.emit()
+
+    @Slot(object)
+    def ötvGeladen(self, ötv):
+        self.summe.berechnung.setEnabled(True)
+        self.summe.portfolio.setEnabled(True)
+        if self._portfolio is not None:
+            self._portfolio.ötvGeladen(ötv)
+
+    @Slot(object)
+    def ötvFehler(self, fehler):
+        """
+            Zeigt die Fehler einer ÖTV-Datei, die nicht übernommen wurde
+        """
+        qw.QMessageBox.warning(self, "{} ÖTV-Daten".format(ABAKUS),
+                               "Die ÖTV-Daten wurden nicht übernommen:\n\n{}".format("\n".join(fehler)))
+
+    def zeigePortfolio(self):
+        if self._portfolio is None:
+            from gui.portfolioAnsicht import PortfolioAnsicht
+            self._portfolio = PortfolioAnsicht(self.summierer, "{} Portfolio".format(ABAKUS))
+        self._portfolio.show()
+        self._portfolio.raise_()
+
+    def exportiere(self):
+        from abakus import export
+
+        pfad, _filter = qw.QFileDialog.getSaveFileName(self, "{} Export".format(ABAKUS), "",
+                                                       "CSV (*.csv);;JSON Lines (*.jsonl);;Excel (*.xlsx)")
+        if not pfad or self._anstellung is None:
+            return
+        try:
+            export.exportiere(pfad, export.MONATE_KOPF,
+                              export.monatsZeilen([(ABAKUS, self.summierer.iterCalc(self._anstellung))]))
+        except (OSError, ValueError) as e:
+            qw.QMessageBox.warning(self, "{} Export".format(ABAKUS), str(e))
 
     
 class AbakusSettings():
@@ -364,9 +444,7 @@ def checkLicenseAgreement(appSettings):
     licenseBox.setTextFormat(Qt.TextFormat.RichText)
     licenseBox.setStyleSheet("QLabel{min-width: 20em;}");
 
-    with open(resources.path("README.html"), 'rt', encoding="utf-8") as lFile:
-        licenseText = lFile.read()
-    licenseBox.setText(licenseText)
+    licenseBox.setText(resources.read("README.html").decode("utf-8"))
     licenseBox.addButton(qw.QMessageBox.No)
     yes = licenseBox.addButton(qw.QMessageBox.Yes)
     licenseBox.exec()
@@ -377,36 +455,98 @@ def checkLicenseAgreement(appSettings):
         sys.exit()
 
 
-def getÖtv():
-    try:
-        return resources.load("ötv.csv",
-                       ÖtvCsvParser().parse)
-    except ÖtvFormatException as ö:
-        for e in ö.errors:
-            print(e)
+class ÖtvSignal(QObject):
+    """
+        Überbringt neue ÖTV-Daten oder die Fehler einer ÖTV-Datei aus dem
+        Hintergrund-Thread in den GUI-Thread
+    """
+    geladen = Signal(object)
+    fehler = Signal(object)
+
+
+class StartProtokoll(QObject):
+    """
+        Markiert die erste Anzeige und das erste Laden der ÖTV-Daten in den Startzeiten;
+        als Slots eines QObject laufen beide im GUI-Thread, auch wenn das Signal
+        aus dem Hintergrund kommt
+    """
+
+    def __init__(self, startzeiten: Startzeiten):
+        super().__init__()
+        self.startzeiten = startzeiten
+        self._ötvGeladen = False
+
+    @Slot()
+    def ersteAnzeige(self):
+        self.startzeiten.markiere("erste Anzeige")
+
+    @Slot(object)
+    def ötvGeladen(self, _ötv):
+        if not self._ötvGeladen:
+            self._ötvGeladen = True
+            self.startzeiten.markiere("ÖTV-Daten geladen")
+            self.startzeiten.protokolliere()
+
+
+def ladeImHintergrund(rechner, signal):
+    """
+        Liest die ÖTV-Daten im Hintergrund und überwacht danach die Datei
+    """
+    from abakus.nachladen import ÖtvNachlader
+
+    nachlader = ÖtvNachlader(rechner)
+    nachlader.beiWechsel.append(signal.geladen.emit)
+    nachlader.beiFehler.append(signal.fehler.emit)
+    nachlader.start(sofortLaden=True)
+    return nachlader
 
 
 if __name__ == "__main__":
+    # u.a. für den Bericht der Startzeiten
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    startzeiten = Startzeiten(beginn=_START)
+    startzeiten.markiere("Importe")
 
-    # deal with resources early:
-    fontPath = resources.path("NotoSansDisplay-Regular.ttf")
-    iconPath = resources.path("icon.svg")
-    
-    styleSheet = resources.load("stylesheet.vars.css",
-                                lambda f:"\n".join(varredCss2Css(f.readlines())))
+    with startzeiten.phase("Stylesheet"):
+        # export.sh legt das fertige Stylesheet mit in das Ressourcen-Archiv
+        precompiled = resources.read("stylesheet.css").decode("utf-8") if resources.exists("stylesheet.css") else None
+        styleSheet = cachedCss(resources.read("stylesheet.vars.css").decode("utf-8"),
+                               standardVerzeichnis(), precompiled)
 
     settings = AbakusSettings()
-    rechner = Summierer(getÖtv())
+    rechner = GecachterSummierer(None, ErgebnisCache())
 
     QLocale.setDefault(QLocale(QLocale.German, QLocale.Germany))
-    app = qw.QApplication([])
-    QFontDatabase().addApplicationFont(fontPath)
-
-    app.setStyleSheet(styleSheet)
-    app.setWindowIcon(QIcon(iconPath))
+    with startzeiten.phase("QApplication"):
+        app = qw.QApplication([])
+        app.setStyleSheet(styleSheet)
+        icon = QPixmap()
+        icon.loadFromData(resources.read("icon.svg"), "SVG")
+        app.setWindowIcon(QIcon(icon))
+
+    # vor dem Fenster: wer nicht zustimmt, bekommt es gar nicht erst zu sehen
     checkLicenseAgreement(settings)
 
-    widget = Abakus(settings, rechner)
+    with startzeiten.phase("Fenster"):
+        widget = Abakus(settings, rechner)
+
+    protokoll = StartProtokoll(startzeiten)
+    ötvSignal = ÖtvSignal()
+    ötvSignal.geladen.connect(widget.ötvGeladen)
+    ötvSignal.geladen.connect(protokoll.ötvGeladen)
+    ötvSignal.fehler.connect(widget.ötvFehler)
+
+    def nachDerAnzeige():
+        global nachlader
+        with startzeiten.phase("Hintergrund gestartet"):
+            nachlader = ladeImHintergrund(rechner, ötvSignal)
+        with startzeiten.phase("Schrift"):
+            QFontDatabase.addApplicationFontFromData(QByteArray(resources.read("NotoSansDisplay-Regular.ttf")))
+        startzeiten.protokolliere()
+
+    widget.angezeigt.connect(protokoll.ersteAnzeige)
+    # erst nach dem Ende des ersten Zeichnens
+    widget.angezeigt.connect(nachDerAnzeige, Qt.QueuedConnection)
     widget.show()
 
     sys.exit(app.exec_())
@@ -1,5 +1,8 @@
+import hashlib
+import os
 import pathlib
 import re
+import tempfile
 
 __author__ = "Hans Bering"
 __copyright__ = "Copyright 2019, Hans Bering"
@@ -7,7 +10,7 @@ __license__ = "GPL3"
 __status__ = "Development"
 
 varDef = re.compile(r"(\S+)\s*=\s*(\S+)")
-varUsage = re.compile(r":\s*([\"\']{(\S+)\}[\"\'])\s*;\s*$")
+varUsage = re.compile(r"([\"\'])\{([^\s{}\"\']+)\}\1")
 
 startDefBlock = re.compile(r"/\*\*\s*{variables\}", flags=re.IGNORECASE)  # @UndefinedVariable
 
@@ -22,6 +25,9 @@ def varredCss2Css(varredCssIter):
            definition)
         2. a duplicate definition for an existing variable is found
         3. a variable expression is used for an undefined variable name
+
+        Any number of quoted variable expressions ('{name}' or "{name}") per line
+        are replaced in a single pass.
         
         :param varredCssIter: a sequence of varred css lines
         :return: a generator over css lines with variable replaced
@@ -49,23 +55,101 @@ def varredCss2Css(varredCssIter):
             inDefBlock = True
         else:
             # not in definition block
-            varOcc = varUsage.search(rawLine)
-            if varOcc:
-                varName = varOcc.group(2)
-                varVal = variables.get(varName, None)
+            def substitute(varOcc):
+                varVal = variables.get(varOcc.group(2), None)
                 if varVal is None:
-                    raise ValueError("Unknown variable '{}' in line {}: {}".format(varName, lNo + 1, line))
-                yield rawLine.replace(varOcc.group(1), varVal)
-                continue
+                    raise ValueError("Unknown variable '{}' in line {}: {}".format(varOcc.group(2), lNo + 1, line))
+                return varVal
+
+            yield varUsage.sub(substitute, rawLine)
+            continue
 
         yield rawLine
 
 
+# bump when the compilation changes, so cached results are not reused
+COMPILER_VERSION = "2"
+COMPILED_HEADER = "/* compiled from {} */\n"
+
+__compiled = {}
+
+
+def contentHash(varredCss: str) -> str:
+    return hashlib.sha256((COMPILER_VERSION + "\n" + varredCss).encode("utf-8")).hexdigest()
+
+
+def compileCss(varredCss: str) -> str:
+    """
+        :param varredCss: the complete varred css
+        :return: the final css, starting with a comment line with the content hash of the input
+    """
+    return COMPILED_HEADER.format(contentHash(varredCss)) + \
+        "".join(varredCss2Css(varredCss.splitlines(keepends=True)))
+
+
+def _readCompiled(cssPath: pathlib.Path):
+    try:
+        with cssPath.open("r", encoding="utf-8") as cssIn:
+            return cssIn.read()
+    except OSError:
+        return None
+
+
+def _writeAtomically(cssPath: pathlib.Path, css: str):
+    cssPath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmpName = tempfile.mkstemp(dir=str(cssPath.parent), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmpOut:
+            tmpOut.write(css)
+        os.replace(tmpName, str(cssPath))
+    except BaseException:
+        os.unlink(tmpName)
+        raise
+
+
+def cachedCss(varredCss: str, cacheDir=None, precompiled=None) -> str:
+    """
+        Compiles the varred css only if no compiled result for the same content
+        is found: in memory, as a precompiled file, or in the cache directory.
+        A fresh compilation is written to the cache directory, if one is given;
+        write failures only cost the cache.
+
+        :param precompiled: the content of a precompiled css, e.g. shipped with a build;
+               only used if it was compiled from the same varred css
+        :return: the final css
+    """
+    hashValue = contentHash(varredCss)
+    css = __compiled.get(hashValue)
+    if css is not None:
+        return css
+
+    header = COMPILED_HEADER.format(hashValue)
+    cachePath = pathlib.Path(cacheDir) / "stylesheet-{}.css".format(hashValue) if cacheDir is not None else None
+    if precompiled and precompiled.startswith(header):
+        css = precompiled
+    else:
+        css = _readCompiled(cachePath) if cachePath is not None else None
+        if css is None or not css.startswith(header):
+            css = compileCss(varredCss)
+            if cachePath is not None:
+                try:
+                    _writeAtomically(cachePath, css)
+                except OSError:
+                    pass
+
+    __compiled[hashValue] = css
+    return css
+
+
 if __name__ == '__main__':
+    import sys
 
+    # without arguments: print the compiled stylesheet from the resources;
+    # with a target path: write it there, e.g. to ship a precompiled stylesheet
     varsCssPath = (pathlib.Path(__file__).parent / "../../resources/stylesheet.vars.css").resolve()
-    print(varsCssPath)
-    with varsCssPath.open() as cssIn:
-        cssLines = cssIn.readlines()
-    for l in varredCss2Css(cssLines):
-        print(l)
+    with varsCssPath.open(encoding="utf-8") as cssIn:
+        compiled = compileCss(cssIn.read())
+    if len(sys.argv) > 1:
+        _writeAtomically(pathlib.Path(sys.argv[1]), compiled)
+    else:
+        print(compiled)
@@ -0,0 +1,142 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Tuple
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+"""
+Ausdünnen von Kostenreihen für die Anzeige, ohne PySide2.
+
+Eine Reihe hält pro Monat einen Wert und darüber eine Pyramide aus Minima
+und Maxima von Paaren, Vierergruppen usw. Damit kostet das Minimum und
+Maximum eines beliebigen Bereichs nur logarithmisch viele Schritte, und
+eine Ansicht mit wenigen hundert Pixeln Breite ist unabhängig von der Zahl
+der Punkte schnell berechnet. Neue Werte werden angehängt, ohne die
+Pyramide neu aufzubauen.
+"""
+
+Spalte = Tuple[int, float, float]
+
+
+class MinMaxPyramide:
+
+    def __init__(self):
+        # Stufe k hält Minimum und Maximum der Blöcke aus 2**k Werten
+        self._minima: List[array] = [array("d")]
+        self._maxima: List[array] = [array("d")]
+
+    def __len__(self):
+        return len(self._minima[0])
+
+    def __getitem__(self, idx: int) -> float:
+        return self._minima[0][idx]
+
+    def anhängen(self, wert: float):
+        lo = hi = wert
+        stufe = 0
+        while True:
+            if stufe == len(self._minima):
+                self._minima.append(array("d"))
+                self._maxima.append(array("d"))
+            minima, maxima = self._minima[stufe], self._maxima[stufe]
+            minima.append(lo)
+            maxima.append(hi)
+            if len(minima) % 2:
+                return
+            lo, hi = min(minima[-2], lo), max(maxima[-2], hi)
+            stufe += 1
+
+    def bereich(self, von: int, bis: int) -> Tuple[float, float]:
+        """
+            :return: Minimum und Maximum der Werte von einschließlich bis ausschließlich
+        """
+        assert 0 <= von < bis <= len(self), "Ungültiger Bereich [{}, {})".format(von, bis)
+        lo, hi = float("inf"), float("-inf")
+        stufe = 0
+        while von < bis:
+            minima, maxima = self._minima[stufe], self._maxima[stufe]
+            if von & 1:
+                lo, hi = min(lo, minima[von]), max(hi, maxima[von])
+                von += 1
+            if bis & 1:
+                bis -= 1
+                lo, hi = min(lo, minima[bis]), max(hi, maxima[bis])
+            von >>= 1
+            bis >>= 1
+            stufe += 1
+        return lo, hi
+
+
+class KostenReihe:
+    """
+        Monatliche Kosten (mit Sonderzahlungen) ab einem ersten Monat, dazu die Monate
+        mit Sonderzahlungen und mit einem Wechsel von Gruppe oder Stufe
+    """
+
+    def __init__(self):
+        self.werte = MinMaxPyramide()
+        self.erster = None
+        self.sonderzahlungen: List[int] = []
+        self.stufenWechsel: List[int] = []
+        self._letzteGuS = None
+
+    def __len__(self):
+        return len(self.werte)
+
+    def anhängen(self, zeilen: Iterable):
+        """
+            :param zeilen: MonatsKosten oder KostenZeilen, lückenlos im Anschluss an die bisherigen
+        """
+        for zeile in zeilen:
+            stichtag = zeile.stichtag
+            monat = stichtag.year * 12 + stichtag.month - 1
+            if self.erster is None:
+                self.erster = monat
+            idx = len(self.werte)
+            assert monat == self.erster + idx, "Monat {:%m.%Y} schließt nicht an".format(stichtag)
+
+            self.werte.anhängen(float(zeile.kosten + zeile.sonderzahlung))
+            if zeile.sonderzahlung:
+                self.sonderzahlungen.append(idx)
+            gus = zeile.gus
+            if self._letzteGuS is not None and gus != self._letzteGuS:
+                self.stufenWechsel.append(idx)
+            self._letzteGuS = gus
+
+    def monat(self, idx: int) -> Tuple[int, int]:
+        """
+            :return: Jahr und Monat zum Index
+        """
+        jahr, monat = divmod(self.erster + idx, 12)
+        return jahr, monat + 1
+
+    def markenIn(self, marken: List[int], von: int, bis: int) -> List[int]:
+        return marken[bisect_left(marken, von):bisect_left(marken, bis)]
+
+    def dezimiere(self, von: int, bis: int, breite: int) -> List[Spalte]:
+        """
+            :return: für den Bereich der Monate von einschließlich bis ausschließlich höchstens
+                    breite Spalten (erster Index, Minimum, Maximum); bei weniger Monaten als Spalten
+                    jeder Monat für sich
+        """
+        von, bis = max(0, von), min(bis, len(self))
+        if bis <= von or breite <= 0:
+            return []
+        anzahl = bis - von
+        if anzahl <= breite:
+            return [(i, self.werte[i], self.werte[i]) for i in range(von, bis)]
+
+        spalten = []
+        for p in range(breite):
+            a = von + p * anzahl // breite
+            b = von + (p + 1) * anzahl // breite
+            if b > a:
+                spalten.append((a,) + self.werte.bereich(a, b))
+        return spalten
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,135 @@
+from typing import Iterable
+
+from PySide2 import QtWidgets as qw
+from PySide2.QtCore import Qt, QPointF, QRectF
+from PySide2.QtGui import QPainter, QPen, QColor
+
+from gui.dezimierung import KostenReihe
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+
+class KostenDiagramm(qw.QWidget):
+    """
+        Die monatlichen Kosten als Kurve, mit Sonderzahlungen als Punkte und
+        Wechseln von Gruppe oder Stufe als senkrechte Linien. Gezeichnet wird
+        höchstens eine Spalte pro Pixel; Mausrad zoomt, Ziehen verschiebt.
+    """
+
+    RAND = 30
+
+    def __init__(self):
+        super().__init__()
+        self.setMinimumHeight(150)
+        self.reihe = KostenReihe()
+        # der sichtbare Bereich in Monaten; None für alles
+        self._von, self._bis = 0, None
+        self._ziehStart = None
+        self._cache = None
+
+    def neu(self, zeilen: Iterable = ()):
+        self.reihe = KostenReihe()
+        self._von, self._bis = 0, None
+        self.anhängen(zeilen)
+
+    def anhängen(self, zeilen: Iterable):
+        """
+            Hängt weitere Monate an und zeichnet neu; die Ausdünnung wird dabei fortgeschrieben
+        """
+        self.reihe.anhängen(zeilen)
+        self._cache = None
+        self.update()
+
+    def _bereich(self):
+        bis = len(self.reihe) if self._bis is None else self._bis
+        return self._von, max(bis, self._von + 1)
+
+    def _spalten(self, breite: int):
+        von, bis = self._bereich()
+        key = (von, bis, breite, len(self.reihe))
+        if self._cache is None or self._cache[0] != key:
+            self._cache = key, self.reihe.dezimiere(von, bis, breite)
+        return self._cache[1]
+
+    def paintEvent(self, _event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        fläche = QRectF(self.RAND, 5, self.width() - self.RAND - 5, self.height() - self.RAND)
+        farbe = self.palette().text().color()
+        painter.setPen(QPen(farbe.lighter(250)))
+        painter.drawRect(fläche)
+
+        spalten = self._spalten(max(1, int(fläche.width())))
+        if not spalten:
+            return
+
+        von, bis = self._bereich()
+        oben = max(hi for _i, _lo, hi in spalten)
+        unten = min(0., min(lo for _i, lo, _hi in spalten))
+        höhe = (oben - unten) or 1.
+
+        def x(idx):
+            return fläche.left() + (idx - von + .5) * fläche.width() / (bis - von)
+
+        def y(wert):
+            return fläche.bottom() - (wert - unten) * fläche.height() / höhe
+
+        painter.setPen(QPen(QColor(farbe), 0, Qt.DashLine))
+        for idx in self.reihe.markenIn(self.reihe.stufenWechsel, von, bis):
+            painter.drawLine(QPointF(x(idx), fläche.top()), QPointF(x(idx), fläche.bottom()))
+
+        painter.setPen(QPen(self.palette().highlight().color(), 1))
+        vorher = None
+        for idx, lo, hi in spalten:
+            if lo != hi:
+                painter.drawLine(QPointF(x(idx), y(lo)), QPointF(x(idx), y(hi)))
+            punkt = QPointF(x(idx), y(lo))
+            if vorher is not None:
+                painter.drawLine(vorher, punkt)
+            vorher = punkt
+
+        painter.setPen(QPen(QColor("#eb3b5a"), 4))
+        for idx in self.reihe.markenIn(self.reihe.sonderzahlungen, von, bis):
+            painter.drawPoint(QPointF(x(idx), y(self.reihe.werte[idx])))
+
+        painter.setPen(QPen(farbe))
+        for idx, ausrichtung in ((von, Qt.AlignLeft), (bis - 1, Qt.AlignRight)):
+            if idx < len(self.reihe):
+                painter.drawText(QRectF(fläche.left(), fläche.bottom(), fläche.width(), self.RAND),
+                                 ausrichtung | Qt.AlignVCenter, "{1:02d}.{0}".format(*self.reihe.monat(idx)))
+        painter.drawText(QRectF(0, fläche.top(), self.RAND - 2, 20), Qt.AlignRight, "{:.0f}".format(oben))
+
+    def wheelEvent(self, event):
+        von, bis = self._bereich()
+        anzahl = bis - von
+        faktor = .8 if event.angleDelta().y() > 0 else 1.25
+        neueAnzahl = max(12, min(len(self.reihe), int(anzahl * faktor)))
+        anteil = (event.position().x() - self.RAND) / max(1., self.width() - self.RAND - 5)
+        mitte = von + anteil * anzahl
+        self._setzeBereich(int(mitte - anteil * neueAnzahl), neueAnzahl)
+
+    def mousePressEvent(self, event):
+        self._ziehStart = event.pos().x(), self._bereich()[0]
+
+    def mouseMoveEvent(self, event):
+        if self._ziehStart is None:
+            return
+        startX, startVon = self._ziehStart
+        von, bis = self._bereich()
+        proPixel = (bis - von) / max(1., self.width() - self.RAND - 5)
+        self._setzeBereich(int(startVon - (event.pos().x() - startX) * proPixel), bis - von)
+
+    def mouseReleaseEvent(self, _event):
+        self._ziehStart = None
+
+    def _setzeBereich(self, von: int, anzahl: int):
+        von = max(0, min(von, len(self.reihe) - anzahl))
+        self._von, self._bis = von, von + anzahl
+        self.update()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,336 @@
+import copy
+import logging
+import queue
+import threading
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from PySide2 import QtWidgets as qw
+from PySide2.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt, Signal
+
+from abakus.aggregation import Summen
+from abakus.csvPositionen import PositionenCsvParser, PositionenFormatException, asDate, asUmfang, \
+    POSITIONEN_SPALTEN
+from abakus.laufend import Anstellung
+from abakus.model import Stelle
+from abakus.portfolio import InkrementellesPortfolio, Position
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+
+class PortfolioStand:
+    """
+        Was der Rechner nach einer Reihe von Änderungen an die Ansicht meldet:
+        die neuen Summen samt Sonderzahlungen der geänderten Positionen (None
+        für entfernte) und die Summen pro Jahr
+    """
+
+    def __init__(self, geändert: Dict[str, Optional[Decimal]], jahresSummen: Dict[int, Summen]):
+        self.geändert = geändert
+        self.jahresSummen = jahresSummen
+
+    @property
+    def total(self) -> Decimal:
+        return sum((s.gesamt for s in self.jahresSummen.values()), Decimal(0))
+
+
+class PortfolioRechner(QObject):
+    """
+        Führt alle Änderungen am Portfolio nacheinander in einem eigenen Thread aus.
+        Das Portfolio selbst wird nur dort angefasst; gemeldet wird, sobald keine
+        weiteren Aufträge anstehen, sodass schnelle Folgen von Änderungen gebündelt werden.
+    """
+    berechnet = Signal(object)
+
+    def __init__(self, summierer):
+        super().__init__()
+        # eigene Kopie: das Portfolio vergleicht alte und neue ÖTV-Daten selbst
+        self._portfolio = InkrementellesPortfolio(copy.copy(summierer))
+        self._aufträge = queue.Queue()
+        self._geändert = {}
+        self._thread = threading.Thread(target=self._lauf, name="PortfolioRechner", daemon=True)
+        self._thread.start()
+
+    # jeder Auftrag liefert die Kennungen der geänderten Positionen
+
+    def hinzufügen(self, *positionen: Position):
+        def auftrag(portfolio):
+            portfolio.hinzufügen(*positionen)
+            return [p.kennung for p in positionen]
+        self._aufträge.put(auftrag)
+
+    def entfernen(self, kennung: str):
+        def auftrag(portfolio):
+            portfolio.entfernen(kennung)
+            return [kennung]
+        self._aufträge.put(auftrag)
+
+    def setzeÖtv(self, ötv):
+        self._aufträge.put(lambda portfolio: portfolio.setzeÖtv(ötv))
+
+    def stop(self):
+        self._aufträge.put(None)
+        self._thread.join()
+
+    def _lauf(self):
+        while True:
+            auftrag = self._aufträge.get()
+            if auftrag is None:
+                return
+            try:
+                for kennung in auftrag(self._portfolio):
+                    ergebnis = self._portfolio.ergebnisse.get(kennung)
+                    # mit Sonderzahlungen wie die Summen pro Jahr
+                    self._geändert[kennung] = None if ergebnis is None \
+                        else ergebnis[1].summe() + ergebnis[1].summeSonderzahlungen()
+            except Exception:
+                logging.exception("Fehler bei der Berechnung des Portfolios")
+
+            if self._aufträge.empty():
+                jahresSummen = {key[0]: Summen(s.kosten, s.sonderzahlungen, s.monate)
+                                for key, s in self._portfolio.summen.summen.items()}
+                self.berechnet.emit(PortfolioStand(self._geändert, jahresSummen))
+                self._geändert = {}
+
+
+class PositionenModell(QAbstractTableModel):
+    """
+        Die Positionen als Tabelle; nur die sichtbaren Zeilen werden von der
+        Ansicht abgefragt. Das Ende kann bearbeitet werden, der Umfang nur bei
+        Anstellungen aus einem einzigen Abschnitt.
+    """
+    SPALTEN = POSITIONEN_SPALTEN + ("Kosten (€)",)
+    UMFANG, BIS, KOSTEN = 4, 6, 7
+
+    positionGeändert = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._positionen: List[Position] = []
+        self._zeilen: Dict[str, int] = {}
+        self._kosten: Dict[str, Decimal] = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._positionen)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(PositionenModell.SPALTEN)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return PositionenModell.SPALTEN[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and self._bearbeitbar(self._positionen[index.row()], index.column()):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    @staticmethod
+    def _bearbeitbar(position: Position, spalte: int) -> bool:
+        if spalte == PositionenModell.BIS:
+            return True
+        # welcher Abschnitt den neuen Umfang bekäme, ist nicht eindeutig
+        return spalte == PositionenModell.UMFANG and len(position.anstellung.abschnitte) == 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter) if index.column() >= PositionenModell.UMFANG \
+                else int(Qt.AlignCenter)
+        if role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+
+        position = self._positionen[index.row()]
+        anst = position.anstellung
+        spalte = index.column()
+        if spalte == 0:
+            return position.kennung
+        if spalte == 1:
+            return anst.stelle.gus.gruppe.name.replace("_", " ")
+        if spalte == 2:
+            return str(anst.stelle.gus.stufe.value)
+        if spalte == 3:
+            return anst.stelle.beginn.strftime("%d.%m.%Y")
+        if spalte == PositionenModell.UMFANG:
+            return "{:n}".format(anst.stelle.umfangProzent)
+        if spalte == 5:
+            return anst.von.strftime("%d.%m.%Y")
+        if spalte == PositionenModell.BIS:
+            return anst.bis.strftime("%d.%m.%Y")
+        kosten = self._kosten.get(position.kennung)
+        return "…" if kosten is None else "{:n}".format(kosten.quantize(Decimal(".01")))
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        position = self._positionen[index.row()]
+        if not self._bearbeitbar(position, index.column()):
+            return False
+        anst = position.anstellung
+        try:
+            if index.column() == PositionenModell.UMFANG:
+                stelle = anst.stelle
+                anst = Anstellung(Stelle(stelle.gus, stelle.beginn, asUmfang(value)), anst.von, anst.bis)
+            else:
+                # die weiteren Abschnitte bleiben; das Ende darf nicht vor dem letzten liegen
+                anst = Anstellung(anst.stelle, anst.von, asDate(value), anst.abschnitte[1:])
+        except (ValueError, AssertionError):
+            return False
+
+        neu = Position(position.kennung, anst, position.merkmale)
+        self.setzePosition(neu)
+        self.positionGeändert.emit(neu)
+        return True
+
+    def setzePosition(self, position: Position):
+        """
+            Nimmt die Position auf oder ersetzt die mit gleicher Kennung; die Kosten bleiben offen bis zur Berechnung
+        """
+        self._kosten.pop(position.kennung, None)
+        zeile = self._zeilen.get(position.kennung)
+        if zeile is None:
+            zeile = len(self._positionen)
+            self.beginInsertRows(QModelIndex(), zeile, zeile)
+            self._positionen.append(position)
+            self._zeilen[position.kennung] = zeile
+            self.endInsertRows()
+        else:
+            self._positionen[zeile] = position
+            self.dataChanged.emit(self.index(zeile, 0), self.index(zeile, len(PositionenModell.SPALTEN) - 1))
+
+    def setzePositionen(self, positionen: List[Position]):
+        """
+            Wie setzePosition für viele Positionen; neue werden in einem Schritt angefügt
+        """
+        neu = []
+        for position in positionen:
+            if position.kennung in self._zeilen:
+                self.setzePosition(position)
+            else:
+                neu.append(position)
+        if not neu:
+            return
+        start = len(self._positionen)
+        self.beginInsertRows(QModelIndex(), start, start + len(neu) - 1)
+        for zeile, position in enumerate(neu, start=start):
+            self._positionen.append(position)
+            self._zeilen[position.kennung] = zeile
+            self._kosten.pop(position.kennung, None)
+        self.endInsertRows()
+
+    def entferneZeile(self, zeile: int) -> str:
+        kennung = self._positionen[zeile].kennung
+        self.beginRemoveRows(QModelIndex(), zeile, zeile)
+        del self._positionen[zeile]
+        self._kosten.pop(kennung, None)
+        self._zeilen = {p.kennung: z for z, p in enumerate(self._positionen)}
+        self.endRemoveRows()
+        return kennung
+
+    def übernehme(self, stand: PortfolioStand):
+        """
+            Setzt die Kosten der geänderten Positionen; nur deren Zeilen werden neu gezeichnet
+        """
+        for kennung, kosten in stand.geändert.items():
+            zeile = self._zeilen.get(kennung)
+            if zeile is None or kosten is None:
+                continue
+            self._kosten[kennung] = kosten
+            zelle = self.index(zeile, PositionenModell.KOSTEN)
+            self.dataChanged.emit(zelle, zelle)
+
+
+class PortfolioAnsicht(qw.QWidget):
+
+    def __init__(self, summierer, titel="Portfolio"):
+        super().__init__()
+        self.setWindowTitle(titel)
+
+        layout = qw.QVBoxLayout()
+
+        knöpfe = qw.QHBoxLayout()
+        importKnopf = qw.QPushButton("Import…")
+        importKnopf.clicked.connect(self.importiere)
+        knöpfe.addWidget(importKnopf)
+        entfernenKnopf = qw.QPushButton("Entfernen")
+        entfernenKnopf.clicked.connect(self.entferneAuswahl)
+        knöpfe.addWidget(entfernenKnopf)
+        knöpfe.addStretch(1)
+        layout.addLayout(knöpfe)
+
+        self.modell = PositionenModell()
+        self.tabelle = qw.QTableView()
+        self.tabelle.setModel(self.modell)
+        self.tabelle.setSelectionBehavior(qw.QAbstractItemView.SelectRows)
+        vH = self.tabelle.verticalHeader()
+        vH.setSectionResizeMode(qw.QHeaderView.Fixed)
+        vH.setDefaultSectionSize(vH.fontMetrics().height() + 4)
+        self.tabelle.horizontalHeader().setSectionResizeMode(qw.QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.tabelle, 1)
+
+        self.jahre = qw.QTableWidget()
+        self.jahre.setColumnCount(2)
+        self.jahre.setHorizontalHeaderLabels(["Jahr", "Summe (€)"])
+        self.jahre.setEditTriggers(qw.QTableWidget.NoEditTriggers)
+        self.jahre.horizontalHeader().setSectionResizeMode(qw.QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.jahre)
+
+        summe = qw.QHBoxLayout()
+        summe.addStretch(1)
+        summe.addWidget(qw.QLabel("Summe:"))
+        self.total = qw.QLineEdit()
+        self.total.setReadOnly(True)
+        self.total.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        summe.addWidget(self.total)
+        layout.addLayout(summe)
+        self.setLayout(layout)
+
+        self.rechner = PortfolioRechner(summierer)
+        self.rechner.berechnet.connect(self.übernehme)
+        self.modell.positionGeändert.connect(self.rechner.hinzufügen)
+
+    def importiere(self):
+        pfad, _filter = qw.QFileDialog.getOpenFileName(self, "Positionen importieren", "", "CSV (*.csv)")
+        if not pfad:
+            return
+        try:
+            with open(pfad, "r", newline="", encoding="utf-8") as csvFile:
+                positionen = PositionenCsvParser().parse(csvFile)
+        except PositionenFormatException as p:
+            qw.QMessageBox.warning(self, "Positionen importieren", "\n".join(p.errors[:20]))
+            return
+        except (OSError, UnicodeDecodeError) as e:
+            qw.QMessageBox.warning(self, "Positionen importieren", str(e))
+            return
+
+        self.modell.setzePositionen(positionen)
+        self.rechner.hinzufügen(*positionen)
+
+    def entferneAuswahl(self):
+        for zeile in sorted({i.row() for i in self.tabelle.selectionModel().selectedRows()}, reverse=True):
+            self.rechner.entfernen(self.modell.entferneZeile(zeile))
+
+    def übernehme(self, stand: PortfolioStand):
+        self.modell.übernehme(stand)
+
+        self.jahre.setRowCount(len(stand.jahresSummen))
+        for zeile, jahr in enumerate(sorted(stand.jahresSummen)):
+            for spalte, text in enumerate((str(jahr), "{:n}".format(stand.jahresSummen[jahr].gesamt
+                                                                    .quantize(Decimal(".01"))))):
+                item = qw.QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.jahre.setItem(zeile, spalte, item)
+        self.total.setText("{:n} €".format(stand.total.quantize(Decimal(".01"))))
+
+    def ötvGeladen(self, ötv):
+        self.rechner.setzeÖtv(ötv)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,53 @@
+import logging
+import time
+from contextlib import contextmanager
+
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+
+class Startzeiten:
+    """
+        Misst die Dauer einzelner Phasen beim Programmstart und
+        die Zeit bis zu markierten Zeitpunkten wie der ersten Anzeige
+    """
+
+    def __init__(self, uhr=time.perf_counter, beginn: float = None):
+        """
+            :param beginn: der Startzeitpunkt nach der Uhr, falls schon vor dem Anlegen
+                gemessen (etwa vor den Importen); sonst jetzt
+        """
+        self._uhr = uhr
+        self.beginn = uhr() if beginn is None else beginn
+        # Liste von (Name, Sekunden seit Beginn, Dauer oder None für Zeitpunkte)
+        self.einträge = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = self._uhr()
+        try:
+            yield
+        finally:
+            ende = self._uhr()
+            self.einträge.append((name, ende - self.beginn, ende - start))
+
+    def markiere(self, name: str):
+        self.einträge.append((name, self._uhr() - self.beginn, None))
+
+    def bericht(self) -> str:
+        zeilen = []
+        for name, seitBeginn, dauer in self.einträge:
+            if dauer is None:
+                zeilen.append("{:>8.1f} ms  {}".format(seitBeginn * 1000, name))
+            else:
+                zeilen.append("{:>8.1f} ms  {} ({:.1f} ms)".format(seitBeginn * 1000, name, dauer * 1000))
+        return "\n".join(zeilen)
+
+    def protokolliere(self):
+        logging.info("Startzeiten:\n%s", self.bericht())
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,73 @@
+import unittest
+from datetime import date
+
+from abakus.abhängigkeiten import AbhängigkeitsIndex
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from abakus.portfolio import InkrementellesPortfolio, Position
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class AbhängigkeitsIndexTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 50., 3000., 3500., 4000., 4400., 4800., 5000.)
+        self.alt = self.ötv.einfrieren()
+
+        self.index = AbhängigkeitsIndex()
+        self.index.registriere("a", Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1)), date(2019, 1, 1), date(2020, 6, 30)))
+        self.index.registriere("b", Anstellung(Stelle(AllGuS.E13_3, date(2019, 1, 1)), date(2020, 1, 1), date(2020, 3, 31)))
+    def testNutzer(self):
+        self.assertEqual({"a"}, set(self.index.nutzer(2019, Entgeltgruppe.E_10)))
+        self.assertEqual(6, len(self.index.nutzer(2020, Entgeltgruppe.E_10)["a"]))
+        self.assertEqual({}, self.index.nutzer(2019, Entgeltgruppe.E_13))
+
+    def testÄnderungMitRückgriff(self):
+        # neue Daten für 2020 ersetzen den Rückgriff auf 2019 - aber nur für E10
+        self.givenGehälter(2020, Entgeltgruppe.E_10, 75., 1., 2., 3., 4., 5., 6.)
+        self.assertEqual({(2020, Entgeltgruppe.E_10)}, self.index.geänderteSchlüssel(self.alt, self.ötv))
+        betroffen = self.index.betroffen(self.alt, self.ötv)
+        self.assertEqual({"a"}, set(betroffen))
+        self.assertEqual({date(2020, m, d) for m, d in ((1, 31), (2, 29), (3, 31), (4, 30), (5, 31), (6, 30))},
+                         betroffen["a"])
+
+    def testUnverändert(self):
+        self.assertEqual({}, self.index.betroffen(self.alt, self.ötv))
+        self.assertEqual({}, self.index.betroffen(self.ötv, self.alt))
+
+    def testEntferne(self):
+        self.index.entferne("a")
+        self.assertNotIn("a", self.index)
+        self.assertEqual({}, self.index.nutzer(2019, Entgeltgruppe.E_10))
+
+
+class InkrementellesPortfolioTest(TestMitGehältern):
+
+    def testSetzeÖtv(self):
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 50., 3000., 3500., 4000., 4400., 4800., 5000.)
+        alt = self.ötv.einfrieren()
+        portfolio = InkrementellesPortfolio(Summierer(alt))
+        pa = Position("a", Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1), dec(50)), date(2019, 1, 1), date(2020, 6, 30)))
+        pb = Position("b", Anstellung(Stelle(AllGuS.E13_3, date(2019, 1, 1)), date(2019, 1, 1), date(2020, 3, 31)))
+        portfolio.hinzufügen(pa, pb)
+        ergebnisB = portfolio.ergebnisse["b"]
+
+        self.givenGehälter(2020, Entgeltgruppe.E_10, 75., 1., 2., 3., 4., 5., 6.)
+        neu = self.ötv.einfrieren()
+        self.assertEqual(["a"], portfolio.setzeÖtv(neu))
+
+        self.assertIs(ergebnisB, portfolio.ergebnisse["b"])
+        neuA = Summierer(neu).calcSpalten(pa.anstellung)[1]
+        self.assertEqual(neuA.alsBytes(), portfolio.ergebnisse["a"][1].alsBytes())
+        self.assertEqual(neuA.summe() + neuA.summeSonderzahlungen() +
+                         ergebnisB[1].summe() + ergebnisB[1].summeSonderzahlungen(), portfolio.total())
+
+        portfolio.entfernen("a")
+        self.assertEqual(ergebnisB[1].summe() + ergebnisB[1].summeSonderzahlungen(), portfolio.total())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from datetime import date
+
+from abakus.aggregation import aggregiere, nachJahr, nachQuartal, nachGeschäftsjahr, nachGruppe, \
+    nachStufe, nachMerkmal, Rollup, schlüsselKennung
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, Stufe, dec
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class TestMitDetails(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        self.summierer = Summierer(self.ötv)
+        anst = Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), dec(50)), date(2019, 1, 1), date(2020, 3, 31))
+        self.total, self.details = self.summierer.calc(anst)
+        _total, self.spalten = self.summierer.calcSpalten(anst)
+
+
+class AggregationTest(TestMitDetails):
+
+    def testNachJahr(self):
+        summen = aggregiere(self.details, nachJahr)
+        self.assertEqual({(2019,), (2020,)}, set(summen))
+        self.assertEqual(12, summen[(2019,)].monate)
+        self.assertEqual(self.total, sum(s.kosten for s in summen.values()))
+        self.assertEqual(self.spalten.nachJahr()[2020], summen[(2020,)].gesamt)
+
+    def testSpaltenWieMonatsKosten(self):
+        schlüssel = (nachQuartal, nachGruppe, nachStufe)
+        self.assertEqual(aggregiere(self.details, *schlüssel), aggregiere(self.spalten, *schlüssel))
+
+    def testGeschäftsjahrUndMerkmal(self):
+        summen = aggregiere(self.details, nachGeschäftsjahr(7), nachMerkmal("kst"), merkmale={"kst": "4711"})
+        self.assertEqual({(2018, "4711"): 6, (2019, "4711"): 9}, {k: s.monate for k, s in summen.items()})
+
+    def testSchlüsselKennung(self):
+        self.assertEqual("abakus.aggregation.nachJahr", schlüsselKennung(nachJahr))
+        self.assertEqual(schlüsselKennung(nachMerkmal("kst")), schlüsselKennung(nachMerkmal("kst")))
+        self.assertNotEqual(schlüsselKennung(nachMerkmal("kst")), schlüsselKennung(nachMerkmal("projekt")))
+        self.assertNotEqual(schlüsselKennung(nachGeschäftsjahr(7)), schlüsselKennung(nachGeschäftsjahr(4)))
+        with self.assertRaises(AssertionError):
+            schlüsselKennung(lambda zeile, _merkmale: zeile.stichtag.month)
+
+    def testStufen(self):
+        summen = aggregiere(self.details, nachStufe)
+        self.assertEqual({(Stufe.drei,): 7, (Stufe.vier,): 8}, {k: s.monate for k, s in summen.items()})
+
+
+class RollupTest(TestMitDetails):
+
+    def testHinzufügenUndEntfernen(self):
+        rollup = Rollup(nachJahr)
+        rollup.hinzufügen("a", self.details)
+        rollup.hinzufügen("b", self.spalten)
+        self.assertEqual(2, len(rollup))
+        self.assertEqual(2 * self.total, sum(s.kosten for s in rollup.summen.values()))
+
+        rollup.entfernen("a")
+        self.assertEqual(aggregiere(self.spalten, nachJahr), rollup.summen)
+
+        rollup.hinzufügen("b", self.details[:3])
+        self.assertEqual({(2019,)}, set(rollup.summen))
+        self.assertEqual(3, rollup.summen[(2019,)].monate)
+
+        rollup.entfernen("b")
+        self.assertEqual({}, rollup.summen)
+        self.assertRaises(KeyError, rollup.entfernen, "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from datetime import date
 
-from abakus.model import Stelle, AllGuS
+from abakus.model import Stelle, AllGuS, dec
 from abakus.laufend import Anstellung
 
 
@@ -65,6 +65,47 @@ class AnstellungTest(unittest.TestCase):
         anst = Anstellung(s1, date(2019, 8, 1), date(2021, 3, 31))
         self.assertEqual([s1, s2, s2], anst.findBaseStellen(2020))
 
+    def testAbschnitte(self):
+
+        s1 = Stelle(AllGuS.E10_3, date(2019, 1, 1))
+        s2 = Stelle(AllGuS.E10_3, date(2019, 1, 1), dec(50.))
+        s3 = Stelle(AllGuS.E13_2, date(2019, 5, 15))
+        anst = Anstellung(s1, date(2019, 1, 1), date(2019, 6, 30),
+                          [(date(2019, 3, 1), s2), (date(2019, 5, 15), s3)])
+        expected = [(date(2019, 1, 31), s1), (date(2019, 2, 28), s1),
+                    (date(2019, 3, 31), s2), (date(2019, 4, 30), s2),
+                    (date(2019, 5, 31), s3), (date(2019, 6, 30), s3)]
+        self.assertEqual(expected, anst.monatsListe)
+
+        self.assertEqual(s1, anst.stelleAm(date(2019, 2, 28)))
+        self.assertEqual(s2, anst.stelleAm(date(2019, 3, 1)))
+        self.assertEqual(s3, anst.stelleAm(date(2019, 5, 2)))
+
+    def testAbschnittMitAufstieg(self):
+
+        s1 = Stelle(AllGuS.E10_1, date(2018, 8, 1))
+        s2 = Stelle(AllGuS.E10_1, date(2018, 8, 1), dec(50.))
+        anst = Anstellung(s1, date(2019, 6, 1), date(2019, 9, 30), [(date(2019, 7, 1), s2)])
+        self.assertEqual(Stelle(AllGuS.E10_2, date(2019, 8, 1), dec(50.)), anst.monatsListe[-1][1])
+        self.assertEqual(Stelle(AllGuS.E10_2, date(2019, 8, 1), dec(50.)), anst.stelleAm(date(2019, 9, 30)))
+
+    def testFalscheAbschnitte(self):
+
+        s = Stelle(AllGuS.E10_3, date(2019, 7, 1))
+        self.assertRaises(AssertionError, Anstellung, s, date(2019, 7, 1), date(2019, 9, 1), [(date(2019, 10, 1), s)])
+        self.assertRaises(AssertionError, Anstellung, s, date(2019, 7, 1), date(2019, 9, 1),
+                          [(date(2019, 8, 1), s), (date(2019, 7, 15), s)])
+        self.assertRaises(AssertionError, Anstellung, s, date(2019, 7, 1), date(2019, 9, 1),
+                          [(date(2019, 8, 1), Stelle(AllGuS.E10_3, date(2019, 8, 2)))])
+
+    def testFindBaseStellenÜberAbschnitte(self):
+
+        s1 = Stelle(AllGuS.E10_3, date(2019, 1, 1))
+        s2 = Stelle(AllGuS.E13_3, date(2019, 8, 1), dec(50.))
+        anst = Anstellung(s1, date(2019, 1, 1), date(2019, 12, 31), [(date(2019, 8, 1), s2)])
+        self.assertEqual([s1, s2, s2], anst.findBaseStellen(2019))
+        self.assertEqual(12, anst.monateAngestellt(2019))
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,163 @@
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+import asyncio
+import threading
+import unittest
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import date
+
+from abakus.asynchron import AsyncSummierer
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from abakus.portfolio import Position
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class ZählenderExecutor(ThreadPoolExecutor):
+    """
+        Ein Executor, der mitzählt, wie viele Aufgaben gerade laufen,
+        und jede Aufgabe auf Wunsch erst nach einer Freigabe beginnt
+    """
+
+    def __init__(self):
+        super().__init__(4)
+        self.lock = threading.Lock()
+        self.laufend = 0
+        self.höchstens = 0
+        self.anzahl = 0
+        self.freigabe = threading.Event()
+        self.freigabe.set()
+
+    def submit(self, fn, *args, **kwargs):
+        def gezählt():
+            with self.lock:
+                self.laufend += 1
+                self.anzahl += 1
+                self.höchstens = max(self.höchstens, self.laufend)
+            try:
+                self.freigabe.wait(5)
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.laufend -= 1
+
+        return super().submit(gezählt)
+
+
+class AsyncSummiererTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 77.66, 3228.23, 3502.94, 3763.34, 4025.67, 4524.79, 4660.53)
+        self.summierer = Summierer(self.ötv)
+        self.executor = ZählenderExecutor()
+
+        self.positionen = []
+        for i in range(20):
+            # verschiedene Zeiträume, damit die Positionen nicht in wenige Klassen fallen
+            stelle = Stelle(AllGuS.E10_2, date(2017, 9, 1), dec(50 + i))
+            anst = Anstellung(stelle, date(2019, 1 + i % 12, 1), date(2019, 12, 31))
+            self.positionen.append(Position("p{}".format(i), anst))
+
+    def tearDown(self):
+        self.executor.freigabe.set()
+        self.executor.shutdown()
+
+    def erwartet(self):
+        return {p.kennung: self.summierer.calcSpalten(p.anstellung)[0] for p in self.positionen}
+
+    def testCalc(self):
+        asyncSummierer = AsyncSummierer(self.summierer, self.executor)
+        anst = self.positionen[0].anstellung
+        total, spalten = asyncio.run(asyncSummierer.calc(anst))
+        self.assertEqual(self.summierer.calcSpalten(anst)[0], total)
+        self.assertEqual(len(list(anst)), len(spalten))
+
+    def testBerechne(self):
+        asyncSummierer = AsyncSummierer(self.summierer, self.executor, maxAusstehend=2, blockGröße=3)
+        ergebnisse = asyncio.run(asyncSummierer.berechne(self.positionen))
+        self.assertEqual([p.kennung for p in self.positionen], list(ergebnisse))
+        self.assertEqual(self.erwartet(), {k: total for k, (total, _spalten) in ergebnisse.items()})
+
+    def testProzesse(self):
+        summierer = Summierer(self.ötv.einfrieren())
+        # spawn statt fork, damit wirklich alles gepickelt wird
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+            ergebnisse = asyncio.run(AsyncSummierer(summierer, executor, blockGröße=6).berechne(self.positionen))
+        self.assertEqual(self.erwartet(), {k: total for k, (total, _spalten) in ergebnisse.items()})
+        for position in self.positionen:
+            erwartet = self.summierer.calcSpalten(position.anstellung)[1]
+            self.assertEqual(erwartet.alsBytes(), ergebnisse[position.kennung][1].alsBytes())
+
+    def testDoppelteKennungInAnderemBlock(self):
+        positionen = self.positionen[:3] + [Position("p0", self.positionen[5].anstellung)]
+        asyncSummierer = AsyncSummierer(self.summierer, self.executor, blockGröße=1)
+        with self.assertRaises(AssertionError):
+            asyncio.run(asyncSummierer.berechne(positionen))
+
+    def testAsynchroneEingabe(self):
+        async def positionen():
+            for position in self.positionen:
+                await asyncio.sleep(0)
+                yield position
+
+        asyncSummierer = AsyncSummierer(self.summierer, self.executor, blockGröße=7)
+        ergebnisse = asyncio.run(asyncSummierer.berechne(positionen()))
+        self.assertEqual(self.erwartet(), {k: total for k, (total, _spalten) in ergebnisse.items()})
+
+    def testGegendruck(self):
+        gelesen = []
+
+        def positionen():
+            for position in self.positionen:
+                gelesen.append(position)
+                yield position
+
+        async def lauf():
+            self.executor.freigabe.clear()
+            ströme = AsyncSummierer(self.summierer, self.executor, maxAusstehend=2, blockGröße=1).ströme(positionen())
+            erstes = asyncio.ensure_future(ströme.__anext__())
+            for _ in range(20):
+                await asyncio.sleep(0)
+            # zwei Blöcke sind unterwegs, der dritte wartet auf einen freien Platz
+            self.assertEqual(3, len(gelesen))
+            self.executor.freigabe.set()
+            self.assertEqual("p0", (await erstes)[0])
+            return [kennung async for kennung, _ergebnis in ströme]
+
+        self.assertEqual(["p{}".format(i) for i in range(1, 20)], asyncio.run(lauf()))
+        self.assertLessEqual(self.executor.höchstens, 2)
+
+    def testAbbruch(self):
+        gelesen = []
+
+        def positionen():
+            for position in self.positionen:
+                gelesen.append(position)
+                yield position
+
+        async def lauf():
+            ströme = AsyncSummierer(self.summierer, self.executor, maxAusstehend=2, blockGröße=1).ströme(positionen())
+            await ströme.__anext__()
+            await ströme.aclose()
+
+        asyncio.run(lauf())
+        self.assertLess(len(gelesen), len(self.positionen))
+        self.assertLess(self.executor.anzahl, len(self.positionen))
+
+    def testFehlerInDerEingabe(self):
+        def positionen():
+            yield self.positionen[0]
+            raise ValueError("kaputt")
+
+        asyncSummierer = AsyncSummierer(self.summierer, self.executor, blockGröße=1)
+        with self.assertRaises(ValueError):
+            asyncio.run(asyncSummierer.berechne(positionen()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import io
+import pickle
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from abakus import binärPositionen
+from abakus.binärPositionen import PositionsDatei, schreibe, konvertiere, SATZ
+from abakus.csvPositionen import PositionenFormatException
+from abakus.laufend import Anstellung
+from abakus.model import Stelle, AllGuS, dec
+from abakus.portfolio import Position
+
+
+def signatur(positionen):
+    return [(p.kennung, p.anstellung.kennung()) for p in positionen]
+
+
+class PositionsDateiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.pfad = Path(self.tmpDir.name) / "positionen.abkp"
+        self.positionen = [Position("P-{}".format(i),
+                                    Anstellung(Stelle(gus, date(2017, 9, 1 + i), dec(umfang)),
+                                               date(2019, 2, 1), date(2020, 12, 31)))
+                           for i, (gus, umfang) in enumerate([(AllGuS.E10_2, 100), (AllGuS.E13_4, 67.5),
+                                                              (AllGuS.E13_1, 50), (AllGuS.E10_6, 33),
+                                                              (AllGuS.E10_1, 80)])]
+        with self.pfad.open("wb") as datei:
+            schreibe(datei, self.positionen)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testLesen(self):
+        datei = PositionsDatei(self.pfad)
+        self.assertEqual(5, len(datei))
+        self.assertEqual(signatur(self.positionen), signatur(datei))
+        self.assertEqual(signatur(self.positionen[-1:]), signatur([datei[-1]]))
+        self.assertEqual((13, 4, 6750), list(datei.roh())[1][:3])
+
+    def testTabelle(self):
+        teil = PositionsDatei(self.pfad).ausschnitt(1, 4)
+        tabelle = teil.tabelle()
+        self.assertEqual([13, 13, 10], tabelle["gruppe"].tolist())
+        self.assertEqual([6750, 5000, 3300], tabelle["umfang"].tolist())
+        self.assertEqual([date(2017, 9, 2 + i).toordinal() for i in range(3)], tabelle["seit"].tolist())
+        self.assertEqual([r[-1] for r in teil.roh()], [k.ljust(32, b"\0") for k in tabelle["kennung"]])
+        self.assertFalse(tabelle.flags.writeable)
+        self.assertEqual(0, len(PositionsDatei(self.pfad).ausschnitt(2, 2).tabelle()))
+
+    def testTeile(self):
+        teile = PositionsDatei(self.pfad).teile(3)
+        self.assertEqual([2, 2, 1], [len(t) for t in teile])
+        self.assertEqual(signatur(self.positionen), signatur(p for t in teile for p in t))
+        self.assertEqual(signatur(self.positionen[3:4]), signatur(teile[1].ausschnitt(1, 5)))
+        self.assertIs(teile[0]._alle, teile[2]._alle)
+        self.assertEqual(5, len(PositionsDatei(self.pfad).teile(8)))
+
+    def testPickleBildetNeuAb(self):
+        teil = PositionsDatei(self.pfad).teile(2)[1]
+        kopie = pickle.loads(pickle.dumps(teil))
+        self.assertEqual(signatur(teil), signatur(kopie))
+
+    def testUngültigeDatei(self):
+        self.pfad.write_bytes(b"kaputt" * 10)
+        with self.assertRaises(ValueError):
+            PositionsDatei(self.pfad)
+
+    def testZuLangeKennung(self):
+        with self.assertRaises(ValueError):
+            schreibe(io.BytesIO(), [Position("x" * 33, self.positionen[0].anstellung)])
+
+    def testKonvertiere(self):
+        csvPfad = Path(self.tmpDir.name) / "positionen.csv"
+        csvPfad.write_text("Position;Gruppe;Stufe;Seit;Umfang;Von;Bis\n"
+                           "Ä-1;E13;2;;50;01.02.2019;31.12.2020\n", encoding="utf-8")
+        self.assertEqual(1, konvertiere(csvPfad, self.pfad))
+        datei = PositionsDatei(self.pfad)
+        self.assertEqual("Ä-1", datei[0].kennung)
+        self.assertEqual(Stelle(AllGuS.E13_2, date(2019, 2, 1), dec(50)), datei[0].anstellung.stelle)
+        self.assertEqual(16 + SATZ.size, self.pfad.stat().st_size)
+
+    def testKonvertiereStreamt(self):
+        csvPfad = Path(self.tmpDir.name) / "positionen.csv"
+        csvPfad.write_text("Position;Gruppe;Stufe;Seit;Umfang;Von;Bis\n"
+                           "P-1;E13;2;;50;01.02.2019;31.12.2020\n"
+                           "P-2;E99;2;;50;01.02.2019;31.12.2020\n", encoding="utf-8")
+        echt, geschrieben = binärPositionen.schreibe, []
+
+        def schreibeZeilenweise(ziel, positionen):
+            self.assertNotIsInstance(positionen, list)
+            return echt(ziel, (geschrieben.append(p.kennung) or p for p in positionen))
+
+        with mock.patch.object(binärPositionen, "schreibe", schreibeZeilenweise), \
+                self.assertRaises(PositionenFormatException):
+            konvertiere(csvPfad, self.pfad)
+        self.assertEqual(["P-1"], geschrieben)
+        self.assertFalse(self.pfad.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from datetime import date
+
+from abakus.cache import ErgebnisCache, GecachterSummierer
+from abakus.laufend import Anstellung, Summierer
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, ÖtvKosten, Gehälter, dec
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class ErgebnisCacheTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2001.11, 2501.13, 3001.17, 3407.33, 3801.19, 4001.23)
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cache = ErgebnisCache(self.tmpDir.name)
+        self.anst = Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), dec(50.)),
+                               date(2019, 1, 1), date(2020, 3, 31))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpDir.cleanup()
+        super().tearDown()
+
+    def testHoleNachLege(self):
+        self.assertIsNone(self.cache.hole(self.ötv, self.anst))
+
+        total, spalten = GecachterSummierer(self.ötv, self.cache).calcSpalten(self.anst)
+        gecacht = self.cache.hole(self.ötv, self.anst)
+
+        self.assertIsNotNone(gecacht)
+        self.assertEqual(total, gecacht[0])
+        self.assertEqual(spalten.alsBytes(), gecacht[1].alsBytes())
+        self.assertEqual(Summierer(self.ötv).calcSpalten(self.anst)[0], gecacht[0])
+
+    def testPersistent(self):
+        GecachterSummierer(self.ötv, self.cache).calcSpalten(self.anst)
+        self.cache.close()
+
+        self.cache = ErgebnisCache(self.tmpDir.name)
+        self.assertIsNotNone(self.cache.hole(self.ötv, self.anst))
+
+    def testAndereTarifeVerwerfenErgebnisse(self):
+        GecachterSummierer(self.ötv, self.cache).calcSpalten(self.anst)
+
+        anderes = ÖtvKosten()
+        anderes.mitGehalt(2019, Entgeltgruppe.E_10, Gehälter(dec(75.), {AllGuS.E10_3.stufe: dec(1.)}))
+        self.assertIsNone(self.cache.hole(anderes, self.anst))
+        self.assertEqual(0, self.cache.größe())
+
+    def testMehrereThreads(self):
+        summierer = GecachterSummierer(self.ötv, self.cache)
+        anstellungen = [Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), dec(10. + i)), date(2019, 1, 1),
+                                   date(2020, 3, 31)) for i in range(40)]
+        with ThreadPoolExecutor(8) as executor:
+            ergebnisse = list(executor.map(lambda a: summierer.calcSpalten(a)[0], anstellungen * 2))
+
+        einzeln = Summierer(self.ötv)
+        self.assertEqual([einzeln.calcSpalten(a)[0] for a in anstellungen * 2], ergebnisse)
+
+    def testVerdrängung(self):
+        summierer = GecachterSummierer(self.ötv, self.cache)
+        summierer.calcSpalten(self.anst)
+        self.cache.maxBytes = self.cache.größe()
+
+        zweite = Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), dec(60.)),
+                            date(2019, 1, 1), date(2020, 3, 31))
+        summierer.calcSpalten(zweite)
+
+        self.assertIsNone(self.cache.hole(self.ötv, self.anst))
+        self.assertIsNotNone(self.cache.hole(self.ötv, zweite))
+
+
+class PrüfsummeTest(unittest.TestCase):
+
+    def testReihenfolgeEgal(self):
+        g1 = Gehälter(dec(75.), {AllGuS.E10_3.stufe: dec(1.)})
+        g2 = Gehälter(dec(50.), {AllGuS.E13_3.stufe: dec(2.)})
+        a, b = ÖtvKosten(), ÖtvKosten()
+        a.mitGehalt(2019, Entgeltgruppe.E_10, g1)
+        a.mitGehalt(2019, Entgeltgruppe.E_13, g2)
+        b.mitGehalt(2019, Entgeltgruppe.E_13, g2)
+        b.mitGehalt(2019, Entgeltgruppe.E_10, g1)
+        self.assertEqual(a.prüfsumme(), b.prüfsumme())
+        self.assertNotEqual(ÖtvKosten().prüfsumme(), a.prüfsumme())
+
+    def testEinmalProStandBerechnet(self):
+        a = ÖtvKosten()
+        a.mitGehalt(2019, Entgeltgruppe.E_10, Gehälter(dec(75.), {AllGuS.E10_3.stufe: dec(1.)}))
+        vorher = a.prüfsumme()
+        with mock.patch("abakus.model._ÖtvDaten.prüfsumme") as berechne:
+            self.assertEqual(vorher, a.prüfsumme())
+            berechne.assert_not_called()
+
+        a.mitGehalt(2019, Entgeltgruppe.E_13, Gehälter(dec(50.), {AllGuS.E13_3.stufe: dec(2.)}))
+        self.assertNotEqual(vorher, a.prüfsumme())
+
+
+if __name__ == "__main__":
+    unittest.main()
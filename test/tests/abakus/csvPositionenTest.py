@@ -0,0 +1,61 @@
+import unittest
+from datetime import date
+
+from abakus.csvPositionen import PositionenCsvParser, PositionenFormatException
+from abakus.model import AllGuS, dec
+
+
+class PositionenCsvParserTest(unittest.TestCase):
+
+    kopf = "Position;Gruppe;Stufe;Seit;Umfang;Von;Bis;Projekt\n"
+
+    def testParse(self):
+        positionen = PositionenCsvParser().parse([
+            self.kopf,
+            "P-1;E13;2;01.09.2017;50;01.02.2019;31.12.2020;Abakus\n",
+            "# Kommentar\n",
+            "\n",
+            "P-2;E 10;1;;67,5;01.03.2019;30.06.2019;\n"])
+
+        self.assertEqual(["P-1", "P-2"], [p.kennung for p in positionen])
+        eins, zwei = (p.anstellung for p in positionen)
+        self.assertEqual((AllGuS.E13_2, date(2017, 9, 1), dec(50)),
+                         (eins.stelle.gus, eins.stelle.beginn, eins.stelle.umfangProzent))
+        self.assertEqual((date(2019, 2, 1), date(2020, 12, 31)), (eins.von, eins.bis))
+        self.assertEqual({"Projekt": "Abakus"}, positionen[0].merkmale)
+
+        self.assertEqual((AllGuS.E10_1, date(2019, 3, 1), dec(67.5)),
+                         (zwei.stelle.gus, zwei.stelle.beginn, zwei.stelle.umfangProzent))
+        self.assertEqual({"Projekt": ""}, positionen[1].merkmale)
+
+    def testUmfang(self):
+        positionen = PositionenCsvParser().parse([self.kopf, "P-0;E13;2;;0;01.02.2019;31.12.2019;\n"])
+        self.assertEqual(dec(0), positionen[0].anstellung.stelle.umfangProzent)
+
+        with self.assertRaises(PositionenFormatException) as fehler:
+            PositionenCsvParser().parse([self.kopf, "P-1;E13;2;;33,333;01.02.2019;31.12.2019;\n"])
+        self.assertEqual(["Zeile 2, Feld 5: Ungültige Prozentangabe für den Umfang '33,333'"], fehler.exception.errors)
+
+    def testFehler(self):
+        with self.assertRaises(PositionenFormatException) as fehler:
+            PositionenCsvParser().parse([
+                self.kopf,
+                "P-1;E11;2;01.09.2017;50;01.02.2019;31.12.2020;x\n",
+                "P-2;E13;2;01.09.2017;150;01.02.2019;31.12.2020;x\n",
+                "P-3;E13;2;01.09.2017;50;01.02.2019;x\n",
+                "P-4;E13;2;01.09.2017;50;01.02.2019;31.12.2018;x\n",
+                "P-5;E13;2;01.09.2017;50;01.02.2019;31.12.2020;x\n",
+                "P-5;E13;2;01.09.2017;50;01.02.2019;31.12.2020;x\n"])
+        erwartet = ["Zeile 2, Feld 2", "Zeile 3, Feld 5", "Zeile 4 hat 7 Felder", "Zeile 5: Ende",
+                    "Zeile 7: Position 'P-5' ist doppelt"]
+        self.assertEqual(len(erwartet), len(fehler.exception.errors))
+        for anfang, e in zip(erwartet, fehler.exception.errors):
+            self.assertTrue(e.startswith(anfang), e)
+
+    def testFalscherKopf(self):
+        with self.assertRaises(PositionenFormatException):
+            PositionenCsvParser().parse(["Gruppe;Stufe\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
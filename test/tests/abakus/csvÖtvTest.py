@@ -0,0 +1,73 @@
+import unittest
+
+from abakus import resources
+from abakus.csvÖtv import ÖtvCsvParser, InkrementellerÖtvParser, ÖtvFormatException
+from abakus.model import Entgeltgruppe
+
+ZEILE_2023 = "2023	E10	80,00	1,00	2,00	3,00	4,00	5,00	6,00"
+
+
+class InkrementellerÖtvParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.zeilen = resources.read("ötv.csv").decode("utf-8").splitlines()
+        self.parser = InkrementellerÖtvParser()
+        self.erste = self.parser.parse(self.zeilen)
+
+    def fehler(self, zeilen):
+        with self.assertRaises(ÖtvFormatException) as ctx:
+            ÖtvCsvParser().parse(zeilen)
+        return ctx.exception.errors
+
+    def testErsterLaufWieÖtvCsvParser(self):
+        ötv = ÖtvCsvParser().parse(self.zeilen)
+        self.assertEqual(dict(ötv.einträge()), self.erste.gesetzt)
+        self.assertEqual(ötv.einfrieren().prüfsumme(), self.parser.stand().prüfsumme())
+
+    def testUnverändert(self):
+        self.assertFalse(self.parser.parse(self.zeilen))
+        self.assertEqual(0, self.parser.neuGelesen)
+
+    def testNurGeänderteZeilenWerdenGelesen(self):
+        idx = next(i for i, z in enumerate(self.zeilen) if z.startswith("2019") and "E10" in z)
+        zeilen = list(self.zeilen)
+        zeilen[idx] = zeilen[idx].replace("2019", "2030", 1)
+        zeilen.insert(3, "# ein neuer Kommentar")
+        zeilen.append(ZEILE_2023)
+
+        änderungen = self.parser.parse(zeilen)
+        self.assertEqual(3, self.parser.neuGelesen)
+        self.assertEqual({(2030, Entgeltgruppe.E_10), (2023, Entgeltgruppe.E_10)}, set(änderungen.gesetzt))
+        self.assertEqual({(2019, Entgeltgruppe.E_10)}, änderungen.entfernt)
+        self.assertEqual(ÖtvCsvParser().parseStand(zeilen).prüfsumme(), self.parser.stand().prüfsumme())
+
+    def testÄnderungenAnwenden(self):
+        tabelle = dict(self.erste.gesetzt)
+        zeilen = [ZEILE_2023] + [z for z in self.zeilen if not z.startswith("2020")]
+        self.parser.parse(zeilen).anwenden(tabelle)
+        self.assertEqual(dict(ÖtvCsvParser().parse(zeilen).einträge()), tabelle)
+
+    def testFehlerWerdenNachKorrekturNichtMehrGemeldet(self):
+        kaputt = self.zeilen[:5] + ["2023	E10	kaputt"] + self.zeilen[5:]
+        with self.assertRaises(ÖtvFormatException) as ctx:
+            self.parser.parse(kaputt)
+        self.assertEqual(self.fehler(kaputt), ctx.exception.errors)
+
+        repariert = self.zeilen[:5] + [ZEILE_2023] + self.zeilen[5:]
+        self.assertEqual({(2023, Entgeltgruppe.E_10)}, self.parser.parse(repariert).schlüssel())
+        self.assertEqual(1, self.parser.neuGelesen)
+
+    def testDoppelteSchlüssel(self):
+        doppelt = self.zeilen + [ZEILE_2023, "", ZEILE_2023.replace("80,00", "70,00")]
+        with self.assertRaises(ÖtvFormatException) as ctx:
+            self.parser.parse(doppelt)
+        self.assertEqual(self.fehler(doppelt), ctx.exception.errors)
+
+        # die erste der doppelten Zeilen fällt weg; die Änderung zählt gegenüber dem letzten fehlerfreien Lauf
+        änderungen = self.parser.parse(self.zeilen + ["", ZEILE_2023.replace("80,00", "70,00")])
+        self.assertEqual(70, änderungen.gesetzt[(2023, Entgeltgruppe.E_10)].sonderZahlProzent)
+        self.assertFalse(änderungen.entfernt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from abakus import export
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class ExportTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000.33, 3400., 3800., 4000.)
+        self.summierer = Summierer(self.ötv)
+        self.anst = Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1), dec(50)), date(2019, 1, 1), date(2019, 12, 31))
+
+    def ergebnisse(self):
+        return [("a", self.summierer.iterCalc(self.anst)), ("b", self.summierer.calcSpalten(self.anst)[1])]
+
+    def testDeutscheZahl(self):
+        self.assertEqual("1.234,50", export.deutscheZahl(Decimal("1234.5")))
+        self.assertEqual("0,00", export.deutscheZahl(Decimal(0)))
+        self.assertEqual("-12.345.678,1234", export.deutscheZahl(Decimal("-12345678.1234")))
+
+    def testCsv(self):
+        out = io.StringIO()
+        self.assertEqual(24, export.schreibeCsv(out, export.MONATE_KOPF, export.monatsZeilen(self.ergebnisse()),
+                                                puffer=5))
+        zeilen = out.getvalue().splitlines()
+        self.assertEqual("Position;Monat;Gruppe;Stufe;Umfang;Kosten;Sonderzahlung", zeilen[0])
+        self.assertEqual("a;01.2019;E10;3;50,00;1.950,215;0,00", zeilen[1])
+        self.assertEqual(zeilen[1:13], [z.replace("b;", "a;", 1) for z in zeilen[13:]])
+
+    def testPositionenJsonLines(self):
+        out = io.StringIO()
+        export.schreibeJsonLines(out, export.POSITIONEN_KOPF, export.positionsZeilen(self.ergebnisse()))
+        objekte = [json.loads(z) for z in out.getvalue().splitlines()]
+
+        total, details = self.summierer.calc(self.anst)
+        sonderzahlungen = sum(mk.sonderzahlung for mk in details)
+        self.assertEqual(2, len(objekte))
+        self.assertEqual({"Position": "a", "Von": "2019-01", "Bis": "2019-12", "Monate": 12,
+                          "Kosten": str(total), "Sonderzahlungen": str(sonderzahlungen),
+                          "Gesamt": str(total + sonderzahlungen)}, objekte[0])
+        self.assertEqual(Decimal(objekte[0]["Gesamt"]), Decimal(objekte[1]["Gesamt"]))
+
+    def testXlsx(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pfad = os.path.join(tmp, "export.xlsx")
+            self.assertEqual(24, export.exportiere(pfad, export.MONATE_KOPF, export.monatsZeilen(self.ergebnisse())))
+            with zipfile.ZipFile(pfad) as zf:
+                self.assertIn("xl/workbook.xml", zf.namelist())
+                sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(25, sheet.count("<row "))
+        self.assertIn('<c r="F2"><v>1950.215</v></c>', sheet)
+
+    def testUnbekanntesFormat(self):
+        self.assertRaises(ValueError, export.exportiere, "x.doc", export.MONATE_KOPF, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from abakus.kostenIndex import KostenIndex, Treffer
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from abakus.portfolio import InkrementellesPortfolio, Position
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class KostenIndexTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 50., 3000., 3500., 4000., 4400., 4800., 5000.)
+        self.summierer = Summierer(self.ötv)
+        self.index = KostenIndex()
+        self.anstellungen = {
+            "a": Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1)), date(2019, 1, 1), date(2020, 12, 31)),
+            "b": Anstellung(Stelle(AllGuS.E13_3, date(2019, 1, 1), dec(50)), date(2019, 1, 1), date(2020, 12, 31)),
+            "c": Anstellung(Stelle(AllGuS.E13_5, date(2019, 1, 1)), date(2020, 4, 1), date(2020, 12, 31)),
+            # wechselt 2020 von E10 nach E13
+            "d": Anstellung(Stelle(AllGuS.E10_2, date(2019, 1, 1)), date(2019, 1, 1), date(2020, 12, 31),
+                            [(date(2020, 7, 1), Stelle(AllGuS.E13_2, date(2020, 7, 1)))]),
+        }
+        for kennung, anst in self.anstellungen.items():
+            self.index.hinzufügen(kennung, self.summierer.calcSpalten(anst)[1])
+
+    def erwartet(self, jahr, gruppe=None):
+        kosten = {}
+        for kennung, anst in self.anstellungen.items():
+            for zeile in self.summierer.iterCalc(anst):
+                if zeile.stichtag.year == jahr and gruppe in (None, zeile.gus.gruppe):
+                    kosten[kennung] = kosten.get(kennung, Decimal(0)) + zeile.kosten + zeile.sonderzahlung
+        return sorted(((k, jahr, v) for k, v in kosten.items()), key=lambda t: t[2], reverse=True)
+
+    def testGrößte(self):
+        self.assertEqual(self.erwartet(2020)[:2], self.index.größte(2020, 2))
+        self.assertEqual(self.erwartet(2020), self.index.größte(2020, 10))
+        self.assertEqual(self.erwartet(2020, Entgeltgruppe.E_13), self.index.größte(2020, 10, Entgeltgruppe.E_13))
+        self.assertEqual([], self.index.größte(2030, 10))
+
+    def testÜberUndBereich(self):
+        alle2020 = self.erwartet(2020)
+        schwelle = alle2020[2][2]
+        self.assertEqual(alle2020[:2], self.index.über(schwelle, 2020))
+        self.assertEqual(alle2020[1:3], self.index.bereich(schwelle, alle2020[0][2], 2020))
+
+        überAlle = self.index.über(Decimal(0))
+        self.assertEqual(self.erwartet(2019) + alle2020, überAlle)
+        self.assertEqual({"a", "d"}, {t.kennung for t in self.index.über(Decimal(0), gruppe=Entgeltgruppe.E_10)})
+
+    def testÄndernUndEntfernen(self):
+        self.anstellungen["c"] = Anstellung(Stelle(AllGuS.E13_5, date(2019, 1, 1)), date(2019, 4, 1), date(2020, 12, 31))
+        self.index.hinzufügen("c", self.summierer.calcSpalten(self.anstellungen["c"])[1])
+        self.assertEqual(self.erwartet(2019), self.index.größte(2019, 10))
+
+        del self.anstellungen["a"]
+        self.index.entfernen("a")
+        self.assertNotIn("a", self.index)
+        self.assertEqual(self.erwartet(2020), self.index.größte(2020, 10))
+        self.assertEqual(self.erwartet(2020, Entgeltgruppe.E_10), self.index.größte(2020, 10, Entgeltgruppe.E_10))
+
+    def testHinzufügenAlleWieEinzeln(self):
+        self.anstellungen["c"] = Anstellung(Stelle(AllGuS.E13_5, date(2019, 1, 1)), date(2019, 4, 1), date(2020, 12, 31))
+        self.anstellungen["e"] = Anstellung(Stelle(AllGuS.E10_1, date(2019, 1, 1)), date(2019, 1, 1), date(2019, 6, 30))
+        self.index.hinzufügenAlle((k, self.summierer.calcSpalten(self.anstellungen[k])[1]) for k in ("c", "e"))
+
+        einzeln = KostenIndex()
+        for kennung, anst in self.anstellungen.items():
+            einzeln.hinzufügen(kennung, self.summierer.calcSpalten(anst)[1])
+        self.assertEqual(einzeln._sortiert, self.index._sortiert)
+        self.assertEqual(einzeln._einträge, self.index._einträge)
+        self.assertEqual(self.erwartet(2019), self.index.größte(2019, 10))
+
+        self.index.hinzufügenAlle([("c", []), ("e", [])])
+        self.assertIn("c", self.index)
+        self.assertIsNone(self.index.kosten("c", 2020))
+        self.assertEqual({"a", "b", "d"}, {t.kennung for t in self.index.über(Decimal(0))})
+
+
+class PortfolioKostenTest(TestMitGehältern):
+
+    def testNachgeführt(self):
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        portfolio = InkrementellesPortfolio(Summierer(self.ötv))
+        anst = Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1)), date(2019, 1, 1), date(2019, 12, 31))
+        portfolio.hinzufügen(Position("a", anst), Position("b", Anstellung(anst.stelle, anst.von, date(2019, 6, 30))))
+        self.assertEqual(["a", "b"], [t.kennung for t in portfolio.kosten.größte(2019, 2)])
+        self.assertEqual(Treffer("a", 2019, portfolio.ergebnisse["a"][1].nachJahr()[2019]),
+                         portfolio.kosten.größte(2019, 1)[0])
+
+        portfolio.entfernen("a")
+        self.assertEqual(["b"], [t.kennung for t in portfolio.kosten.über(Decimal(0))])
+
+
+if __name__ == "__main__":
+    unittest.main()
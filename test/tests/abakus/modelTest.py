@@ -1,7 +1,12 @@
+import copy
+import pickle
 import unittest
+from dataclasses import FrozenInstanceError
 from datetime import date
+from decimal import Decimal
 
-from abakus.model import GuS, Stufe, ÖtvKosten, Stelle, AllGuS, Gehälter, dec
+from abakus.model import GuS, Stufe, ÖtvKosten, Stelle, AllGuS, Gehälter, dec, Entgeltgruppe, gusAusCodes, _ÖtvDaten, \
+    ÖtvStand
 
 
 class StufenTest(unittest.TestCase):
@@ -42,6 +47,54 @@ class DatierteGuSTest(unittest.TestCase):
         start = Stelle(AllGuS.E10_6, date(2019, 1, 1))
         self.assertEqual(start, start.am(date(2043, 3, 4)))
 
+    def testAmWieMitStufen(self):
+        for stufe in Stufe:
+            start = Stelle(GuS(Entgeltgruppe.E_13, stufe), date(2016, 3, 1), dec(50))
+            for jahr in range(2016, 2040):
+                datum = date(jahr, 3, 1)
+                neueStufe, neuesSeit, nächstesSeit = stufe, start.beginn, stufe.nächsterAufstieg(start.beginn)
+                while nächstesSeit <= datum:
+                    neuesSeit, neueStufe = nächstesSeit, neueStufe.nächste()
+                    nächstesSeit = neueStufe.nächsterAufstieg(nächstesSeit)
+                erwartet = start if neueStufe == stufe else \
+                    Stelle(GuS(Entgeltgruppe.E_13, neueStufe), neuesSeit, dec(50))
+                self.assertEqual(erwartet, start.am(datum))
+
+
+class FlyweightTest(unittest.TestCase):
+
+    def testGuSEinmalig(self):
+        self.assertIs(AllGuS.E13_4, GuS(Entgeltgruppe.E_13, Stufe.vier))
+        self.assertIs(AllGuS.E13_4, gusAusCodes(13, 4))
+        self.assertIs(AllGuS.E13_4, copy.copy(AllGuS.E13_4))
+        self.assertIs(AllGuS.E13_4, pickle.loads(pickle.dumps(AllGuS.E13_4)))
+
+    def testGuSCodes(self):
+        codes = {gus.code for gus in (GuS(g, s) for g in Entgeltgruppe for s in Stufe)}
+        self.assertEqual(len(Entgeltgruppe) * len(Stufe), len(codes))
+        self.assertEqual((10, 2), (AllGuS.E10_2.gruppenCode, AllGuS.E10_2.stufenCode))
+
+    def testWieDataclass(self):
+        stelle = Stelle(AllGuS.E10_2, date(2019, 1, 1))
+        self.assertEqual("GuS(gruppe=<Entgeltgruppe.E_10: 10>, stufe=<Stufe.zwei: 2>)", repr(AllGuS.E10_2))
+        self.assertEqual("Stelle(gus=GuS(gruppe=<Entgeltgruppe.E_10: 10>, stufe=<Stufe.zwei: 2>), "
+                         "beginn=datetime.date(2019, 1, 1), umfangProzent=Decimal('100.00'))", repr(stelle))
+        self.assertEqual(hash((AllGuS.E10_2, date(2019, 1, 1), Decimal("100.00"))), hash(stelle))
+        self.assertEqual(stelle, Stelle(AllGuS.E10_2, date(2019, 1, 1), Decimal(100)))
+        self.assertNotEqual(stelle, Stelle(AllGuS.E10_2, date(2019, 1, 1), dec(50)))
+        self.assertNotEqual(stelle, (AllGuS.E10_2, date(2019, 1, 1), dec(100)))
+        self.assertEqual(stelle, pickle.loads(pickle.dumps(stelle)))
+        self.assertEqual(stelle, copy.deepcopy(stelle))
+
+    def testUnveränderlich(self):
+        stelle = Stelle(AllGuS.E10_2, date(2019, 1, 1))
+        gehälter = Gehälter(dec(50), {Stufe.eins: dec(1000)})
+        for obj, name in ((AllGuS.E10_2, "stufe"), (stelle, "beginn"), (gehälter, "sonderZahlProzent")):
+            with self.assertRaises(FrozenInstanceError):
+                setattr(obj, name, None)
+            self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertEqual(gehälter, pickle.loads(pickle.dumps(gehälter)))
+
 
 class TestMitGehältern(unittest.TestCase):
 
@@ -55,6 +108,19 @@ class TestMitGehältern(unittest.TestCase):
         self.ötv.mitGehalt(jahr, gus.gruppe, Gehälter(dec(sonderProzent),
                                                       {gus.stufe : dec(brutto)}))
 
+    def givenGehälter(self, jahr: int, gruppe: Entgeltgruppe, sonderProzent, *bruttos):
+        """
+            setzt die Bruttogehälter für alle Stufen ab Stufe 1
+        """
+        self.ötv.mitGehalt(jahr, gruppe, self.gehälter(sonderProzent, *bruttos))
+
+    @staticmethod
+    def gehälter(sonderProzent, *bruttos) -> Gehälter:
+        """
+            :return: Gehälter mit den Bruttogehältern für alle Stufen ab Stufe 1
+        """
+        return Gehälter(dec(sonderProzent), {Stufe(s): dec(b) for s, b in enumerate(bruttos, start=1)})
+
 
 class KostenBerechnungTest(TestMitGehältern):
 
@@ -73,6 +139,56 @@ class KostenBerechnungTest(TestMitGehältern):
         self.assertAlmostEqual(dec(1.3 * 8. * .4 * .75), self.ötv.sonderzahlung(2012, s))
 
 
+class ÖtvStandTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehalt(2012, AllGuS.E10_3, 8., 75.)
+        self.givenGehalt(2013, AllGuS.E10_3, 9., 70.)
+
+    def testWieÖtvKosten(self):
+        stand = self.ötv.einfrieren()
+        s = Stelle(AllGuS.E10_3, date(2012, 1, 1), dec(40.))
+        for jahr in (2012, 2013, 2020):
+            self.assertEqual(self.ötv.monatsGesamt(jahr, s), stand.monatsGesamt(jahr, s))
+            self.assertEqual(self.ötv.sonderzahlung(jahr, s), stand.sonderzahlung(jahr, s))
+        self.assertEqual(self.ötv.prüfsumme(), stand.prüfsumme())
+        self.assertRaises(AssertionError, stand.gehälterFür, 2012, Entgeltgruppe.E_13)
+
+    def testUnabhängigVomOriginal(self):
+        stand = self.ötv.einfrieren()
+        self.givenGehalt(2014, AllGuS.E10_3, 10., 70.)
+        self.assertEqual(dec(1.3 * 9.), stand._monatsGesamt(2014, AllGuS.E10_3))
+
+    def testUnveränderlich(self):
+        stand = self.ötv.einfrieren()
+        with self.assertRaises(AttributeError):
+            stand.zuschlag = 2
+        with self.assertRaises(TypeError):
+            stand.gehälterFür(2012, Entgeltgruppe.E_10).bruttoByStufe[Stufe.eins] = dec(1.)
+        self.assertFalse(hasattr(stand, "mitGehalt"))
+
+    def testPickle(self):
+        stand = self.ötv.einfrieren()
+        kopie = pickle.loads(pickle.dumps(stand))
+        self.assertIsInstance(kopie, ÖtvStand)
+        self.assertEqual(dict(stand.einträge()), dict(kopie.einträge()))
+        self.assertEqual(stand.zuschlag, kopie.zuschlag)
+        self.assertEqual(stand.prüfsumme(), kopie.prüfsumme())
+        self.assertEqual(2013, kopie.letztesJahr(Entgeltgruppe.E_10))
+        with self.assertRaises(TypeError):
+            kopie.gehälterFür(2012, Entgeltgruppe.E_10).bruttoByStufe[Stufe.eins] = dec(1.)
+
+    def testBasisIstAbstrakt(self):
+        with self.assertRaises(TypeError):
+            _ÖtvDaten()
+
+    def testGehälterOderNone(self):
+        for ötv in (self.ötv, self.ötv.einfrieren()):
+            self.assertEqual(ötv.gehälterFür(2013, Entgeltgruppe.E_10), ötv.gehälterOderNone(2015, Entgeltgruppe.E_10))
+            self.assertIsNone(ötv.gehälterOderNone(2012, Entgeltgruppe.E_13))
+
+
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
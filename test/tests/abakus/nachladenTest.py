@@ -0,0 +1,86 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from abakus import resources
+from abakus.laufend import Summierer
+from abakus.model import Entgeltgruppe
+from abakus.nachladen import ÖtvNachlader
+
+
+class ÖtvNachladerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.csv = Path(self.tmpDir.name) / "ötv.csv"
+        self.original = Path(resources.path("ötv.csv")).read_text()
+        self.schreibe(self.original, 1)
+
+        self.summierer = Summierer(None)
+        self.nachlader = ÖtvNachlader(self.summierer, self.csv)
+        self.nachlader.lade()
+
+    def tearDown(self):
+        self.nachlader.stop()
+        self.tmpDir.cleanup()
+
+    def schreibe(self, text, zeit):
+        self.csv.write_text(text)
+        os.utime(str(self.csv), (zeit, zeit))
+
+    def testUnverändert(self):
+        self.assertIsNotNone(self.summierer.ötv)
+        self.assertFalse(self.nachlader.prüfe())
+
+    def testNeueDaten(self):
+        alt = self.summierer.ötv
+        gewechselt = []
+        self.nachlader.beiWechsel.append(gewechselt.append)
+
+        self.schreibe(self.original + "2023	E10	80,00	1,00	2,00	3,00	4,00	5,00	6,00\n", 2)
+
+        self.assertTrue(self.nachlader.prüfe())
+        self.assertIsNot(alt, self.summierer.ötv)
+        self.assertEqual([self.summierer.ötv], gewechselt)
+        self.assertEqual(80, self.summierer.ötv.gehälterFür(2023, Entgeltgruppe.E_10).sonderZahlProzent)
+        self.assertEqual(alt.gehälterFür(2022, Entgeltgruppe.E_10),
+                         self.summierer.ötv.gehälterFür(2022, Entgeltgruppe.E_10))
+
+    def testFehlerhafteDatenWerdenIgnoriert(self):
+        alt = self.summierer.ötv
+        gemeldet = []
+        self.nachlader.beiFehler.append(gemeldet.append)
+        self.schreibe(self.original + "2023	E10	kaputt\n", 2)
+
+        self.assertFalse(self.nachlader.prüfe())
+        self.assertIs(alt, self.summierer.ötv)
+        self.assertEqual(1, len(self.nachlader.letzteFehler))
+        self.assertEqual([self.nachlader.letzteFehler], gemeldet)
+
+    def testHintergrund(self):
+        self.nachlader.intervall = 0.01
+        self.nachlader.start()
+        self.schreibe(self.original + "2023	E10	80,00	1,00	2,00	3,00	4,00	5,00	6,00\n", 2)
+        for _ in range(500):
+            if (2023, Entgeltgruppe.E_10) in dict(self.summierer.ötv.einträge()):
+                break
+            self.nachlader._stop.wait(0.01)
+        self.assertIn((2023, Entgeltgruppe.E_10), dict(self.summierer.ötv.einträge()))
+
+    def testSofortLadenImHintergrund(self):
+        summierer = Summierer(None)
+        nachlader = ÖtvNachlader(summierer, self.csv, intervall=10.)
+        geladen = threading.Event()
+        nachlader.beiWechsel.append(lambda _ötv: geladen.set())
+        try:
+            nachlader.start(sofortLaden=True)
+            self.assertTrue(geladen.wait(5.))
+        finally:
+            nachlader.stop()
+        self.assertEqual(self.summierer.ötv.prüfsumme(), summierer.ötv.prüfsumme())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from datetime import date
+from unittest import mock
+
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from abakus.portfolio import PortfolioSummierer, Position, InkrementellesPortfolio
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class PortfolioSummiererTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 77.66, 3228.23, 3502.94, 3763.34, 4025.67, 4524.79, 4660.53)
+        self.givenGehälter(2020, Entgeltgruppe.E_10, 75.31, 3367.04, 3612.23, 3880.76, 4151.27, 4665.96, 4805.94)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 48.54, 3837.26, 4198.44, 4422.39, 4857.49, 5458.94, 5622.71)
+        self.summierer = Summierer(self.ötv)
+
+    def testWieEinzelberechnung(self):
+        positionen = []
+        for i, umfang in enumerate((100, 33, 50, 67, 75, 80, 99)):
+            for gus in (AllGuS.E10_2, AllGuS.E13_4):
+                stelle = Stelle(gus, date(2017, 9, 1), dec(umfang))
+                positionen.append(Position("{}-{}".format(gus, i),
+                                           Anstellung(stelle, date(2019, 2, 1), date(2020, 12, 31))))
+        gemischt = Anstellung(Stelle(AllGuS.E10_2, date(2019, 1, 1), dec(50)), date(2019, 1, 1), date(2020, 6, 30),
+                              [(date(2019, 10, 1), Stelle(AllGuS.E10_2, date(2019, 1, 1), dec(70)))])
+        positionen.append(Position("gemischt", gemischt))
+
+        portfolio = PortfolioSummierer(self.summierer)
+        ergebnisse = portfolio.berechne(positionen)
+
+        self.assertEqual(3, portfolio.klassenAnzahl)
+        self.assertEqual([p.kennung for p in positionen], list(ergebnisse))
+        for position in positionen:
+            total, spalten = ergebnisse[position.kennung]
+            einzelTotal, einzelSpalten = self.summierer.calcSpalten(position.anstellung)
+            self.assertEqual(einzelTotal, total, position.kennung)
+            self.assertEqual(einzelSpalten.alsBytes(), spalten.alsBytes(), position.kennung)
+
+    def testKlassenTeilenSpalten(self):
+        s = Stelle(AllGuS.E10_2, date(2019, 1, 1))
+        positionen = [Position(str(u), Anstellung(Stelle(s.gus, s.beginn, dec(u)), date(2019, 1, 1), date(2019, 12, 31)))
+                      for u in (40, 60)]
+        ergebnisse = PortfolioSummierer(self.summierer).berechne(positionen)
+        self.assertIs(ergebnisse["40"][1].vollkosten.obj, ergebnisse["60"][1].vollkosten.obj)
+
+    def testDoppelteKennungen(self):
+        anst = Anstellung(Stelle(AllGuS.E10_2, date(2019, 1, 1)), date(2019, 1, 1), date(2019, 12, 31))
+        positionen = [Position("a", anst), Position("b", anst), Position("a", anst)]
+        with self.assertRaises(AssertionError):
+            PortfolioSummierer(self.summierer).berechne(positionen)
+
+        portfolio = InkrementellesPortfolio(self.summierer)
+        with self.assertRaises(AssertionError):
+            portfolio.hinzufügen(*positionen)
+        self.assertFalse(portfolio.positionen)
+
+    def testFehlerLässtPortfolioUnverändert(self):
+        anst = Anstellung(Stelle(AllGuS.E10_2, date(2019, 1, 1)), date(2019, 1, 1), date(2019, 12, 31))
+        portfolio = InkrementellesPortfolio(self.summierer)
+        portfolio.hinzufügen(Position("a", anst))
+        vorher = portfolio.total()
+
+        with mock.patch.object(PortfolioSummierer, "_berechneVoll", side_effect=AssertionError("kaputt")), \
+                self.assertRaises(AssertionError):
+            portfolio.hinzufügen(Position("a", anst), Position("b", anst))
+
+        self.assertEqual(["a"], list(portfolio.positionen))
+        self.assertEqual(["a"], list(portfolio.ergebnisse))
+        self.assertEqual(vorher, portfolio.total())
+        portfolio.entfernen("a")
+        self.assertFalse(portfolio.positionen)
+        self.assertEqual(0, portfolio.total())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, GuS, Stufe, Entgeltgruppe, dec
+from abakus.raster import Raster, Vorgeschichte, Zelle, bisNachMonaten
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class RasterTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 77.66, 3228.23, 3502.94, 3763.34, 4025.67, 4524.79, 4660.53)
+        self.givenGehälter(2020, Entgeltgruppe.E_10, 75.31, 3367.04, 3612.23, 3880.76, 4151.27, 4665.96, 4805.94)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 48.54, 3837.26, 4198.44, 4422.39, 4857.49, 5458.94, 5622.71)
+        self.givenGehälter(2020, Entgeltgruppe.E_13, 47.07, 4002.26, 4329.43, 4560.37, 5009.04, 5629.26, 5798.14)
+        self.summierer = Summierer(self.ötv)
+
+    def testWieEinzelberechnung(self):
+        gruppen = [Entgeltgruppe.E_10, Entgeltgruppe.E_13]
+        vorgeschichten = [Vorgeschichte(Stufe.eins), Vorgeschichte(Stufe.zwei, date(2017, 9, 1))]
+        vonDaten = [date(2019, 1, 1), date(2019, 6, 15)]
+        umfänge = [dec(u) for u in (33, 50, 65, 77, 100)]
+
+        würfel = Raster(self.summierer).berechne(gruppen, vorgeschichten, vonDaten, umfänge, 20)
+        self.assertEqual(40, len(würfel))
+
+        for zelle, ergebnis in würfel.werte.items():
+            anst = Anstellung(Stelle(GuS(zelle.gruppe, zelle.vorgeschichte.stufe),
+                                     zelle.vorgeschichte.stufenBeginn(zelle.von), zelle.umfang),
+                              zelle.von, bisNachMonaten(zelle.von, 20))
+            total, details = self.summierer.calc(anst)
+            self.assertEqual(total, ergebnis.kosten, zelle)
+            self.assertEqual(sum(mk.sonderzahlung for mk in details), ergebnis.sonderzahlungen, zelle)
+
+    def testTabelle(self):
+        vg = Vorgeschichte(Stufe.eins)
+        würfel = Raster(self.summierer).berechne([Entgeltgruppe.E_10, Entgeltgruppe.E_13], [vg],
+                                                 [date(2019, 1, 1)], [dec(50), dec(100)], 12)
+        zeilen, spalten, werte = würfel.tabelle("gruppe", "umfang", vorgeschichte=vg, von=date(2019, 1, 1))
+
+        self.assertEqual([Entgeltgruppe.E_10, Entgeltgruppe.E_13], zeilen)
+        self.assertEqual([dec(50), dec(100)], spalten)
+        self.assertEqual(würfel[Zelle(Entgeltgruppe.E_13, vg, date(2019, 1, 1), dec(100))].gesamt, werte[1][1])
+        self.assertRaises(AssertionError, würfel.tabelle, "gruppe", "umfang", von=date(2019, 1, 1))
+
+    def testBisNachMonaten(self):
+        self.assertEqual(date(2019, 1, 31), bisNachMonaten(date(2019, 1, 15), 1))
+        self.assertEqual(date(2020, 2, 29), bisNachMonaten(date(2019, 3, 1), 12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from abakus import resources
+
+
+class ResourcesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.verzeichnis = Path(self.tmpDir.name) / "resources"
+        self.verzeichnis.mkdir()
+        (self.verzeichnis / "text.txt").write_text("Grüße\n", encoding="utf-8")
+        (self.verzeichnis / "daten.bin").write_bytes(b"\x00\x01")
+
+    def tearDown(self):
+        resources._verwende()
+        self.tmpDir.cleanup()
+
+    def prüfeZugriffe(self):
+        self.assertEqual(b"\x00\x01", resources.read("daten.bin"))
+        self.assertEqual("Grüße\n", resources.load("text.txt", lambda f: f.read()))
+        self.assertTrue(resources.exists("text.txt"))
+        self.assertFalse(resources.exists("fehlt.txt"))
+        with self.assertRaises(FileNotFoundError), self.assertLogs(level="ERROR"):
+            resources.read("fehlt.txt")
+        self.assertEqual(b"\x00\x01", Path(resources.path("daten.bin")).read_bytes())
+
+    def testVerzeichnis(self):
+        resources._verwende(self.verzeichnis)
+        self.prüfeZugriffe()
+
+    def testArchiv(self):
+        zusatz = Path(self.tmpDir.name) / "zusatz.css"
+        zusatz.write_text("a:1;")
+        archiv = Path(self.tmpDir.name) / resources.ARCHIV_NAME
+        resources.packe(archiv, self.verzeichnis, zusatz)
+
+        resources._verwende(archiv)
+        self.prüfeZugriffe()
+        self.assertEqual(b"a:1;", resources.read("zusatz.css"))
+
+    def testEditierbarNebenDemArchiv(self):
+        (self.verzeichnis / "ötv.csv").write_text("2019\n")
+        ziel = Path(self.tmpDir.name) / "export"
+        ziel.mkdir()
+        archiv = ziel / resources.ARCHIV_NAME
+        resources.packe(archiv, self.verzeichnis)
+
+        resources._verwende(archiv)
+        self.assertTrue(resources.exists("ötv.csv"))
+        self.assertEqual(ziel / "ötv.csv", Path(resources.path("ötv.csv")))
+        self.assertEqual(b"2019\n", resources.read("ötv.csv"))
+        with zipfile.ZipFile(str(archiv)) as zf:
+            self.assertNotIn("ötv.csv", zf.namelist())
+        self.prüfeZugriffe()
+
+    def testInhalteWerdenGemerkt(self):
+        resources._verwende(self.verzeichnis)
+        self.assertEqual(b"\x00\x01", resources.read("daten.bin"))
+        (self.verzeichnis / "daten.bin").unlink()
+        self.assertEqual(b"\x00\x01", resources.read("daten.bin"))
+
+    def testEditierbareWerdenNeuGelesen(self):
+        (self.verzeichnis / "ötv.csv").write_text("2019\n")
+        resources._verwende(self.verzeichnis)
+        self.assertEqual("2019\n", resources.load("ötv.csv", lambda f: f.read()))
+        (self.verzeichnis / "ötv.csv").write_text("2020\n")
+        self.assertEqual("2020\n", resources.load("ötv.csv", lambda f: f.read()))
+
+    def testStandardort(self):
+        resources._verwende()
+        self.assertTrue(resources.read("ötv.csv"))
+        self.assertTrue(resources.exists("stylesheet.vars.css"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import pickle
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from abakus.spalten import KostenSpalten
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class KostenSpaltenTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2001.11, 2501.13, 3001.17, 3407.33, 3801.19, 4001.23)
+        self.summierer = Summierer(self.ötv)
+        self.anst = Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), dec(33.)),
+                               date(2019, 1, 1), date(2020, 3, 31))
+
+    def testWieMonatsKosten(self):
+        total, details = self.summierer.calc(self.anst)
+        spaltenTotal, spalten = self.summierer.calcSpalten(self.anst)
+
+        self.assertEqual(total, spaltenTotal)
+        self.assertEqual(len(details), len(spalten))
+        for mk, zeile in zip(details, spalten):
+            self.assertEqual(mk.stichtag, zeile.stichtag)
+            self.assertEqual(mk.stelle.gus, zeile.gus)
+            self.assertEqual(mk.stelle.umfangProzent, zeile.umfangProzent)
+            self.assertEqual(str(mk.kosten), str(zeile.kosten))
+            self.assertEqual(mk.sonderzahlung, zeile.sonderzahlung)
+
+    def testAusMonatsKosten(self):
+        _total, details = self.summierer.calc(self.anst)
+        _total, spalten = self.summierer.calcSpalten(self.anst)
+
+        aus = KostenSpalten.aus(details)
+        self.assertEqual(list(spalten.vollkosten), list(aus.vollkosten))
+        self.assertEqual(list(spalten.sonderzahlungen), list(aus.sonderzahlungen))
+
+    def testSlicingUndAggregation(self):
+        total, details = self.summierer.calc(self.anst)
+        _total, spalten = self.summierer.calcSpalten(self.anst)
+
+        self.assertEqual(total, spalten.summe())
+        self.assertEqual(sum(mk.sonderzahlung for mk in details), spalten.summeSonderzahlungen())
+
+        teil = spalten[3:5]
+        self.assertEqual(2, len(teil))
+        self.assertEqual(details[3].stichtag, teil[0].stichtag)
+        self.assertEqual(details[4].kosten, teil[-1].kosten)
+        self.assertIs(spalten.vollkosten.obj, teil.vollkosten.obj)
+
+        nachJahr = spalten.nachJahr()
+        self.assertEqual(sum(mk.kosten + mk.sonderzahlung for mk in details if mk.stichtag.year == 2020),
+                         nachJahr[2020])
+        self.assertEqual(total + spalten.summeSonderzahlungen(), sum(nachJahr.values()))
+
+    def testPickle(self):
+        _total, spalten = self.summierer.calcSpalten(self.anst)
+        teil = pickle.loads(pickle.dumps(spalten[3:5]))
+        self.assertEqual(spalten[3:5].alsBytes(), teil.alsBytes())
+        self.assertEqual(spalten[3:5].summe(), teil.summe())
+
+    def testLeer(self):
+        spalten = KostenSpalten.aus([])
+        self.assertEqual(0, len(spalten))
+        self.assertEqual(Decimal(0), spalten.summe())
+        self.assertRaises(IndexError, lambda: spalten[0])
+
+    def testUmfangNurInHundertstelProzent(self):
+        anst = Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), Decimal("33.333")), date(2019, 1, 1), date(2019, 3, 31))
+        self.assertRaises(ValueError, self.summierer.calcSpalten, anst)
+
+        anst = Anstellung(Stelle(AllGuS.E10_3, date(2016, 8, 1), Decimal("33.330")), date(2019, 1, 1), date(2019, 3, 31))
+        self.assertEqual(self.summierer.calc(anst)[0], self.summierer.calcSpalten(anst)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from abakus import stapel
+from abakus.binärPositionen import PositionsDatei, schreibe
+from abakus.aggregation import aggregiere, nachJahr, nachGruppe, nachMerkmal, nachGeschäftsjahr
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, dec
+from abakus.portfolio import Position
+from abakus.stapel import StapelLauf, leseCheckpoint
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class StapelLaufTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 77.66, 3228.23, 3502.94, 3763.34, 4025.67, 4524.79, 4660.53)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 48.54, 3837.26, 4198.44, 4422.39, 4857.49, 5458.94, 5622.71)
+        self.summierer = Summierer(self.ötv)
+
+        self.positionen = []
+        for i, umfang in enumerate((100, 50, 75)):
+            for gus in (AllGuS.E10_2, AllGuS.E13_4):
+                stelle = Stelle(gus, date(2017, 9, 1), dec(umfang))
+                self.positionen.append(Position("{}-{}".format(gus, i),
+                                                Anstellung(stelle, date(2019, 2, 1), date(2019, 12, 31)),
+                                                {"projekt": "P{}".format(i % 2)}))
+
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.pfad = Path(self.tmpDir.name) / "lauf.json"
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def erwartet(self, *schlüssel):
+        summen = {}
+        for p in self.positionen:
+            for key, s in aggregiere(self.summierer.iterCalc(p.anstellung), *schlüssel, merkmale=p.merkmale).items():
+                summen.setdefault(key, stapel.Summen()).add(s)
+        return summen
+
+    def testVollständigerLauf(self):
+        lauf = StapelLauf(self.summierer, self.pfad, nachGruppe, nachMerkmal("projekt"), blockGröße=4)
+        self.assertEqual(self.erwartet(nachGruppe, nachMerkmal("projekt")), lauf.lauf(self.positionen))
+        self.assertEqual((6, 6), lauf.zwischenstand()[:2])
+
+        checkpoint = leseCheckpoint(self.pfad)
+        self.assertTrue(checkpoint.abgeschlossen)
+        self.assertEqual(6, checkpoint.fertig)
+        self.assertEqual(self.erwartet(nachGruppe, nachMerkmal("projekt")), checkpoint.summen)
+
+    def testFortsetzungNachAbbruch(self):
+        echt = stapel.schreibeCheckpoint
+        aufrufe = []
+
+        def brichAb(pfad, checkpoint):
+            aufrufe.append(checkpoint.fertig)
+            if len(aufrufe) == 2:
+                raise KeyboardInterrupt()
+            echt(pfad, checkpoint)
+
+        lauf = StapelLauf(self.summierer, self.pfad, blockGröße=2)
+        with mock.patch.object(stapel, "schreibeCheckpoint", brichAb), self.assertRaises(KeyboardInterrupt):
+            lauf.lauf(self.positionen)
+
+        zwischen = leseCheckpoint(self.pfad)
+        self.assertFalse(zwischen.abgeschlossen)
+        self.assertEqual(2, zwischen.fertig)
+        self.assertEqual((2, 6), lauf.zwischenstand()[:2])
+        self.assertEqual(zwischen.summen, lauf.zwischenstand()[2])
+
+        with mock.patch.object(stapel.PortfolioSummierer, "berechne",
+                               autospec=True, side_effect=stapel.PortfolioSummierer.berechne) as berechne:
+            with self.assertLogs(level="INFO") as logs:
+                summen = StapelLauf(self.summierer, self.pfad, blockGröße=2).lauf(self.positionen)
+        self.assertIn("fort", logs.output[0])
+        self.assertEqual(self.erwartet(nachJahr), summen)
+        self.assertEqual(4, sum(len(c.args[1]) for c in berechne.call_args_list))
+
+    def testNeuerTarifBeginntNeu(self):
+        StapelLauf(self.summierer, self.pfad).lauf(self.positionen[:3])
+        self.givenGehälter(2020, Entgeltgruppe.E_10, 80.00, 3228.23, 3502.94, 3763.34, 4025.67, 4524.79, 4660.53)
+
+        with self.assertLogs(level="WARNING"):
+            summen = StapelLauf(self.summierer, self.pfad).lauf(self.positionen)
+        self.assertEqual(self.erwartet(nachJahr), summen)
+
+    def testSchlüsselMitParametern(self):
+        StapelLauf(self.summierer, self.pfad, nachMerkmal("projekt")).lauf(self.positionen)
+        for schlüssel in (nachMerkmal("kst"), nachGeschäftsjahr(7)):
+            with self.assertLogs(level="WARNING"):
+                summen = StapelLauf(self.summierer, self.pfad, schlüssel).lauf(self.positionen)
+            self.assertEqual(self.erwartet(schlüssel), summen)
+
+        with self.assertLogs(level="WARNING"):
+            StapelLauf(self.summierer, self.pfad, nachGeschäftsjahr(4)).lauf(self.positionen[:2])
+        with self.assertLogs(level="WARNING"):
+            StapelLauf(self.summierer, self.pfad, nachGeschäftsjahr(7)).lauf(self.positionen)
+
+    def testPositionenWerdenNurDurchlaufen(self):
+        gelesen = []
+
+        def positionen():
+            for p in self.positionen:
+                gelesen.append(p.kennung)
+                yield p
+
+        lauf = StapelLauf(self.summierer, self.pfad, blockGröße=2)
+        self.assertEqual(self.erwartet(nachJahr), lauf.lauf(positionen()))
+        self.assertEqual([p.kennung for p in self.positionen], gelesen)
+        self.assertEqual((6, 6), lauf.zwischenstand()[:2])
+
+        # mehr Positionen setzen den abgeschlossenen Lauf fort
+        self.positionen.append(Position("neu", self.positionen[0].anstellung))
+        with self.assertLogs(level="INFO") as logs:
+            self.assertEqual(self.erwartet(nachJahr), lauf.lauf(iter(self.positionen)))
+        self.assertIn("fort", logs.output[0])
+        self.assertEqual(7, leseCheckpoint(self.pfad).fertig)
+
+    def testGeänderteEingabe(self):
+        StapelLauf(self.summierer, self.pfad, blockGröße=2).lauf(self.positionen)
+        self.positionen.reverse()
+
+        with self.assertLogs(level="WARNING"), self.assertRaises(ValueError):
+            StapelLauf(self.summierer, self.pfad).lauf(iter(self.positionen))
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.erwartet(nachJahr), StapelLauf(self.summierer, self.pfad).lauf(self.positionen))
+
+    def testPositionsDatei(self):
+        # das Binärformat kennt keine Merkmale und nur kurze Kennungen
+        self.positionen = [Position("P-{}".format(i), p.anstellung) for i, p in enumerate(self.positionen)]
+        binär = Path(self.tmpDir.name) / "positionen.abkp"
+        with binär.open("wb") as datei:
+            schreibe(datei, self.positionen)
+
+        lauf = StapelLauf(self.summierer, self.pfad, nachGruppe, blockGröße=4)
+        self.assertEqual(self.erwartet(nachGruppe), lauf.lauf(PositionsDatei(binär)))
+        self.assertEqual((6, 6), lauf.zwischenstand()[:2])
+
+    def testDoppelteKennungen(self):
+        with self.assertRaises(AssertionError):
+            StapelLauf(self.summierer, self.pfad, blockGröße=2).lauf(self.positionen + self.positionen[:1])
+
+
+if __name__ == "__main__":
+    unittest.main()
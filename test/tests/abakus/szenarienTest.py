@@ -0,0 +1,55 @@
+import unittest
+from datetime import date
+
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe
+from abakus.szenarien import SzenarioRechner, Steigerung, SzenarioErgebnis
+from tests.abakus.modelTest import TestMitGehältern
+
+
+class SzenarioRechnerTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        self.summierer = Summierer(self.ötv)
+        self.anst = Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1)), date(2019, 1, 1), date(2021, 12, 31))
+
+    def jahresKosten(self):
+        _total, spalten = self.summierer.calcSpalten(self.anst)
+        return {j: float(k) for j, k in spalten.nachJahr().items()}
+
+    def testFesteSteigerung(self):
+        rechner = SzenarioRechner(self.summierer, {Entgeltgruppe.E_10: Steigerung(10.)}, anzahl=3)
+        ergebnis = rechner.simuliere([self.anst])
+
+        k = self.jahresKosten()
+        erwartet = k[2019] + k[2020] * 1.1 + k[2021] * 1.1 * 1.1
+        for summe in ergebnis.summen:
+            self.assertAlmostEqual(erwartet, summe, places=6)
+
+    def testOhneSteigerung(self):
+        ergebnis = SzenarioRechner(self.summierer, {}, anzahl=5).simuliere([self.anst])
+        self.assertAlmostEqual(sum(self.jahresKosten().values()), ergebnis.perzentil(50), places=6)
+
+    def testStreuung(self):
+        rechner = SzenarioRechner(self.summierer, {Entgeltgruppe.E_10: Steigerung(2., 1.)}, anzahl=500, seed=42)
+        ergebnis = rechner.simuliere([self.anst, self.anst])
+        p = ergebnis.perzentile(5, 50, 95)
+        self.assertLess(p[5], p[50])
+        self.assertLess(p[50], p[95])
+        self.assertEqual(ergebnis.summen, rechner.simuliere([self.anst, self.anst]).summen)
+
+
+class SzenarioErgebnisTest(unittest.TestCase):
+
+    def testPerzentil(self):
+        ergebnis = SzenarioErgebnis([3., 1., 2., 4., 5.])
+        self.assertEqual(1., ergebnis.perzentil(0))
+        self.assertEqual(3., ergebnis.perzentil(50))
+        self.assertEqual(4.5, ergebnis.perzentil(87.5))
+        self.assertEqual(5., ergebnis.perzentil(100))
+
+
+if __name__ == "__main__":
+    unittest.main()
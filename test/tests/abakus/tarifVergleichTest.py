@@ -0,0 +1,91 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from abakus.laufend import Summierer, Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe, ÖtvKosten, _ÖtvDaten, dec
+from abakus.portfolio import Position
+from abakus.tarifVergleich import TarifVergleich, vergleichsZeilen, HINZUGEFÜGT, ENTFERNT, GEÄNDERT
+from tests.abakus.modelTest import TestMitGehältern
+
+E10_2019 = (77.66, 3228.23, 3502.94, 3763.34, 4025.67, 4524.79, 4660.53)
+E10_2020 = (75.31, 3367.04, 3612.23, 3880.76, 4151.27, 4665.96, 4805.94)
+E13_2019 = (48.54, 3837.26, 4198.44, 4422.39, 4857.49, 5458.94, 5622.71)
+
+
+class TarifVergleichTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, *E10_2019)
+        self.givenGehälter(2020, Entgeltgruppe.E_10, *E10_2020)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, *E13_2019)
+        self.alt = self.ötv
+
+        # neu: E 10 ab 2021 teurer, E 13 unverändert
+        self.ötv = ÖtvKosten()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, *E10_2019)
+        self.givenGehälter(2020, Entgeltgruppe.E_10, *E10_2020)
+        self.givenGehälter(2021, Entgeltgruppe.E_10, 75.31, 3467.04, 3712.23, 3980.76, 4251.27, 4765.96, 4905.94)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, *E13_2019)
+        self.neu = self.ötv.einfrieren()
+
+    @staticmethod
+    def jahresKosten(ötv, anstellung):
+        summen = {}
+        for mk in Summierer(ötv).iterCalc(anstellung):
+            summen[mk.stichtag.year] = summen.get(mk.stichtag.year, Decimal(0)) + mk.kosten + mk.sonderzahlung
+        return summen
+
+    def testWieZweiLäufe(self):
+        anst = Anstellung(Stelle(AllGuS.E10_2, date(2017, 9, 1), dec(50)), date(2019, 2, 1), date(2022, 6, 30))
+        vergleich = TarifVergleich(self.alt, self.neu).vergleiche(anst)
+
+        alt, neu = self.jahresKosten(self.alt, anst), self.jahresKosten(self.neu, anst)
+        self.assertEqual([2021, 2022], [v.jahr for v in vergleich])
+        for v in vergleich:
+            self.assertEqual((alt[v.jahr], neu[v.jahr]), (v.alt, v.neu))
+            self.assertGreater(v.differenz, 0)
+
+    def testGleicheJahreOhneBerechnung(self):
+        anst = Anstellung(Stelle(AllGuS.E13_4, date(2017, 9, 1)), date(2019, 2, 1), date(2022, 6, 30))
+        vergleich = TarifVergleich(self.alt, self.neu)
+        with mock.patch.object(_ÖtvDaten, "monatsGesamt") as monatsGesamt:
+            self.assertEqual([], vergleich.vergleiche(anst))
+        monatsGesamt.assert_not_called()
+
+    def testSonderzahlungsBasisZählt(self):
+        # E 13 im Jahr 2021, aber im Sommer noch E 10 - die Basis der Sonderzahlung
+        anst = Anstellung(Stelle(AllGuS.E10_2, date(2017, 9, 1)), date(2021, 1, 1), date(2021, 12, 31),
+                          [(date(2021, 8, 1), Stelle(AllGuS.E13_2, date(2021, 8, 1)))])
+        vergleich = TarifVergleich(self.alt, self.neu).vergleiche(anst)
+        self.assertEqual([2021], [v.jahr for v in vergleich])
+        self.assertEqual((self.jahresKosten(self.alt, anst)[2021], self.jahresKosten(self.neu, anst)[2021]),
+                         (vergleich[0].alt, vergleich[0].neu))
+
+    def testZeilen(self):
+        positionen = [Position("a", Anstellung(Stelle(AllGuS.E10_2, date(2017, 9, 1)),
+                                               date(2021, 1, 1), date(2021, 3, 31))),
+                      Position("b", Anstellung(Stelle(AllGuS.E13_2, date(2017, 9, 1)),
+                                               date(2021, 1, 1), date(2021, 3, 31)))]
+        zeilen = list(vergleichsZeilen(TarifVergleich(self.alt, self.neu).vergleichePositionen(positionen)))
+        self.assertEqual([("a", 2021)], [z[:2] for z in zeilen])
+        self.assertEqual(zeilen[0][3] - zeilen[0][2], zeilen[0][4])
+        self.assertEqual(GEÄNDERT, zeilen[0][5])
+
+    def testGruppeNurInEinemStand(self):
+        self.ötv = ÖtvKosten()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, *E10_2019)
+        ohneE13 = self.ötv
+        position = Position("b", Anstellung(Stelle(AllGuS.E13_2, date(2017, 9, 1)), date(2019, 1, 1), date(2019, 3, 31)))
+        kosten = self.jahresKosten(self.neu, position.anstellung)[2019]
+
+        zeilen = list(vergleichsZeilen(TarifVergleich(ohneE13, self.neu).vergleichePositionen([position])))
+        self.assertEqual([("b", 2019, None, kosten, None, HINZUGEFÜGT)], zeilen)
+        zeilen = list(vergleichsZeilen(TarifVergleich(self.neu, ohneE13).vergleichePositionen([position])))
+        self.assertEqual([("b", 2019, kosten, None, None, ENTFERNT)], zeilen)
+
+
+if __name__ == "__main__":
+    unittest.main()
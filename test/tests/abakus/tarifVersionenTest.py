@@ -0,0 +1,60 @@
+import unittest
+from datetime import date, datetime
+
+from abakus.csvÖtv import ÖtvÄnderungen
+from abakus.laufend import Anstellung
+from abakus.model import Stelle, AllGuS, Entgeltgruppe
+from abakus.tarifVersionen import ÖtvVersionen
+from tests.abakus.modelTest import TestMitGehältern
+
+E10_2019_KORRIGIERT = TestMitGehältern.gehälter(75., 2100., 2600., 3100., 3500., 3900., 4100.)
+
+
+class ÖtvVersionenTest(TestMitGehältern):
+
+    def setUp(self):
+        super().setUp()
+        self.givenGehälter(2019, Entgeltgruppe.E_10, 75., 2000., 2500., 3000., 3400., 3800., 4000.)
+        self.givenGehälter(2019, Entgeltgruppe.E_13, 50., 3000., 3500., 4000., 4400., 4800., 5000.)
+        self.e10, self.e13 = (self.ötv.gehälterFür(2019, g) for g in (Entgeltgruppe.E_10, Entgeltgruppe.E_13))
+
+        self.versionen = ÖtvVersionen.aus(self.ötv, "Tarif 2019", datetime(2019, 1, 1))
+        self.versionen.neueVersion({(2019, Entgeltgruppe.E_10): E10_2019_KORRIGIERT},
+                                   bezeichnung="Korrektur", zeitpunkt=datetime(2019, 3, 1))
+        self.anst = Anstellung(Stelle(AllGuS.E10_3, date(2019, 1, 1)), date(2019, 1, 1), date(2019, 12, 31))
+
+    def testÜberschreibenUndTeilen(self):
+        self.assertEqual(2, len(self.versionen))
+        alt, neu = self.versionen.stand(0), self.versionen.stand(1)
+        self.assertEqual(self.e10, alt.gehälterFür(2019, Entgeltgruppe.E_10))
+        self.assertEqual(E10_2019_KORRIGIERT, neu.gehälterFür(2019, Entgeltgruppe.E_10))
+        self.assertIs(alt.gehälterFür(2019, Entgeltgruppe.E_13), neu.gehälterFür(2019, Entgeltgruppe.E_13))
+        self.assertIs(neu, self.versionen.stand())
+
+    def testEntfernen(self):
+        version = self.versionen.übernehme(ÖtvÄnderungen(entfernt={(2019, Entgeltgruppe.E_13)}))
+        with self.assertRaises(AssertionError):
+            self.versionen.stand(version).gehälterFür(2019, Entgeltgruppe.E_13)
+        self.assertEqual(self.e13, self.versionen.stand(version - 1).gehälterFür(2019, Entgeltgruppe.E_13))
+        with self.assertRaises(KeyError):
+            self.versionen.neueVersion(entfernt=[(2019, Entgeltgruppe.E_13)])
+
+    def testVersionAm(self):
+        self.assertEqual(0, self.versionen.versionAm(datetime(2019, 2, 28)))
+        self.assertEqual(1, self.versionen.versionAm(datetime(2019, 3, 1)))
+        self.assertEqual(1, self.versionen.versionAm(datetime(2030, 1, 1)))
+        with self.assertRaises(IndexError):
+            self.versionen.versionAm(datetime(2018, 1, 1))
+        with self.assertRaises(AssertionError):
+            self.versionen.neueVersion(zeitpunkt=datetime(2019, 2, 1))
+
+    def testSummiererJeVersion(self):
+        damals = self.versionen.summierer(self.versionen.versionAm(datetime(2019, 2, 1)))
+        heute = self.versionen.summierer()
+        self.assertEqual(self.ötv.monatsGesamt(2019, self.anst.stelle),
+                         damals.calc(self.anst)[1][0].kosten)
+        self.assertLess(damals.calc(self.anst)[0], heute.calc(self.anst)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,11 @@ __copyright__ = "Copyright 2019, Hans Bering"
 __license__ = "GPL3"
 __status__ = "Development"
 
+import tempfile
 import unittest
+from pathlib import Path
 
-from gui.cssVars import varredCss2Css
+from gui.cssVars import varredCss2Css, compileCss, cachedCss, contentHash
 
 
 class Test(unittest.TestCase):
@@ -32,6 +34,65 @@ class Test(unittest.TestCase):
         self.assertEquals(result,
                           list(varredCss2Css(varred)))
 
+    def testSeveralVariablesPerLine(self):
+        varred = [
+            "/** {Variables}",
+            "x=1",
+            "y=solid",
+            "*/",
+            "border: '{x}'px \"{y}\" '{x}';",
+            "a: {x};"
+        ]
+        self.assertEqual(["/** {Variables}", "x=1", "y=solid", "*/",
+                          "border: 1px solid 1;", "a: {x};"],
+                         list(varredCss2Css(varred)))
+
+    def testErrorsWithLineNumbers(self):
+        with self.assertRaisesRegex(ValueError, "Unknown variable 'y' in line 4"):
+            list(varredCss2Css(["/** {Variables}", "x=1", "*/", "a:'{x}' '{y}';"]))
+        with self.assertRaisesRegex(ValueError, "Duplicate definition for 'x' in line 3"):
+            list(varredCss2Css(["/** {Variables}", "x=1", "x=2", "*/"]))
+        with self.assertRaisesRegex(ValueError, "Could not find definition in line 2"):
+            list(varredCss2Css(["/** {Variables}", "kaputt", "*/"]))
+
+
+class CompileTest(unittest.TestCase):
+
+    varred = "/** {Variables}\nx=1\n*/\na:'{x}';\n"
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cacheDir = Path(self.tmpDir.name)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testCompile(self):
+        compiled = compileCss(self.varred)
+        self.assertTrue(compiled.startswith("/* compiled from {} */\n".format(contentHash(self.varred))))
+        self.assertTrue(compiled.endswith("*/\na:1;\n"))
+
+    def testCachedCssWritesCache(self):
+        varred = self.varred + "b:'{x}';\n"
+        css = cachedCss(varred, self.cacheDir)
+        self.assertEqual(compileCss(varred), css)
+        self.assertEqual([css], [p.read_text(encoding="utf-8") for p in self.cacheDir.iterdir()])
+
+    def testCachedCssUsesPrecompiled(self):
+        varred = self.varred + "c:'{x}';\n"
+        precompiled = compileCss(varred) + "/* shipped */"
+
+        self.assertEqual(precompiled, cachedCss(varred, self.cacheDir, precompiled))
+        self.assertEqual([], list(self.cacheDir.iterdir()))
+
+    def testCachedCssIgnoresStaleCompiled(self):
+        varred = self.varred + "d:'{x}';\n"
+        stale = self.cacheDir / "stylesheet-{}.css".format(contentHash(varred))
+        stale.write_text(compileCss(self.varred), encoding="utf-8")
+
+        self.assertEqual(compileCss(varred), cachedCss(varred, self.cacheDir, compileCss(self.varred)))
+        self.assertEqual(compileCss(varred), stale.read_text(encoding="utf-8"))
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testSimple']
@@ -0,0 +1,79 @@
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+import random
+import unittest
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+from abakus.model import AllGuS
+from gui.dezimierung import MinMaxPyramide, KostenReihe
+
+Zeile = namedtuple("Zeile", "stichtag gus kosten sonderzahlung")
+
+
+class MinMaxPyramideTest(unittest.TestCase):
+
+    def testBereicheWieDirekt(self):
+        rng = random.Random(7)
+        werte = [rng.uniform(-100, 100) for _ in range(300)]
+        pyramide = MinMaxPyramide()
+        for w in werte:
+            pyramide.anhängen(w)
+
+        self.assertEqual(300, len(pyramide))
+        for _ in range(500):
+            von = rng.randrange(300)
+            bis = rng.randrange(von + 1, 301)
+            self.assertEqual((min(werte[von:bis]), max(werte[von:bis])), pyramide.bereich(von, bis))
+
+
+class KostenReiheTest(unittest.TestCase):
+
+    def reihe(self, monate):
+        zeilen = []
+        for i in range(monate):
+            jahr, monat = divmod(i, 12)
+            gus = AllGuS.E10_2 if i < 30 else AllGuS.E10_3
+            zeilen.append(Zeile(date(2019 + jahr, monat + 1, 1), gus, Decimal(1000 + i),
+                                Decimal(500) if monat == 10 else Decimal(0)))
+        return zeilen
+
+    def testMarken(self):
+        reihe = KostenReihe()
+        zeilen = self.reihe(48)
+        reihe.anhängen(zeilen[:20])
+        reihe.anhängen(zeilen[20:])
+
+        self.assertEqual([10, 22, 34, 46], reihe.sonderzahlungen)
+        self.assertEqual([30], reihe.stufenWechsel)
+        self.assertEqual([22, 34], reihe.markenIn(reihe.sonderzahlungen, 11, 35))
+        self.assertEqual((2021, 7), reihe.monat(30))
+
+    def testLückeWirdAbgelehnt(self):
+        reihe = KostenReihe()
+        zeilen = self.reihe(5)
+        reihe.anhängen(zeilen[:2])
+        with self.assertRaises(AssertionError):
+            reihe.anhängen(zeilen[3:])
+
+    def testDezimierungBehältSpitzen(self):
+        reihe = KostenReihe()
+        reihe.anhängen(self.reihe(1200))
+
+        spalten = reihe.dezimiere(0, 1200, 100)
+        self.assertEqual(100, len(spalten))
+        self.assertEqual(1000.0, spalten[0][1])
+        self.assertEqual(1510.0, spalten[0][2])
+        # die Sonderzahlung im letzten November bleibt als Spitze erhalten
+        self.assertEqual(1000.0 + 1198 + 500, spalten[-1][2])
+
+        self.assertEqual([(5, 1005.0, 1005.0), (6, 1006.0, 1006.0)], reihe.dezimiere(5, 7, 100))
+        self.assertEqual([], reihe.dezimiere(1200, 1300, 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+__author__ = "Hans Bering"
+__copyright__ = "Copyright 2019, Hans Bering"
+__license__ = "GPL3"
+__status__ = "Development"
+
+import unittest
+
+from gui.startzeit import Startzeiten
+
+
+class Uhr:
+
+    def __init__(self):
+        self.jetzt = 10.
+
+    def __call__(self):
+        return self.jetzt
+
+
+class StartzeitenTest(unittest.TestCase):
+
+    def setUp(self):
+        self.uhr = Uhr()
+        self.zeiten = Startzeiten(self.uhr)
+
+    def testPhasen(self):
+        self.uhr.jetzt = 10.5
+        with self.zeiten.phase("Fenster"):
+            self.uhr.jetzt = 10.75
+        self.uhr.jetzt = 11.
+        self.zeiten.markiere("erste Anzeige")
+
+        self.assertEqual([("Fenster", .75, .25), ("erste Anzeige", 1., None)], self.zeiten.einträge)
+        self.assertEqual("   750.0 ms  Fenster (250.0 ms)\n  1000.0 ms  erste Anzeige", self.zeiten.bericht())
+
+    def testPhaseMitFehler(self):
+        with self.assertRaises(ValueError):
+            with self.zeiten.phase("kaputt"):
+                self.uhr.jetzt = 11.
+                raise ValueError()
+        self.assertEqual([("kaputt", 1., 1.)], self.zeiten.einträge)
+
+    def testBeginnVorher(self):
+        zeiten = Startzeiten(self.uhr, beginn=9.5)
+        zeiten.markiere("Importe")
+        self.assertEqual([("Importe", .5, None)], zeiten.einträge)
+
+
+if __name__ == "__main__":
+    unittest.main()